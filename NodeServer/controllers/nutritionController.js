@@ -27,7 +27,9 @@ class NutritionController {
         fat: parseFloat(req.body.fat),
         meal_type: req.body.meal_type || null,
         num_items: req.body.num_items ? parseInt(req.body.num_items) : null,
-        include_prices: req.body.include_prices === true || req.body.include_prices === 'true'
+        include_prices: req.body.include_prices === true || req.body.include_prices === 'true',
+        deadline_ms: req.body.deadline_ms ? parseInt(req.body.deadline_ms) : null,
+        quality_threshold: req.body.quality_threshold ? parseFloat(req.body.quality_threshold) : null
       };
   
       // Remove null values
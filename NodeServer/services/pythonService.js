@@ -64,7 +64,12 @@ class PythonService {
 
   // Calculate nutrition based on user input
   async calculateNutrition(nutritionData) {
-    return await this.makeRequest('/api/nutrition/calculate', nutritionData);
+    // Ask Python to return its best menus before our own timeout fires
+    const payload = {
+      deadline_ms: Math.floor(this.timeout * 0.8),
+      ...nutritionData
+    };
+    return await this.makeRequest('/api/nutrition/calculate', payload);
   }
 
   // Get personalized recommendations
@@ -1,6 +1,8 @@
 # config.py - Configuration settings with category preferences
 
 import os
+import json
+import hashlib
 
 class Config:
     """Base configuration class"""
@@ -14,6 +16,37 @@ class Config:
     DEFAULT_MIN_ITEMS = 5  # Reduced from 4 to allow simpler menus
     DEFAULT_MAX_ITEMS = 8 # Reduced from 8 to focus on core foods
     DEFAULT_ATTEMPTS = 300  # Increased attempts
+    # Worker processes for CPU-bound generation, so concurrent requests do not contend for the
+    # server's GIL; one per core by default, 1 runs generation on the request threads
+    GENERATION_WORKERS = int(os.getenv('GENERATION_WORKERS', str(os.cpu_count() or 1)))
+    
+    # Portion mode: 'heuristic' sizes items one by one, 'solver' solves all portions jointly
+    PORTION_MODE = os.getenv('PORTION_MODE', 'heuristic')
+    SOLVER_ATTEMPTS = 60  # Solver menus almost always validate, so fewer attempts are needed
+    
+    # Scoring weights for relative macro errors (fat accuracy weighted extra)
+    MACRO_SCORE_WEIGHTS = {'calories': 1.0, 'protein': 1.0, 'carbs': 1.0, 'fat': 1.5}
+    COST_SCORE_WEIGHT = 0.5  # Cost-aware mode: score += weight * menu cost / reference cost
+    
+    # Request execution limits: running + queued calls beyond these get 503 with Retry-After
+    GENERATION_CONCURRENCY = int(os.getenv('GENERATION_CONCURRENCY', '2'))
+    GENERATION_QUEUE_SIZE = int(os.getenv('GENERATION_QUEUE_SIZE', '8'))
+    DB_CONCURRENCY = int(os.getenv('DB_CONCURRENCY', '8'))
+    DB_QUEUE_SIZE = int(os.getenv('DB_QUEUE_SIZE', '32'))
+    RETRY_AFTER_SECONDS = 2
+    ASYNC_DB_ENABLED = os.getenv('ASYNC_DB_ENABLED', 'true').lower() == 'true'  # Needs asyncpg
+    
+    # Result cache for near-identical targets (targets are rounded to these bucket sizes).
+    # Off by default: a hit returns a sample of menus generated for a nearby target
+    MENU_CACHE_ENABLED = os.getenv('MENU_CACHE_ENABLED', 'false').lower() == 'true'
+    MENU_CACHE_MAX_ENTRIES = 1024
+    MENU_CACHE_TTL_SECONDS = 600
+    MENU_CACHE_BUCKETS = {'calories': 50, 'protein': 5, 'carbs': 10, 'fat': 3}
+    MENU_CACHE_MENUS_PER_KEY = 10  # Menus kept per entry; each hit samples from these
+    
+    # Cheapest-combination shopping plans: cost added per supermarket visited, optional store cap
+    SHOPPING_STORE_VISIT_COST = float(os.getenv('SHOPPING_STORE_VISIT_COST', '5.0'))
+    SHOPPING_MAX_STORES = None
     
     # Nutrition constraints
     MAX_SUGAR_PERCENTAGE = 0.15  # Max 15% calories from sugar
@@ -107,25 +140,29 @@ class Config:
             'primary': ['חלב ביצים וסלטים', 'לחם ומאפים טריים'],
             'secondary': ['דבש, ריבה וממרחים', 'פירות וירקות', 'משקאות'],
             'forbidden': ['בשר  ודגים', 'קפואים'],
-            'required_types': ['protein', 'fiber']
+            'required_types': ['protein', 'fiber'],
+            'daily_share': 0.25  # Share of the daily target in a day plan
         },
         'lunch': {
             'primary': ['בשר  ודגים', 'קטניות ודגנים'],
             'secondary': ['חלב ביצים וסלטים', 'פירות וירקות', 'שימורים בישול ואפיה'],
             'forbidden': ['חטיפים ומתוקים'],
-            'required_types': ['protein', 'fiber']
+            'required_types': ['protein', 'fiber'],
+            'daily_share': 0.35
         },
         'dinner': {
             'primary': ['בשר  ודגים', 'קפואים'],
             'secondary': ['קטניות ודגנים', 'חלב ביצים וסלטים', 'שימורים בישול ואפיה'],
             'forbidden': ['חטיפים ומתוקים'],
-            'required_types': ['protein', 'fiber']
+            'required_types': ['protein', 'fiber'],
+            'daily_share': 0.30
         },
         'snacks': {
             'primary': ['פירות וירקות', 'דגנים וחטיפי אנרגיה'],
             'secondary': ['חטיפים ומתוקים', 'חלב ביצים וסלטים', 'משקאות'],
             'forbidden': [],
-            'required_types': ['fiber']
+            'required_types': ['fiber'],
+            'daily_share': 0.10
         }
     }
 
@@ -141,6 +178,14 @@ config_mapping = {
     'default': Config
 }
 
+def get_config_fingerprint(config):
+    """Get a stable fingerprint of all settings, used to key derived caches"""
+    settings = {
+        name: getattr(config, name) for name in dir(config)
+        if name.isupper() and not callable(getattr(config, name))
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
 def get_config(config_name='default'):
     """Get configuration by name"""
     return config_mapping.get(config_name, Config)
@@ -0,0 +1,55 @@
+# conftest.py - Shared pytest fixtures: a small, deterministic synthetic food catalog
+
+import os
+import random
+import sys
+
+import pytest
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from src.models import Food, NutritionInfo
+from src.services import FoodClassifier
+
+# (category, subcategory) pairs as they appear in the products table
+SAMPLE_CATEGORIES = [
+    ('בשר  ודגים', 'בשרים על האש'),
+    ('חלב ביצים וסלטים', 'גבינות'),
+    ('חלב ביצים וסלטים', 'חלב'),
+    ('פירות וירקות', 'פירות וירקות'),
+    ('קטניות ודגנים', 'אורז וקטניות'),
+    ('לחם ומאפים טריים', 'לחם, פיתה, לחמניה'),
+    ('קפואים', 'שימורים'),
+    ('חטיפים ומתוקים', 'ממתקים'),
+    ('שימורים בישול ואפיה', 'נקניקיות ונקניקים'),
+    ('משקאות', 'מיץ'),
+]
+
+SAMPLE_WORDS = ['גבינה', 'לחם', 'עוף', 'אורז', 'יוגורט', 'Tuna', 'Pasta', 'Choco', 'מלא', 'light']
+
+def make_sample_foods(count=600, seed=1):
+    """Build foods with random but plausible nutrition across the sample categories"""
+    rng = random.Random(seed)
+    foods = []
+    for i in range(count):
+        protein, carbs, fat = rng.uniform(0, 30), rng.uniform(0, 70), rng.uniform(0, 25)
+        calories = (protein * 4 + carbs * 4 + fat * 9) * rng.uniform(0.95, 1.05)
+        category, subcategory = rng.choice(SAMPLE_CATEGORIES)
+        name = ' '.join(rng.sample(SAMPLE_WORDS, 2)) + f' {i}'
+        foods.append(Food(str(1000 + i), name, category, subcategory,
+                          NutritionInfo(calories, protein, carbs, fat), rng.uniform(0, 1200)))
+    return foods
+
+@pytest.fixture
+def config():
+    return Config()
+
+@pytest.fixture
+def food_classifier(config):
+    return FoodClassifier(config)
+
+@pytest.fixture
+def sample_foods():
+    return make_sample_foods()
\ No newline at end of file
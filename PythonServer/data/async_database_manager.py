@@ -0,0 +1,141 @@
+# src/data/async_database_manager.py - Async database manager for the API layer
+
+import asyncio
+import json
+import os
+
+try:
+    import asyncpg
+except ImportError:  # asyncpg is optional, the API falls back to the sync manager
+    asyncpg = None
+
+class AsyncDatabaseManager:
+    """Async database connection manager backed by an asyncpg pool
+
+    Queries use asyncpg's $1, $2 ... placeholders and return rows as dicts, like
+    the RealDictCursor rows of the sync DatabaseManager.
+    """
+    
+    def __init__(self):
+        self.max_retries = 3
+        self.retry_delay = 1.0
+        self.pool = None
+        
+        # Database configuration from environment (same variables as the sync manager)
+        self.host = os.getenv('POSTGRES_HOST', 'localhost')
+        self.database = os.getenv('POSTGRES_DB', 'nutrition_app')
+        self.user = os.getenv('POSTGRES_USER', 'nutrition_user')
+        self.password = os.getenv('POSTGRES_PASSWORD', 'nutrition_password')
+        self.port = int(os.getenv('POSTGRES_PORT', '5432'))
+        
+        self.min_size = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+        self.max_size = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+        self.max_idle_seconds = float(os.getenv('DB_POOL_MAX_IDLE_SECONDS', '300'))
+    
+    @staticmethod
+    def is_available():
+        """Check if the async driver is installed"""
+        return asyncpg is not None
+    
+    @property
+    def is_connected(self):
+        return self.pool is not None
+    
+    async def connect(self):
+        """Create the connection pool with retry logic"""
+        if asyncpg is None:
+            print("❌ asyncpg is not installed")
+            return False
+        
+        for attempt in range(self.max_retries):
+            try:
+                print(f"Async database connection attempt {attempt + 1}/{self.max_retries}")
+                self.pool = await asyncpg.create_pool(
+                    host=self.host,
+                    port=self.port,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    max_inactive_connection_lifetime=self.max_idle_seconds,
+                    init=self._init_connection
+                )
+                print("✅ Async database connected successfully")
+                return True
+                
+            except Exception as e:
+                print(f"Async database connection failed (attempt {attempt + 1}): {e}")
+                if attempt == self.max_retries - 1:
+                    print("❌ Async database connection failed after all retries")
+                    return False
+                
+                sleep_time = self.retry_delay * (2 ** attempt)
+                print(f"Retrying in {sleep_time} seconds...")
+                await asyncio.sleep(sleep_time)
+        
+        return False
+    
+    @staticmethod
+    async def _init_connection(conn):
+        """Decode JSON columns to Python objects, as psycopg2 does"""
+        for type_name in ('json', 'jsonb'):
+            await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+    
+    async def execute_query(self, query, *params):
+        """Execute query and return rows as dicts (empty list for statements without results)"""
+        if not self.is_connected:
+            if not await self.connect():
+                raise Exception("Cannot execute query: database not connected")
+        
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(query, *params)
+                return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"Async query execution failed: {e}")
+            raise
+    
+    async def execute_single(self, query, *params):
+        """Execute query and return single result"""
+        results = await self.execute_query(query, *params)
+        if results:
+            return results[0]
+        return None
+    
+    async def health_check(self):
+        """Check if database is healthy"""
+        try:
+            result = await self.execute_single("SELECT NOW() as current_time")
+            return result is not None
+        except Exception:
+            return False
+    
+    def get_pool_stats(self):
+        """Get connection pool statistics"""
+        if not self.pool:
+            return {'min_size': self.min_size, 'max_size': self.max_size, 'size': 0, 'idle': 0, 'in_use': 0}
+        
+        size = self.pool.get_size()
+        idle = self.pool.get_idle_size()
+        return {
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle
+        }
+    
+    async def close(self):
+        """Close all pooled connections"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+        print("Async database connection manager closed")
+
+async def create_async_database_manager():
+    """Create and connect async database manager"""
+    db_manager = AsyncDatabaseManager()
+    if not await db_manager.connect():
+        raise Exception("Failed to connect to database")
+    return db_manager
\ No newline at end of file
@@ -0,0 +1,141 @@
+# src/data/async_sql_providers.py - Async SQL providers for the API layer
+
+import asyncio
+from data.sql_providers import FOOD_SELECT, FOOD_JOINS, LATEST_PRICES_SELECT, SqlFoodProvider, build_price_lookup, summarize_menu_prices
+from src.services.food_search_index import SearchResult
+
+# asyncpg takes numbered placeholders
+ASYNC_LATEST_PRICES_SELECT = LATEST_PRICES_SELECT.replace('ANY(%s)', 'ANY($1::text[])')
+
+# Menu foods matching a name, category or subcategory pattern
+ASYNC_SEARCH_WHERE = """
+        WHERE p.can_include_in_menu = true
+        AND p.is_active = true
+        AND (p.name ILIKE $1 OR c.name_he ILIKE $1 OR sc.name_he ILIKE $1)
+"""
+
+class AsyncSqlFoodProvider:
+    """Async PostgreSQL lookups for foods by code, and search until the in-memory catalog is loaded"""
+    
+    def __init__(self, db_manager):
+        self.db = db_manager
+        print("🗃️ Async SQL Food Provider initialized")
+    
+    async def get_food_by_code(self, item_code):
+        """Get specific food by item code"""
+        if not item_code:
+            return None
+        
+        query = FOOD_SELECT + """
+        WHERE p.item_code = $1
+        AND p.is_active = true
+        """
+        
+        try:
+            row = await self.db.execute_single(query, str(item_code))
+            if not row:
+                return None
+            
+            return SqlFoodProvider.create_food_from_row(row)
+            
+        except Exception as e:
+            print(f"Error getting food by code {item_code}: {e}")
+            return None
+    
+    async def get_foods_by_codes(self, item_codes):
+        """Get several foods concurrently, in the given order (missing ones are None)"""
+        return await asyncio.gather(*(self.get_food_by_code(code) for code in item_codes))
+    
+    async def search_foods(self, query_text, limit=100):
+        """Search foods by name"""
+        return (await self.search_food_page(query_text, 0, limit)).foods
+    
+    async def search_food_page(self, query_text, offset=0, limit=50):
+        """Get one page of search results and the total match count (both queries run concurrently)"""
+        if not query_text or len(query_text.strip()) < 2:
+            return SearchResult([], 0)
+        
+        page_query = FOOD_SELECT + ASYNC_SEARCH_WHERE + """
+        ORDER BY p.name
+        LIMIT $2 OFFSET $3
+        """
+        count_query = "SELECT COUNT(*) AS total" + FOOD_JOINS + ASYNC_SEARCH_WHERE
+        
+        try:
+            search_term = f"%{query_text.strip()}%"
+            rows, count = await asyncio.gather(
+                self.db.execute_query(page_query, search_term, limit, offset),
+                self.db.execute_single(count_query, search_term)
+            )
+            
+            foods = []
+            for row in rows:
+                food = SqlFoodProvider.create_food_from_row(row)
+                if food:
+                    foods.append(food)
+            
+            return SearchResult(foods, count['total'] if count else len(foods))
+            
+        except Exception as e:
+            print(f"Error searching foods with query '{query_text}': {e}")
+            return SearchResult([], 0)
+
+class AsyncSqlPriceComparison:
+    """Async PostgreSQL-based price comparison service"""
+    
+    def __init__(self, db_manager, supermarkets=None):
+        self.db = db_manager
+        self.supermarkets = supermarkets or []
+        print("💰 Async SQL Price Comparison initialized")
+    
+    async def load_supermarkets(self):
+        """Load the list of active supermarkets"""
+        try:
+            rows = await self.db.execute_query("""
+            SELECT name 
+            FROM supermarkets 
+            WHERE is_active = true 
+            ORDER BY name
+            """)
+            self.supermarkets = [row['name'] for row in rows]
+        except Exception as e:
+            print(f"Error getting supermarkets: {e}")
+        return self.supermarkets
+    
+    async def compare_menu_prices(self, menu_items):
+        """Compare total price of menu items across supermarkets"""
+        if not menu_items:
+            return {'error': 'No menu items provided'}
+        
+        try:
+            item_codes = [str(item['item_code']) for item in menu_items if item.get('item_code')]
+            if not item_codes:
+                return {'error': 'No valid item codes provided'}
+            
+            price_rows = await self.db.execute_query(ASYNC_LATEST_PRICES_SELECT, item_codes)
+            return summarize_menu_prices(menu_items, build_price_lookup(price_rows), self.supermarkets)
+            
+        except Exception as e:
+            print(f"Error comparing menu prices: {e}")
+            return {'error': f'Price comparison failed: {str(e)}'}
+    
+    async def compare_menu_prices_batch(self, menus_items):
+        """Compare prices for several menus with one query for the union of their item codes"""
+        item_codes = sorted({str(item['item_code']) for menu_items in menus_items for item in menu_items if item.get('item_code')})
+        
+        try:
+            price_rows = await self.db.execute_query(ASYNC_LATEST_PRICES_SELECT, item_codes) if item_codes else []
+        except Exception as e:
+            print(f"Error comparing menu prices in batch: {e}")
+            return [{'error': f'Price comparison failed: {str(e)}'} for _ in menus_items]
+        
+        price_lookup = build_price_lookup(price_rows)
+        results = []
+        for menu_items in menus_items:
+            if not menu_items:
+                results.append({'error': 'No menu items provided'})
+            elif not any(item.get('item_code') for item in menu_items):
+                results.append({'error': 'No valid item codes provided'})
+            else:
+                results.append(summarize_menu_prices(menu_items, price_lookup, self.supermarkets))
+        return results
\ No newline at end of file
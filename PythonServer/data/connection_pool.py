@@ -0,0 +1,226 @@
+# src/data/connection_pool.py - Thread-safe database connection pool
+
+import threading
+import time
+from contextlib import contextmanager
+
+class PoolClosedError(Exception):
+    """Raised when checking out from a closed pool"""
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection became available in time"""
+
+class ConnectionPool:
+    """Responsible ONLY for reusing database connections across threads
+
+    The pool is driver-agnostic: it is given callables to open a connection, to
+    validate one on checkout, to tell whether a returned one is still usable and
+    to reset it before reuse.
+    """
+
+    def __init__(self, connect, validate=None, is_usable=None, reset=None,
+                 min_size=1, max_size=10, max_idle_seconds=300, validate_after_seconds=30, checkout_timeout=10):
+        self._connect = connect
+        self._validate = validate or (lambda conn: True)
+        self._is_usable = is_usable or (lambda conn: True)
+        self._reset = reset or (lambda conn: None)
+
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.max_idle_seconds = max_idle_seconds
+        self.validate_after_seconds = validate_after_seconds
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = []  # (connection, returned_at), most recently returned last
+        self._size = 0   # Open connections, idle or in use
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Statistics
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.recycled = 0
+        self.validation_failures = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def fill(self):
+        """Open connections up to min_size"""
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception:
+                self._forget()
+                raise
+            with self._condition:
+                self._idle.append((conn, time.monotonic()))
+                self._condition.notify()
+
+    def getconn(self):
+        """Check out a validated connection, waiting up to checkout_timeout"""
+        waited = False
+        wait_start = time.monotonic()
+        deadline = wait_start + self.checkout_timeout
+
+        while True:
+            stale = []
+            conn = None
+            open_new = False
+
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError("Connection pool is closed")
+
+                    # Recycle connections idle for too long (oldest are first)
+                    now = time.monotonic()
+                    while self._idle and now - self._idle[0][1] > self.max_idle_seconds:
+                        stale.append(self._idle.pop(0)[0])
+                        self._size -= 1
+                        self.recycled += 1
+
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        open_new = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(f"No database connection available within {self.checkout_timeout}s")
+                    waited = True
+                    self._condition.wait(remaining)
+
+            for stale_conn in stale:
+                self._close_quietly(stale_conn)
+
+            if open_new:
+                try:
+                    conn = self._open()
+                except Exception:
+                    self._forget()
+                    raise
+            elif now - returned_at > self.validate_after_seconds and not self._check(conn):
+                # Broken connection: drop it and try again
+                self.validation_failures += 1
+                self._close_quietly(conn)
+                self._forget()
+                continue
+
+            with self._condition:
+                self.checkouts += 1
+                if waited:
+                    wait_seconds = time.monotonic() - wait_start
+                    self.waits += 1
+                    self.total_wait_seconds += wait_seconds
+                    self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection; broken or discarded ones are closed instead of reused"""
+        if not discard and self._is_usable(conn):
+            try:
+                self._reset(conn)
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        with self._condition:
+            if discard or self._closed:
+                self._size -= 1
+                self.discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._condition.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a with-block
+
+        The connection is always returned. After an ordinary error it is reset and
+        reused; after an interruption (KeyboardInterrupt, cancellation, generator close)
+        it may be mid-command, so it is closed instead.
+        """
+        conn = self.getconn()
+        discard = True
+        try:
+            yield conn
+            discard = False
+        except Exception:
+            discard = False
+            raise
+        finally:
+            self.putconn(conn, discard)
+
+    def close(self):
+        """Close idle connections now; in-use ones are closed when returned"""
+        with self._condition:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle = []
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def get_stats(self):
+        """Get pool size and usage statistics"""
+        with self._condition:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'recycled': self.recycled,
+                'validation_failures': self.validation_failures,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'total_wait_ms': round(self.total_wait_seconds * 1000, 1),
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 1),
+                'closed': self._closed
+            }
+
+    def _open(self):
+        conn = self._connect()
+        with self._condition:
+            self.created += 1
+        return conn
+
+    def _check(self, conn):
+        try:
+            return self._is_usable(conn) and self._validate(conn)
+        except Exception:
+            return False
+
+    def _forget(self):
+        """Release the slot of a connection that failed to open or validate"""
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
\ No newline at end of file
@@ -1,12 +1,13 @@
-# src/data/database_manager.py - Simple database manager without pools
+# src/data/database_manager.py - Database manager with connection pooling
 
 import psycopg2
 import psycopg2.extras
 import os
 import time
+from data.connection_pool import ConnectionPool
 
 class DatabaseManager:
-    """Simple database connection manager"""
+    """Database connection manager backed by a connection pool"""
     
     def __init__(self):
         self.max_retries = 3
@@ -22,6 +23,43 @@ class DatabaseManager:
         
         # Connection string
         self.connection_string = f"host={self.host} port={self.port} dbname={self.database} user={self.user} password={self.password}"
+        
+        # Connection pool settings
+        self.pool = ConnectionPool(
+            self._open_connection,
+            validate=self._validate_connection,
+            is_usable=self._is_connection_usable,
+            reset=self._reset_connection,
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            max_idle_seconds=float(os.getenv('DB_POOL_MAX_IDLE_SECONDS', '300')),
+            checkout_timeout=float(os.getenv('DB_POOL_TIMEOUT_SECONDS', '10'))
+        )
+    
+    def _open_connection(self):
+        return psycopg2.connect(self.connection_string)
+    
+    @staticmethod
+    def _validate_connection(conn):
+        """Round-trip check used on checkout of connections idle for a while"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        finally:
+            cursor.close()
+        conn.rollback()
+        return True
+    
+    @staticmethod
+    def _is_connection_usable(conn):
+        return not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+    
+    @staticmethod
+    def _reset_connection(conn):
+        """Leave no transaction open on pooled connections"""
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
     
     def connect(self):
         """Test database connection with retry logic"""
@@ -29,13 +67,10 @@ class DatabaseManager:
             try:
                 print(f"Database connection attempt {attempt + 1}/{self.max_retries}")
                 
-                # Test connection
-                conn = psycopg2.connect(self.connection_string)
-                cursor = conn.cursor()
-                cursor.execute('SELECT 1')
-                cursor.fetchone()
-                cursor.close()
-                conn.close()
+                # Test connection and open the pool's minimum connections
+                with self.pool.connection() as conn:
+                    self._validate_connection(conn)
+                self.pool.fill()
                 
                 self.is_connected = True
                 print("✅ Database connected successfully")
@@ -55,42 +90,39 @@ class DatabaseManager:
         return False
     
     def get_connection(self):
-        """Get a new database connection"""
+        """Get a new database connection (not pooled; the caller closes it)"""
         return psycopg2.connect(self.connection_string)
     
+    def pooled_connection(self):
+        """Check out a pooled connection; use as a context manager to return it"""
+        return self.pool.connection()
+    
     def execute_query(self, query, params=None):
         """Execute query with error handling"""
         if not self.is_connected:
             if not self.connect():
                 raise Exception("Cannot execute query: database not connected")
         
-        conn = None
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            cursor.execute(query, params)
-            
-            # Check if it's a SELECT query
-            if cursor.description:
-                results = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return results
-            else:
-                # INSERT/UPDATE/DELETE
-                conn.commit()
-                cursor.close()
-                conn.close()
-                return []
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+                try:
+                    cursor.execute(query, params)
+                    
+                    # Check if it's a SELECT query
+                    if cursor.description:
+                        results = cursor.fetchall()
+                        conn.rollback()  # End the read transaction before returning to the pool
+                        return results
+                    else:
+                        # INSERT/UPDATE/DELETE
+                        conn.commit()
+                        return []
+                finally:
+                    cursor.close()
         
         except Exception as e:
             print(f"Query execution failed: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                    conn.close()
-                except:
-                    pass
             raise
     
     def execute_single(self, query, params=None):
@@ -108,9 +140,14 @@ class DatabaseManager:
         except:
             return False
     
+    def get_pool_stats(self):
+        """Get connection pool statistics"""
+        return self.pool.get_stats()
+    
     def close(self):
-        """Close connections (no-op for simple manager)"""
+        """Close all pooled connections"""
         self.is_connected = False
+        self.pool.close()
         print("Database connection manager closed")
 
 # Simple factory function
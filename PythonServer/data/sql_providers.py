@@ -1,40 +1,178 @@
 # src/data/sql_providers.py - Simple SQL providers with basic error handling
 
+import random
+import threading
 import time
+from collections import namedtuple
+from datetime import timedelta
+import numpy as np
 from src.models.food import Food
+from src.models.food_catalog import FoodCatalog
+from src.models.price_matrix import PriceMatrix
 from src.models.nutrition import NutritionInfo
+from src.services.food_classifier import FoodClassifier
+from src.services.food_search_index import FoodSearchIndex
+from src.services.shopping_optimizer import ShoppingOptimizer
+
+# Columns and joins shared by every food query (sync and async providers)
+FOOD_COLUMNS = """
+            p.item_code,
+            p.name,
+            c.name_he as category,
+            sc.name_he as subcategory,
+            p.nutrition,
+            COALESCE((p.nutrition->>'sodium')::numeric, 0) as sodium"""
+
+FOOD_JOINS = """
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN subcategories sc ON p.subcategory_id = sc.id
+"""
+
+FOOD_SELECT = """
+        SELECT """ + FOOD_COLUMNS + FOOD_JOINS
+
+# Every product touched since a high-water mark, including ones that left the menu
+FOOD_CHANGES_SELECT = """
+        SELECT """ + FOOD_COLUMNS + """,
+            p.is_active,
+            p.can_include_in_menu,
+            p.updated_at""" + FOOD_JOINS + """
+        WHERE p.updated_at > %s
+        ORDER BY p.updated_at
+"""
+
+# Current price per item and active supermarket (latest_prices holds one row per pair)
+CURRENT_PRICES_SELECT = """
+            SELECT 
+                lp.item_code,
+                s.name as supermarket,
+                lp.price
+            FROM latest_prices lp
+            JOIN supermarkets s ON lp.supermarket_id = s.id
+            WHERE s.is_active = true
+            AND lp.recorded_at > NOW() - INTERVAL '30 days'
+"""
+
+# Current prices of given items: a primary-key lookup
+LATEST_PRICES_SELECT = CURRENT_PRICES_SELECT + """            AND lp.item_code = ANY(%s)
+"""
+
+# Immutable cache state, replaced as a whole so readers never see a half-built refresh
+FoodSnapshot = namedtuple('FoodSnapshot', ['foods', 'catalog', 'search_index', 'built_at', 'refresh_due_at'])
 
 class SqlFoodProvider:
     """Simple PostgreSQL food provider with caching"""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, food_classifier=None, cache_ttl=300, refresh_jitter=0.1,
+                 full_refresh_interval=21600, delta_overlap_seconds=60, retry_backoff_seconds=15):
         self.db = db_manager
-        self.cache_ttl = 3600  # 1 hour cache
-        self.foods_cache = None
-        self.cache_timestamp = 0
+        self.food_classifier = food_classifier or FoodClassifier()
+        self.cache_ttl = cache_ttl  # 5 minutes between (cheap) delta refreshes
+        self.refresh_jitter = refresh_jitter  # +/- share of the TTL, so workers do not refresh in lockstep
+        self.full_refresh_interval = full_refresh_interval  # 6 hours between full reloads
+        self.delta_overlap_seconds = delta_overlap_seconds  # Re-read window for rows committed late
+        self.retry_backoff_seconds = retry_backoff_seconds  # First retry after a failed refresh, doubling up to the TTL
+        self.catalog_version = 0
+        
+        # Delta refresh state
+        self._high_water_mark = None  # Latest products.updated_at seen
+        self._last_full_refresh = 0
+        
+        # Stale-while-revalidate state
+        self._snapshot = None
+        self._load_lock = threading.Lock()   # Serializes snapshot builds
+        self._state_lock = threading.Lock()  # Guards the refresh flag and metrics
+        self._refreshing = False
+        
+        # Refresh metrics
+        self.refresh_count = 0
+        self.full_refresh_count = 0
+        self.delta_refresh_count = 0
+        self.refresh_failures = 0
+        self.consecutive_failures = 0
+        self.last_refresh_kind = None
+        self.last_delta_changes = 0
+        self.last_refresh_duration = None
+        self.last_refresh_error = None
         print("🗃️ SQL Food Provider initialized")
     
+    @property
+    def foods_cache(self):
+        snapshot = self._snapshot
+        return snapshot.foods if snapshot else None
+    
+    @property
+    def food_catalog(self):
+        snapshot = self._snapshot
+        return snapshot.catalog if snapshot else None
+    
+    @property
+    def cache_timestamp(self):
+        snapshot = self._snapshot
+        return snapshot.built_at if snapshot else 0
+    
     def should_refresh_cache(self):
         """Check if cache needs refresh"""
-        current_time = time.time()
-        return (self.foods_cache is None or 
-                current_time - self.cache_timestamp > self.cache_ttl)
+        snapshot = self._snapshot
+        return snapshot is None or time.time() >= snapshot.refresh_due_at
     
-    def refresh_cache(self):
-        """Refresh the foods cache"""
+    def _get_snapshot(self):
+        """Get the current snapshot, loading it inline only on first use
+        
+        A stale snapshot keeps being served while one background refresh builds the next.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._refresh()
+            return self._snapshot
+        
+        if time.time() >= snapshot.refresh_due_at:
+            self._start_background_refresh()
+        return snapshot
+    
+    def _start_background_refresh(self):
+        """Start a refresh thread unless one is already running (single-flight)"""
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        thread = threading.Thread(target=self._background_refresh, name='food-cache-refresh', daemon=True)
+        thread.start()
+    
+    def _background_refresh(self):
+        try:
+            with self._load_lock:
+                self._refresh()
+        finally:
+            with self._state_lock:
+                self._refreshing = False
+    
+    def refresh_cache(self, full=True):
+        """Refresh the foods cache now (blocks until the new snapshot is in place)"""
+        with self._load_lock:
+            self._refresh(full)
+    
+    def _refresh(self, full=False):
+        """Build a new snapshot and swap it in; on failure keep serving the old one
+        
+        Refreshes apply only the products changed since the last one, with a full
+        reload on first use, periodically, or when asked for.
+        """
+        if (full or self._snapshot is None or self._high_water_mark is None
+                or time.time() - self._last_full_refresh >= self.full_refresh_interval):
+            self._full_refresh()
+        else:
+            self._delta_refresh()
+    
+    def _full_refresh(self):
         print("📊 Refreshing foods cache from PostgreSQL...")
+        start_time = time.time()
         
-        query = """
-        SELECT 
-            p.item_code,
-            p.name,
-            c.name_he as category,
-            sc.name_he as subcategory,
-            p.nutrition,
-            COALESCE((p.nutrition->>'sodium')::numeric, 0) as sodium
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN subcategories sc ON p.subcategory_id = sc.id
+        query = FOOD_SELECT + """
         WHERE p.can_include_in_menu = true
         AND p.is_active = true
         AND (p.nutrition->>'calories')::numeric > 0
@@ -42,6 +180,8 @@ class SqlFoodProvider:
         """
         
         try:
+            # Read the mark first: rows changed during the load are picked up again by the next delta
+            mark = self.db.execute_single("SELECT MAX(updated_at) AS high_water_mark FROM products")
             rows = self.db.execute_query(query)
             foods = []
             
@@ -54,16 +194,146 @@ class SqlFoodProvider:
                     print(f"Error processing food {row.get('item_code', 'unknown')}: {e}")
                     continue
             
-            self.foods_cache = foods
-            self.cache_timestamp = time.time()
+            # Build the columnar catalog once per refresh
+            catalog = FoodCatalog(foods, self.food_classifier, version=self.catalog_version + 1)
+            self.catalog_version += 1
+            self._snapshot = self._make_snapshot(foods, catalog)
+            self._high_water_mark = mark['high_water_mark'] if mark else None
+            self._last_full_refresh = time.time()
+            self._record_refresh(start_time, kind='full')
             print(f"✅ Cached {len(foods)} foods from PostgreSQL")
             
         except Exception as e:
             print(f"Failed to refresh foods cache: {e}")
-            if self.foods_cache is None:
-                self.foods_cache = []
+            self._record_refresh(start_time, e, kind='full')
+            if self._snapshot is None:
+                # Serve an empty catalog for now and retry soon
+                empty_catalog = FoodCatalog([], self.food_classifier, version=self.catalog_version)
+                self._snapshot = self._make_snapshot([], empty_catalog, self._retry_delay())
+            else:
+                self._defer_refresh()
+    
+    def _delta_refresh(self):
+        start_time = time.time()
+        snapshot = self._snapshot
+        since = self._high_water_mark - timedelta(seconds=self.delta_overlap_seconds)
+        
+        try:
+            rows = self.db.execute_query(FOOD_CHANGES_SELECT, (since,))
+            catalog = snapshot.catalog
+            upserts = {}
+            removed = set()
+            mark = self._high_water_mark
+            
+            for row in rows:
+                item_code = str(row['item_code'])
+                mark = max(mark, row['updated_at'])
+                food = None
+                if row['is_active'] and row['can_include_in_menu']:
+                    try:
+                        food = self.create_food_from_row(row)
+                    except Exception as e:
+                        print(f"Error processing food {item_code}: {e}")
+                
+                # Rows are ordered by updated_at, so the last change of a product wins
+                if food is None:
+                    upserts.pop(item_code, None)
+                    if catalog.get_row(item_code) is not None:
+                        removed.add(item_code)
+                    continue
+                
+                removed.discard(item_code)
+                row_index = catalog.get_row(item_code)
+                if row_index is not None and catalog[row_index].to_dict() == food.to_dict():
+                    # Touched but unchanged (e.g. re-read from the overlap window)
+                    upserts.pop(item_code, None)
+                else:
+                    upserts[item_code] = food
+            
+            if upserts or removed:
+                catalog = catalog.patch(list(upserts.values()), removed, self.food_classifier,
+                                        version=self.catalog_version + 1)
+                self.catalog_version += 1
+                print(f"✅ Applied {len(upserts)} changed and {len(removed)} removed foods "
+                      f"({len(catalog)} cached)")
+            
+            # No changes keeps the catalog (and its version), only renewing the TTL
+            self._snapshot = self._make_snapshot(catalog.foods, catalog)
+            self._high_water_mark = mark
+            with self._state_lock:
+                self.last_delta_changes = len(upserts) + len(removed)
+            self._record_refresh(start_time, kind='delta')
+            
+        except Exception as e:
+            print(f"Failed to apply foods cache changes: {e}")
+            self._record_refresh(start_time, e, kind='delta')
+            self._defer_refresh()
+    
+    def _retry_delay(self):
+        """Get the wait before retrying a failed refresh (doubles with each failure in a row, up to the TTL)"""
+        with self._state_lock:
+            failures = max(1, self.consecutive_failures)
+        return min(self.cache_ttl, self.retry_backoff_seconds * 2 ** (failures - 1))
+    
+    def _defer_refresh(self):
+        """Keep serving the current snapshot but push its refresh back, so an outage is not retried per request"""
+        delay = self._retry_delay() * (1 + random.uniform(-self.refresh_jitter, self.refresh_jitter))
+        self._snapshot = self._snapshot._replace(refresh_due_at=time.time() + delay)
+    
+    def _make_snapshot(self, foods, catalog, ttl=None):
+        # The search index is rebuilt only when the catalog changes
+        current = self._snapshot
+        if current is not None and current.catalog is catalog:
+            search_index = current.search_index
+        else:
+            search_index = FoodSearchIndex(catalog)
+        
+        built_at = time.time()
+        ttl = (ttl or self.cache_ttl) * (1 + random.uniform(-self.refresh_jitter, self.refresh_jitter))
+        return FoodSnapshot(foods, catalog, search_index, built_at, built_at + ttl)
+    
+    def _record_refresh(self, start_time, error=None, kind='full'):
+        with self._state_lock:
+            self.last_refresh_duration = time.time() - start_time
+            self.last_refresh_kind = kind
+            if error is None:
+                self.refresh_count += 1
+                if kind == 'full':
+                    self.full_refresh_count += 1
+                else:
+                    self.delta_refresh_count += 1
+                self.last_refresh_error = None
+                self.consecutive_failures = 0
+            else:
+                self.refresh_failures += 1
+                self.consecutive_failures += 1
+                self.last_refresh_error = str(error)
     
-    def create_food_from_row(self, row):
+    def get_cache_stats(self):
+        """Get snapshot age and refresh metrics"""
+        snapshot = self._snapshot
+        now = time.time()
+        with self._state_lock:
+            return {
+                'foods': len(snapshot.foods) if snapshot else 0,
+                'catalog_version': self.catalog_version,
+                'snapshot_age_seconds': round(now - snapshot.built_at, 1) if snapshot else None,
+                'next_refresh_in_seconds': round(max(0.0, snapshot.refresh_due_at - now), 1) if snapshot else None,
+                'refreshing': self._refreshing,
+                'refresh_count': self.refresh_count,
+                'full_refresh_count': self.full_refresh_count,
+                'delta_refresh_count': self.delta_refresh_count,
+                'last_refresh_kind': self.last_refresh_kind,
+                'last_delta_changes': self.last_delta_changes,
+                'high_water_mark': self._high_water_mark.isoformat() if self._high_water_mark else None,
+                'refresh_failures': self.refresh_failures,
+                'consecutive_failures': self.consecutive_failures,
+                'last_refresh_duration_ms': round(self.last_refresh_duration * 1000, 1) if self.last_refresh_duration is not None else None,
+                'last_refresh_error': self.last_refresh_error
+            }
+    
+    @staticmethod
+    def create_food_from_row(row):
         """Create Food object from database row"""
         nutrition_data = row['nutrition']
         if not nutrition_data:
@@ -101,27 +371,18 @@ class SqlFoodProvider:
     
     def get_all_foods(self):
         """Get all foods with caching"""
-        if self.should_refresh_cache():
-            self.refresh_cache()
-        
-        return self.foods_cache or []
+        return self._get_snapshot().foods or []
+    
+    def get_food_catalog(self):
+        """Get columnar catalog of all foods with caching"""
+        return self._get_snapshot().catalog
     
     def get_food_by_code(self, item_code):
         """Get specific food by item code"""
         if not item_code:
             return None
         
-        query = """
-        SELECT 
-            p.item_code,
-            p.name,
-            c.name_he as category,
-            sc.name_he as subcategory,
-            p.nutrition,
-            COALESCE((p.nutrition->>'sodium')::numeric, 0) as sodium
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN subcategories sc ON p.subcategory_id = sc.id
+        query = FOOD_SELECT + """
         WHERE p.item_code = %s
         AND p.is_active = true
         """
@@ -138,48 +399,16 @@ class SqlFoodProvider:
             return None
     
     def search_foods(self, query_text, limit=100):
-        """Search foods by name"""
-        if not query_text or len(query_text.strip()) < 2:
-            return []
-        
-        query = """
-        SELECT 
-            p.item_code,
-            p.name,
-            c.name_he as category,
-            sc.name_he as subcategory,
-            p.nutrition,
-            COALESCE((p.nutrition->>'sodium')::numeric, 0) as sodium
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN subcategories sc ON p.subcategory_id = sc.id
-        WHERE p.can_include_in_menu = true
-        AND p.is_active = true
-        AND (p.name ILIKE %s OR c.name_he ILIKE %s OR sc.name_he ILIKE %s)
-        ORDER BY p.name
-        LIMIT %s
-        """
-        
-        try:
-            search_term = f"%{query_text.strip()}%"
-            rows = self.db.execute_query(query, (search_term, search_term, search_term, limit))
-            
-            foods = []
-            for row in rows:
-                food = self.create_food_from_row(row)
-                if food:
-                    foods.append(food)
-            
-            return foods
-            
-        except Exception as e:
-            print(f"Error searching foods with query '{query_text}': {e}")
-            return []
+        """Search foods by name, category or subcategory"""
+        return self.search_food_page(query_text, 0, limit).foods
+    
+    def search_food_page(self, query_text, offset=0, limit=50):
+        """Get one page of ranked search results from the in-memory index, with the total match count"""
+        return self._get_snapshot().search_index.search(query_text or '', offset, limit)
     
     def reload_foods(self):
-        """Force reload foods cache"""
-        self.foods_cache = None
-        self.cache_timestamp = 0
+        """Force a full reload of the foods cache"""
+        self.refresh_cache(full=True)
         return self.get_all_foods()
     
     def get_provider_stats(self):
@@ -239,14 +468,231 @@ class SqlFoodProvider:
                 'error': str(e)
             }
 
+def build_price_lookup(price_rows):
+    """Index latest price rows as {item_code: {supermarket: price info}}"""
+    price_lookup = {}
+    for row in price_rows:
+        item_code = row['item_code']
+        supermarket = row['supermarket']
+        
+        if item_code not in price_lookup:
+            price_lookup[item_code] = {}
+        
+        price_lookup[item_code][supermarket] = {
+            'price': float(row['price'])
+        }
+    return price_lookup
+
+def summarize_menu_prices(menu_items, price_lookup, supermarkets):
+    """Calculate per-supermarket menu totals and a per-item cost breakdown"""
+    costs = np.full((len(menu_items), len(supermarkets)), np.nan)
+    for row, item in enumerate(menu_items):
+        item_prices = price_lookup.get(str(item.get('item_code', '')), {})
+        portion_grams = float(item.get('portion_grams', 0))
+        for column, supermarket in enumerate(supermarkets):
+            if supermarket in item_prices:
+                costs[row, column] = (portion_grams / 100.0) * item_prices[supermarket]['price']
+    
+    return summarize_item_costs(menu_items, costs, supermarkets)
+
+def summarize_item_costs(menu_items, costs, supermarkets):
+    """Build the comparison result from an items x supermarkets cost matrix (NaN where not sold)"""
+    return summarize_menu_costs_batch([menu_items], costs, supermarkets)[0]
+
+def summarize_menu_costs_batch(menus_items, costs, supermarkets):
+    """Build comparison results for several menus from one stacked cost matrix
+    
+    costs holds the items of every menu, one after another, in menus_items order.
+    """
+    sizes = [len(menu_items) for menu_items in menus_items]
+    offsets = np.cumsum([0] + sizes[:-1])
+    filled = np.nan_to_num(costs, nan=0.0)
+    totals = np.zeros((len(sizes), len(supermarkets)))
+    non_empty = np.array(sizes) > 0
+    if filled.size:
+        # Per-menu column sums in one pass (reduceat misbehaves on empty segments, so skip them)
+        totals[non_empty] = np.add.reduceat(filled, offsets[non_empty], axis=0)
+    rounded = np.round(costs, 2).tolist()
+    
+    results = []
+    for menu_items, offset, menu_totals in zip(menus_items, offsets, totals.tolist()):
+        item_breakdown = []
+        for item, item_costs in zip(menu_items, rounded[offset:offset + len(menu_items)]):
+            item_code = str(item.get('item_code', ''))
+            item_breakdown.append({
+                'item_code': item_code,
+                'name': item.get('name', f'Item {item_code}'),
+                'portion_grams': float(item.get('portion_grams', 0)),
+                'prices_per_supermarket': {
+                    supermarket: None if cost != cost else cost  # NaN -> None
+                    for supermarket, cost in zip(supermarkets, item_costs)
+                }
+            })
+        
+        results.append({
+            'supermarket_totals': {sm: round(total, 2) for sm, total in zip(supermarkets, menu_totals)},
+            'item_breakdown': item_breakdown,
+            'available_supermarkets': list(supermarkets)
+        })
+    return results
+
+# Immutable price cache state, replaced as a whole like FoodSnapshot
+PriceSnapshot = namedtuple('PriceSnapshot', ['matrix', 'built_at', 'check_due_at', 'rebuild_due_at'])
+
 class SqlPriceComparison:
-    """Simple PostgreSQL-based price comparison service"""
+    """Simple PostgreSQL-based price comparison service
     
-    def __init__(self, db_manager):
+    Current prices are held in memory as a PriceMatrix. It is checked for new price
+    loads every check_interval seconds (one index lookup) and rebuilt when a load
+    happened or cache_ttl passed, in the background while the current one is served.
+    """
+    
+    def __init__(self, db_manager, cache_ttl=900, check_interval=60, refresh_jitter=0.1):
         self.db = db_manager
-        self.supermarkets = self.get_available_supermarkets()
+        self.cache_ttl = cache_ttl  # 15 minutes between rebuilds (window expiry, supermarket changes)
+        self.check_interval = check_interval  # 1 minute between checks for new price loads
+        self.refresh_jitter = refresh_jitter
+        self.matrix_version = 0
+        self.shopping_optimizer = ShoppingOptimizer()
+        
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+        
+        # Refresh metrics
+        self.rebuild_count = 0
+        self.check_count = 0
+        self.refresh_failures = 0
+        self.last_refresh_duration = None
+        self.last_refresh_error = None
+        
+        self._get_snapshot()
         print("💰 SQL Price Comparison initialized")
     
+    @property
+    def price_matrix(self):
+        snapshot = self._snapshot
+        return snapshot.matrix if snapshot else None
+    
+    @property
+    def supermarkets(self):
+        """Active supermarkets, as of the latest price matrix"""
+        snapshot = self._snapshot
+        return snapshot.matrix.supermarkets if snapshot else []
+    
+    def _get_snapshot(self):
+        """Get the current snapshot, loading it inline only while there is none"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._refresh(force=True)
+            return self._snapshot
+        
+        if time.time() >= snapshot.check_due_at:
+            self._start_background_refresh()
+        return snapshot
+    
+    def _start_background_refresh(self):
+        """Start a refresh thread unless one is already running (single-flight)"""
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        thread = threading.Thread(target=self._background_refresh, name='price-cache-refresh', daemon=True)
+        thread.start()
+    
+    def _background_refresh(self):
+        try:
+            with self._load_lock:
+                self._refresh()
+        finally:
+            with self._state_lock:
+                self._refreshing = False
+    
+    def refresh_prices(self):
+        """Rebuild the price matrix now (e.g. right after a price load)"""
+        with self._load_lock:
+            self._refresh(force=True)
+        return self.price_matrix
+    
+    def _refresh(self, force=False):
+        """Rebuild the matrix if prices were loaded since the last build; on failure keep the old one"""
+        start_time = time.time()
+        
+        try:
+            marker = self.db.execute_single("SELECT MAX(recorded_at) AS last_loaded_at FROM latest_prices")
+            last_loaded_at = marker['last_loaded_at'] if marker else None
+            
+            snapshot = self._snapshot
+            if (not force and snapshot is not None and start_time < snapshot.rebuild_due_at
+                    and last_loaded_at == snapshot.matrix.last_loaded_at):
+                # No new prices: keep the matrix until the next check
+                self._snapshot = snapshot._replace(check_due_at=self._due(start_time, self.check_interval))
+                with self._state_lock:
+                    self.check_count += 1
+                return
+            
+            print("💰 Refreshing price matrix from PostgreSQL...")
+            supermarket_rows = self.db.execute_query("""
+            SELECT name 
+            FROM supermarkets 
+            WHERE is_active = true 
+            ORDER BY name
+            """)
+            price_rows = self.db.execute_query(CURRENT_PRICES_SELECT)
+            
+            matrix = PriceMatrix.from_rows(
+                price_rows, [row['name'] for row in supermarket_rows],
+                version=self.matrix_version + 1, last_loaded_at=last_loaded_at
+            )
+            self.matrix_version += 1
+            built_at = time.time()
+            self._snapshot = PriceSnapshot(
+                matrix, built_at,
+                self._due(built_at, self.check_interval),
+                self._due(built_at, self.cache_ttl)
+            )
+            with self._state_lock:
+                self.rebuild_count += 1
+                self.last_refresh_duration = built_at - start_time
+                self.last_refresh_error = None
+            print(f"✅ Cached prices for {len(matrix)} items across {len(matrix.supermarkets)} supermarkets")
+            
+        except Exception as e:
+            print(f"Failed to refresh price matrix: {e}")
+            with self._state_lock:
+                self.refresh_failures += 1
+                self.last_refresh_error = str(e)
+            snapshot = self._snapshot
+            if snapshot is not None:
+                # Keep serving the old matrix and try again at the next check
+                self._snapshot = snapshot._replace(check_due_at=self._due(time.time(), self.check_interval))
+    
+    def _due(self, now, interval):
+        return now + interval * (1 + random.uniform(-self.refresh_jitter, self.refresh_jitter))
+    
+    def get_cache_stats(self):
+        """Get price matrix size, age and refresh metrics"""
+        snapshot = self._snapshot
+        now = time.time()
+        with self._state_lock:
+            return {
+                'items': len(snapshot.matrix) if snapshot else 0,
+                'supermarkets': len(snapshot.matrix.supermarkets) if snapshot else 0,
+                'matrix_version': self.matrix_version,
+                'matrix_age_seconds': round(now - snapshot.built_at, 1) if snapshot else None,
+                'last_loaded_at': snapshot.matrix.last_loaded_at.isoformat() if snapshot and snapshot.matrix.last_loaded_at else None,
+                'refreshing': self._refreshing,
+                'rebuild_count': self.rebuild_count,
+                'check_count': self.check_count,
+                'refresh_failures': self.refresh_failures,
+                'last_refresh_duration_ms': round(self.last_refresh_duration * 1000, 1) if self.last_refresh_duration is not None else None,
+                'last_refresh_error': self.last_refresh_error
+            }
+    
     def get_available_supermarkets(self):
         """Get list of active supermarkets"""
         try:
@@ -264,174 +710,138 @@ class SqlPriceComparison:
             print(f"Error getting supermarkets: {e}")
             return []
     
+    def _menu_item_costs(self, menu_items):
+        """Get the price matrix and the items x supermarkets cost matrix for menu items"""
+        snapshot = self._get_snapshot()
+        if snapshot is None:
+            raise RuntimeError("Price data is not available")
+        
+        matrix = snapshot.matrix
+        costs = matrix.item_costs(
+            [item.get('item_code', '') for item in menu_items],
+            [float(item.get('portion_grams', 0)) for item in menu_items]
+        )
+        return matrix, costs
+    
     def compare_menu_prices(self, menu_items):
         """Compare total price of menu items across supermarkets"""
         if not menu_items:
             return {'error': 'No menu items provided'}
         
         try:
-            # Get item codes
-            item_codes = []
-            for item in menu_items:
-                if item.get('item_code'):
-                    item_codes.append(str(item['item_code']))
-            
-            if not item_codes:
+            if not any(item.get('item_code') for item in menu_items):
                 return {'error': 'No valid item codes provided'}
             
-            # Get all current prices for these items
-            query = """
-            SELECT DISTINCT ON (p.item_code, s.name)
-                p.item_code,
-                p.name as product_name,
-                s.name as supermarket,
-                ph.price,
-                ph.is_on_sale,
-                ph.sale_percentage
-            FROM price_history ph
-            JOIN products p ON ph.product_id = p.id
-            JOIN supermarkets s ON ph.supermarket_id = s.id
-            WHERE p.item_code = ANY(%s)
-            AND s.is_active = true
-            AND ph.recorded_at > NOW() - INTERVAL '30 days'
-            ORDER BY p.item_code, s.name, ph.recorded_at DESC
-            """
-            
-            price_rows = self.db.execute_query(query, (item_codes,))
-            
-            # Create price lookup
-            price_lookup = {}
-            for row in price_rows:
-                item_code = row['item_code']
-                supermarket = row['supermarket']
-                
-                if item_code not in price_lookup:
-                    price_lookup[item_code] = {}
-                
-                price_lookup[item_code][supermarket] = {
-                    'price': float(row['price']),
-                    'is_on_sale': row['is_on_sale'],
-                    'sale_percentage': row['sale_percentage']
-                }
-            
-            # Calculate totals
-            supermarket_totals = {}
-            for sm in self.supermarkets:
-                supermarket_totals[sm] = 0.0
-            
-            item_breakdown = []
-            
-            for item in menu_items:
-                item_code = str(item.get('item_code', ''))
-                portion_grams = float(item.get('portion_grams', 0))
-                item_name = item.get('name', f'Item {item_code}')
-                
-                item_costs = {}
-                item_prices = price_lookup.get(item_code, {})
-                
-                for supermarket in self.supermarkets:
-                    if supermarket in item_prices:
-                        price_per_100g = item_prices[supermarket]['price']
-                        item_cost = (portion_grams / 100.0) * price_per_100g
-                        item_costs[supermarket] = round(item_cost, 2)
-                        supermarket_totals[supermarket] += item_cost
-                    else:
-                        item_costs[supermarket] = None
-                
-                item_breakdown.append({
-                    'item_code': item_code,
-                    'name': item_name,
-                    'portion_grams': portion_grams,
-                    'prices_per_supermarket': item_costs
-                })
-            
-            # Round totals
-            for sm in self.supermarkets:
-                supermarket_totals[sm] = round(supermarket_totals[sm], 2)
-            
-            return {
-                'supermarket_totals': supermarket_totals,
-                'item_breakdown': item_breakdown,
-                'available_supermarkets': self.supermarkets
-            }
+            matrix, costs = self._menu_item_costs(menu_items)
+            return summarize_item_costs(menu_items, costs, matrix.supermarkets)
             
         except Exception as e:
             print(f"Error comparing menu prices: {e}")
             return {'error': f'Price comparison failed: {str(e)}'}
     
-    def get_cheapest_combination(self, menu_items):
-        """Find the cheapest combination across all supermarkets"""
+    def compare_menu_prices_batch(self, menus_items):
+        """Compare prices for several menus at once, returning one result per menu
+        
+        Prices for the union of item codes are gathered once and every menu's totals
+        are summed in one pass. A menu that cannot be compared gets an error result.
+        """
+        results = [None] * len(menus_items)
+        valid = []
+        for i, menu_items in enumerate(menus_items):
+            if not menu_items:
+                results[i] = {'error': 'No menu items provided'}
+            elif not any(item.get('item_code') for item in menu_items):
+                results[i] = {'error': 'No valid item codes provided'}
+            else:
+                valid.append(i)
+        
+        if not valid:
+            return results
+        
+        try:
+            snapshot = self._get_snapshot()
+            if snapshot is None:
+                raise RuntimeError("Price data is not available")
+            matrix = snapshot.matrix
+            
+            # Look up each distinct item code once, then expand back to every menu item
+            all_items = [item for i in valid for item in menus_items[i]]
+            codes = [str(item.get('item_code', '')) for item in all_items]
+            unique_codes, inverse = np.unique(codes, return_inverse=True)
+            unique_rows = matrix.rows_for(unique_codes.tolist())
+            costs = matrix.row_costs(
+                unique_rows[inverse.reshape(-1)],
+                [float(item.get('portion_grams', 0)) for item in all_items]
+            )
+            
+            summaries = summarize_menu_costs_batch([menus_items[i] for i in valid], costs, matrix.supermarkets)
+            for i, summary in zip(valid, summaries):
+                results[i] = summary
+            
+        except Exception as e:
+            print(f"Error comparing menu prices in batch: {e}")
+            for i in valid:
+                results[i] = {'error': f'Price comparison failed: {str(e)}'}
+        
+        return results
+    
+    def get_cheapest_combination(self, menu_items, store_visit_cost=0.0, max_stores=None):
+        """Find the cheapest combination across supermarkets, counting each store visit
+        
+        The plan minimizes item cost plus store_visit_cost per supermarket visited, with
+        at most max_stores supermarkets, and store_savings shows what each extra store
+        saves on the items. Items not sold at the chosen stores are listed as unavailable.
+        """
         if not menu_items:
             return {'error': 'No menu items provided'}
         
         try:
-            item_codes = [str(item.get('item_code', '')) for item in menu_items if item.get('item_code')]
-            
-            # Get all prices for these items
-            query = """
-            SELECT DISTINCT ON (p.item_code, s.name)
-                p.item_code,
-                p.name as product_name,
-                s.name as supermarket,
-                ph.price
-            FROM price_history ph
-            JOIN products p ON ph.product_id = p.id
-            JOIN supermarkets s ON ph.supermarket_id = s.id
-            WHERE p.item_code = ANY(%s)
-            AND s.is_active = true
-            AND ph.recorded_at > NOW() - INTERVAL '30 days'
-            ORDER BY p.item_code, s.name, ph.recorded_at DESC
-            """
-            
-            price_rows = self.db.execute_query(query, (item_codes,))
+            menu_items = [item for item in menu_items if item.get('item_code')]
+            matrix, costs = self._menu_item_costs(menu_items)
             
-            # Build price lookup
-            price_lookup = {}
-            for row in price_rows:
-                item_code = row['item_code']
-                if item_code not in price_lookup:
-                    price_lookup[item_code] = {}
-                price_lookup[item_code][row['supermarket']] = float(row['price'])
+            # Only items sold somewhere take part in the plan
+            priced = ~np.isnan(costs).all(axis=1) if costs.size else np.zeros(len(menu_items), dtype=bool)
+            priced_rows = np.flatnonzero(priced)
+            priced_costs = costs[priced_rows]
+            plan = self.shopping_optimizer.optimize(priced_costs, store_visit_cost, max_stores) if priced_rows.size else None
             
-            # Find cheapest option for each item
-            total_cost = 0.0
             shopping_list = {}
-            
-            for item in menu_items:
+            unavailable = [str(item.get('item_code', '')) for item, is_priced in zip(menu_items, priced) if not is_priced]
+            for row, column in zip(priced_rows, plan.item_columns if plan else []):
+                item = menu_items[row]
                 item_code = str(item.get('item_code', ''))
-                portion_grams = float(item.get('portion_grams', 0))
-                item_name = item.get('name', f'Item {item_code}')
-                
-                if item_code not in price_lookup:
+                if column < 0:
+                    unavailable.append(item_code)
                     continue
-                
-                # Find cheapest supermarket for this item
-                best_price = None
-                best_supermarket = None
-                
-                for supermarket, price_per_100g in price_lookup[item_code].items():
-                    item_cost = (portion_grams / 100.0) * price_per_100g
-                    if best_price is None or item_cost < best_price:
-                        best_price = item_cost
-                        best_supermarket = supermarket
-                
-                if best_price is not None:
-                    total_cost += best_price
-                    
-                    if best_supermarket not in shopping_list:
-                        shopping_list[best_supermarket] = []
-                    
-                    shopping_list[best_supermarket].append({
-                        'item_code': item_code,
-                        'name': item_name,
-                        'portion_grams': portion_grams,
-                        'price': round(best_price, 2)
-                    })
+                shopping_list.setdefault(matrix.supermarkets[column], []).append({
+                    'item_code': item_code,
+                    'name': item.get('name', f'Item {item_code}'),
+                    'portion_grams': float(item.get('portion_grams', 0)),
+                    'price': round(float(costs[row, column]), 2)
+                })
+            
+            store_savings = []
+            previous_cost = None
+            for stores, store_plan in (self.shopping_optimizer.savings_by_store_count(priced_costs) if priced_rows.size else []):
+                store_savings.append({
+                    'stores': stores,
+                    'supermarkets': [matrix.supermarkets[column] for column in store_plan.columns],
+                    'items_cost': round(store_plan.items_cost, 2),
+                    'items_covered': int(store_plan.covered.sum()),
+                    'saving': round(previous_cost - store_plan.items_cost, 2) if previous_cost is not None else None
+                })
+                previous_cost = store_plan.items_cost
             
+            items_cost = plan.items_cost if plan else 0.0
+            visit_cost = plan.visit_cost if plan else 0.0
             return {
-                'total_cost': round(total_cost, 2),
+                'total_cost': round(items_cost, 2),
+                'visit_cost': round(visit_cost, 2),
+                'total_with_visits': round(items_cost + visit_cost, 2),
                 'shopping_list': shopping_list,
-                'supermarkets_needed': list(shopping_list.keys())
+                'supermarkets_needed': [matrix.supermarkets[column] for column in plan.columns] if plan else [],
+                'unavailable_items': unavailable,
+                'store_savings': store_savings
             }
             
         except Exception as e:
@@ -1,6 +1,6 @@
 # src/__init__.py - Main package
 
-from .models import NutritionInfo, Food, MenuItem, Menu
+from .models import NutritionInfo, Food, MenuItem, Menu, FoodCatalog
 from .services import FoodClassifier, PortionCalculator, MealRulesFactory
 from .algorithm import MenuGenerator
 
@@ -9,6 +9,7 @@ __all__ = [
     'Food', 
     'MenuItem',
     'Menu',
+    'FoodCatalog',
     'FoodClassifier',
     'PortionCalculator',
     'MealRulesFactory',
@@ -0,0 +1,111 @@
+# src/algorithm/cost_objective.py - Menu cost objective for cost-aware generation
+
+import copy
+import numpy as np
+
+class CostObjective:
+    """Responsible ONLY for pricing menus and candidate foods of one pool
+
+    Per-100g prices are aligned to the pool rows (from one supermarket, or the cheapest
+    anywhere). Foods without a price are never candidates in cost-aware mode, since a
+    menu containing them could not be priced.
+    """
+
+    # Scale of the per-calorie price penalty when picking fill foods (macro fit stays dominant)
+    SELECTION_SCALE = 0.2
+    MAX_RELATIVE_PRICE = 3.0
+
+    def __init__(self, pool_prices, min_portions, prices_by_code, price_per_kcal, supermarket=None):
+        self.pool_prices = pool_prices
+        self.priced = ~np.isnan(pool_prices)
+        self.min_costs = np.where(self.priced, pool_prices * min_portions / 100.0, np.inf)
+        self.prices_by_code = prices_by_code
+        self.supermarket = supermarket
+
+        # Price per calorie relative to the pool's median, for the selection penalty
+        self.median_price_per_kcal = float(np.nanmedian(price_per_kcal)) if self.priced.any() else 0.0
+        relative = price_per_kcal / self.median_price_per_kcal if self.median_price_per_kcal > 0 else np.zeros_like(price_per_kcal)
+        self.relative_price = np.minimum(np.nan_to_num(relative, nan=self.MAX_RELATIVE_PRICE), self.MAX_RELATIVE_PRICE)
+
+        # Set per request by configure()
+        self.weight = 0.0
+        self.budget = None
+        self.reference_cost = None
+
+    @classmethod
+    def for_pool(cls, pool, price_matrix, portion_calculator, supermarket=None):
+        """Price every food of a candidate pool (done once per pool and price matrix)"""
+        item_codes = [food.item_code for food in pool.foods]
+        prices = price_matrix.item_prices(item_codes, supermarket)
+        min_portions = np.array([portion_calculator.get_portion_limits(food)['min'] for food in pool.foods], dtype=np.float64)
+        prices_by_code = {code: float(price) for code, price in zip(item_codes, prices.tolist()) if price == price}
+        price_per_kcal = prices / np.maximum(1.0, pool.calories)
+        return cls(prices, min_portions, prices_by_code, price_per_kcal, supermarket)
+
+    def configure(self, target_nutrition, weight=0.0, budget=None):
+        """Get a copy set up for one request (the price arrays are shared, not copied)"""
+        objective = copy.copy(self)
+        objective.weight = float(weight or 0.0)
+        objective.budget = budget
+
+        # Cost is scored relative to the budget, or to a typical menu hitting the calorie target
+        typical_cost = target_nutrition.calories * self.median_price_per_kcal
+        objective.reference_cost = budget if budget else max(typical_cost, 0.01)
+        return objective
+
+    def start(self):
+        """Start tracking the budget of one menu being built"""
+        return MenuBudget(self)
+
+    def menu_cost(self, menu):
+        """Get the cost of a menu, or None when some item has no price"""
+        total = 0.0
+        for item in menu.items:
+            price = self.prices_by_code.get(item.food.item_code)
+            if price is None:
+                return None
+            total += price * item.portion_grams / 100.0
+        return total
+
+    def accepts(self, menu):
+        """Check that a menu can be priced and fits the budget"""
+        cost = self.menu_cost(menu)
+        return cost is not None and (self.budget is None or cost <= self.budget)
+
+    def score(self, menu):
+        """Get the cost term added to a menu's macro score"""
+        if not self.weight:
+            return 0.0
+        cost = self.menu_cost(menu)
+        if cost is None:
+            return float('inf')
+        return self.weight * cost / self.reference_cost
+
+    def selection_penalty(self, rows):
+        """Get the per-calorie price penalty of candidate rows"""
+        return self.weight * self.SELECTION_SCALE * self.relative_price[rows]
+
+class MenuBudget:
+    """Tracks the remaining budget while one menu is built"""
+
+    def __init__(self, objective):
+        self.objective = objective
+        self.remaining = objective.budget if objective.budget is not None else np.inf
+
+    def admissible_mask(self):
+        """Get the pool rows that are priced and whose smallest portion still fits the budget"""
+        return self.objective.min_costs <= self.remaining
+
+    def fit_portion(self, row, portion, min_portion):
+        """Shrink a portion to the remaining budget, but not below the food's minimum portion"""
+        price = self.objective.pool_prices[row]
+        if not np.isfinite(self.remaining) or not price > 0:
+            return portion
+        affordable = int(self.remaining / price * 100.0)
+        return max(min_portion, min(portion, affordable))
+
+    def add(self, row, item):
+        """Spend the cost of a menu item added from a pool row"""
+        price = self.objective.pool_prices[row]
+        if price == price:
+            self.remaining -= price * item.portion_grams / 100.0
\ No newline at end of file
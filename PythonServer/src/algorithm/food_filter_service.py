@@ -1,14 +1,24 @@
 # src/algorithm/food_filter_service.py - Food filtering orchestration
 
+import threading
 from ..filters import NutritionalSoundnessFilter, MealAppropriatenessFilter
+from config import get_config_fingerprint
 
 class FoodFilterService:
     """Responsible ONLY for orchestrating food filtering (SRP)"""
     
-    def __init__(self, nutritional_filter, preference_filter, meal_rules_factory):
+    def __init__(self, nutritional_filter, preference_filter, meal_rules_factory, food_classifier=None, config=None):
         self.nutritional_filter = nutritional_filter
         self.preference_filter = preference_filter
         self.meal_rules_factory = meal_rules_factory
+        self.food_classifier = food_classifier
+        self.config = config
+        
+        # Filtered candidate pools keyed on (meal_type, config fingerprint, catalog version)
+        self._config_fingerprint = get_config_fingerprint(config) if config is not None else None
+        self._pool_cache = {}
+        self._meal_rules_cache = {}
+        self._lock = threading.Lock()
     
     def get_suitable_foods(self, all_foods, meal_type=None):
         """Apply complete filtering pipeline to get suitable foods"""
@@ -23,12 +33,62 @@ class FoodFilterService:
         
         # Apply meal-specific filtering if specified
         if meal_type:
-            meal_rules = self.meal_rules_factory.create_rules(meal_type)
-            meal_filter = MealAppropriatenessFilter(meal_rules)
+            meal_filter = MealAppropriatenessFilter(self._get_meal_rules(meal_type))
             suitable_foods = meal_filter.filter(suitable_foods)
         
         return suitable_foods
     
+    def get_candidate_pool(self, catalog, meal_type=None):
+        """Get the filtered catalog for a meal type, filtering only once per catalog version"""
+        key = (meal_type, self._config_fingerprint, catalog.version)
+        
+        with self._lock:
+            pool = self._pool_cache.get(key)
+            if pool is not None and pool.source is catalog:
+                return pool
+            
+            # A new catalog version invalidates every cached pool
+            if any(cached_key[2] != catalog.version for cached_key in self._pool_cache):
+                self._pool_cache.clear()
+            
+            pool = catalog.subset(self.get_suitable_foods(catalog.foods, meal_type))
+            self._warm_rankings(pool)
+            self._pool_cache[key] = pool
+            print(f"🧺 Cached {len(pool)} candidate foods for {meal_type or 'general'} (catalog v{catalog.version})")
+            return pool
+    
+    def exclude_foods(self, pool, excluded_codes):
+        """Get a pool without the given item codes (still a subset of the pool's catalog, not cached)"""
+        if not excluded_codes:
+            return pool
+        kept = [row for row, food in enumerate(pool.foods) if food.item_code not in excluded_codes]
+        if len(kept) == len(pool):
+            return pool
+        
+        narrowed = pool.source.take(pool.source_rows[kept])
+        self._warm_rankings(narrowed)
+        return narrowed
+    
+    def clear_cache(self):
+        """Drop all cached candidate pools"""
+        with self._lock:
+            self._pool_cache.clear()
+    
+    def _warm_rankings(self, pool):
+        """Precompute the protein/carb rankings the builder selects from"""
+        if self.food_classifier is None:
+            return
+        pool.get_ranking('protein', self.food_classifier.is_protein_source, 'protein')
+        pool.get_ranking('carbs', self.food_classifier.is_fiber_source, 'carbs')
+    
+    def _get_meal_rules(self, meal_type):
+        """Get meal rules, creating them once per meal type"""
+        meal_rules = self._meal_rules_cache.get(meal_type)
+        if meal_rules is None:
+            meal_rules = self.meal_rules_factory.create_rules(meal_type)
+            self._meal_rules_cache[meal_type] = meal_rules
+        return meal_rules
+    
     def get_filtering_stats(self, original_count, filtered_count):
         """Get statistics about the filtering process"""
         return {
@@ -0,0 +1,79 @@
+# src/algorithm/food_selection.py - Candidate selection helpers
+
+import random
+from functools import lru_cache
+import numpy as np
+
+class AliasTable:
+    """Responsible ONLY for O(1) weighted sampling of indices (Vose's alias method)"""
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        n = len(weights)
+        if n == 0 or weights.sum() <= 0:
+            raise ValueError("AliasTable needs at least one positive weight")
+
+        self.size = n
+        scaled = weights * n / weights.sum()
+        self.probabilities = np.ones(n)
+        self.aliases = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        # Plain lists are faster to index from Python than NumPy arrays
+        self.probabilities = self.probabilities.tolist()
+        self.aliases = self.aliases.tolist()
+
+    def sample(self, rng=random):
+        """Draw one index using a single uniform random number"""
+        u = rng.random() * self.size
+        i = int(u)
+        return i if u - i < self.probabilities[i] else self.aliases[i]
+
+@lru_cache(maxsize=256)
+def get_variety_alias_table(count, top_count=5, top_weight=0.2, other_weight=0.1):
+    """Get the (shared, immutable) alias table favouring the first top_count of count candidates"""
+    return AliasTable([top_weight if i < top_count else other_weight for i in range(count)])
+
+def top_k(scores, k, top_count=5):
+    """Get positions of the k highest scores without a full sort
+
+    The first top_count positions returned are the best ones; the rest are unordered.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k >= n and top_count >= n:
+        return np.arange(n)
+
+    kth = [min(top_count, k) - 1]
+    if k < n:
+        kth.append(k - 1)
+    return np.argpartition(-scores, kth)[:k]
+
+def choose_from_ranking(ranked_rows, min_count=10, fraction=0.5, rng=None):
+    """Pick a row uniformly from the head of a pre-sorted ranking (the ranking is not modified)
+
+    rng is a random.Random for reproducible picks; the module-level generator by default.
+    """
+    rng = rng or random
+    variety_count = max(min_count, int(len(ranked_rows) * fraction))
+    head = ranked_rows[:variety_count]
+    return int(head[int(rng.random() * len(head))])
+
+def choose_weighted_top(rows, scores, min_count=15, fraction=0.5, top_count=5, rng=None):
+    """Pick a row from the best-scoring candidates, favouring the top few (rng as above)"""
+    rng = rng or random
+    variety_count = min(max(min_count, int(rows.size * fraction)), rows.size)
+    if variety_count <= top_count:
+        return int(rows[int(rng.random() * rows.size)])
+
+    candidates = top_k(scores, variety_count, top_count)
+    table = get_variety_alias_table(variety_count, top_count)
+    return int(rows[candidates[table.sample(rng)]])
@@ -1,20 +1,39 @@
 # src/algorithm/menu_builder.py - Enhanced version with calorie distribution fix
 
-import random
-from ..models import Menu, MenuItem
+import numpy as np
+from ..models import Menu, MenuItem, FoodCatalog
+from ..services.portion_optimizer import PortionOptimizer
+from .food_selection import choose_from_ranking, choose_weighted_top
 
 class MenuBuilder:
     """Enhanced MenuBuilder with better calorie distribution"""
     
-    def __init__(self, food_classifier, portion_calculator, config):
+    def __init__(self, food_classifier, portion_calculator, config, portion_mode=None):
         self.food_classifier = food_classifier
         self.portion_calculator = portion_calculator
         self.config = config
+        
+        # 'solver' mode re-solves all portions jointly once foods are picked
+        self.portion_mode = portion_mode or getattr(config, 'PORTION_MODE', 'heuristic')
+        self.portion_optimizer = None
+        if self.portion_mode == 'solver':
+            if PortionOptimizer.is_available():
+                self.portion_optimizer = PortionOptimizer(portion_calculator, config)
+            else:
+                print("⚠️ SciPy not available, using heuristic portions")
     
-    def build_menu(self, foods, target_nutrition, meal_type, num_items):
-        """Build a single menu with improved calorie distribution"""
-        menu = Menu()
-        used_foods = set()
+    def build_menu(self, foods, target_nutrition, meal_type, num_items, cost_objective=None, rng=None):
+        """Build a single menu with improved calorie distribution
+        
+        rng is a per-call random.Random that makes food picks reproducible without
+        touching the process-wide generator other requests use. With a cost objective, unpriced foods and foods whose smallest portion exceeds the
+        remaining budget are pruned, portions are capped to the budget, and fill picks
+        lean towards cheaper calories. cost_objective must be priced for this pool.
+        """
+        catalog = self._as_catalog(foods)
+        menu = Menu(self.food_classifier)
+        budget = cost_objective.start() if cost_objective else None
+        used_rows = np.zeros(len(catalog), dtype=bool)
         remaining_nutrition = target_nutrition
         
         # Calculate target calories per item for distribution control
@@ -22,32 +41,70 @@ class MenuBuilder:
         max_calories_per_item = target_calories_per_item * 1.3 # Allow some variance but prevent domination
         
         # Phase 1: Add required items if specified
-        remaining_nutrition = self._add_required_items(menu, foods, used_foods, remaining_nutrition, max_calories_per_item)
+        remaining_nutrition = self._add_required_items(menu, catalog, used_rows, remaining_nutrition, max_calories_per_item, budget)
         
         # Phase 2: Add protein if needed (with calorie control)
-        remaining_nutrition = self._add_protein_if_needed(menu, foods, used_foods, remaining_nutrition, num_items, max_calories_per_item)
+        remaining_nutrition = self._add_protein_if_needed(menu, catalog, used_rows, remaining_nutrition, num_items, max_calories_per_item, budget, rng)
         
         # Phase 3: Add carbs if needed (with calorie control)
-        remaining_nutrition = self._add_carbs_if_needed(menu, foods, used_foods, remaining_nutrition, num_items, max_calories_per_item)
+        remaining_nutrition = self._add_carbs_if_needed(menu, catalog, used_rows, remaining_nutrition, num_items, max_calories_per_item, budget, rng)
         
         # Phase 4: Fill remaining slots (with calorie control)
-        self._fill_remaining_slots(menu, foods, used_foods, remaining_nutrition, target_nutrition, num_items, max_calories_per_item)
+        self._fill_remaining_slots(menu, catalog, used_rows, remaining_nutrition, target_nutrition, num_items, max_calories_per_item, budget, rng)
+        
+        # Phase 5: Solve all portions together (solver mode)
+        if self.portion_optimizer:
+            menu = self._optimize_portions(menu, target_nutrition, max_calories_per_item, cost_objective)
         
         return menu
     
-    def _add_required_items(self, menu, foods, used_foods, remaining_nutrition, max_calories_per_item):
+    def _optimize_portions(self, menu, target_nutrition, max_calories_per_item, cost_objective=None):
+        """Replace heuristic portions with jointly optimized ones (within the per-item calorie cap and budget)"""
+        foods = [item.food for item in menu.items]
+        
+        # Required items keep their configured portions, under the same calorie cap as the heuristic
+        required_portions = getattr(self.config, 'REQUIRED_ITEM_PORTIONS', {})
+        fixed_portions = {
+            food.item_code: self._get_required_portion_with_limit(food, food.item_code, required_portions, target_nutrition, max_calories_per_item)
+            for food in foods if food.item_code in required_portions
+        }
+        prices, max_cost = None, None
+        if cost_objective is not None and cost_objective.budget is not None:
+            # Cost-aware pools hold priced foods only
+            prices = [cost_objective.prices_by_code.get(food.item_code, 0.0) for food in foods]
+            max_cost = cost_objective.budget
+        portions = self.portion_optimizer.optimize(foods, target_nutrition, fixed_portions, max_calories_per_item, prices, max_cost)
+        if portions is None:
+            return menu
+        
+        optimized_menu = Menu(self.food_classifier)
+        for food, portion in zip(foods, portions):
+            optimized_menu.add_item(MenuItem(food, portion))
+        return optimized_menu
+    
+    def _as_catalog(self, foods):
+        """Accept either a prepared FoodCatalog or a plain list of foods"""
+        if isinstance(foods, FoodCatalog):
+            return foods
+        return FoodCatalog(foods, self.food_classifier)
+    
+    def _add_required_items(self, menu, catalog, used_rows, remaining_nutrition, max_calories_per_item, budget=None):
         """Add items specified in REQUIRED_ITEM_CODES with calorie limits"""
         required_item_codes = getattr(self.config, 'REQUIRED_ITEM_CODES', [])
         required_portions = getattr(self.config, 'REQUIRED_ITEM_PORTIONS', {})
         
         for item_code in required_item_codes:
-            required_food = self._find_food_by_code(foods, item_code)
-            if required_food:
+            row = catalog.get_row(item_code)
+            if row is not None:
+                required_food = catalog[row]
                 # Calculate portion with calorie limit
                 portion = self._get_required_portion_with_limit(required_food, item_code, required_portions, remaining_nutrition, max_calories_per_item)
                 
-                menu.add_item(MenuItem(required_food, portion))
-                used_foods.add(required_food.item_code)
+                menu_item = MenuItem(required_food, portion)
+                menu.add_item(menu_item)
+                used_rows[row] = True
+                if budget:
+                    budget.add(row, menu_item)
                 
                 # Update remaining nutrition
                 item_nutrition = required_food.get_nutrition_for_portion(portion)
@@ -55,73 +112,99 @@ class MenuBuilder:
         
         return remaining_nutrition
     
-    def _add_protein_if_needed(self, menu, foods, used_foods, remaining_nutrition, num_items, max_calories_per_item):
+    def _add_protein_if_needed(self, menu, catalog, used_rows, remaining_nutrition, num_items, max_calories_per_item, budget=None, rng=None):
         """Add protein source with calorie control"""
         if not any(self.food_classifier.is_protein_source(item.food) for item in menu.items):
-            protein_foods = [f for f in foods if f.item_code not in used_foods 
-                           and self.food_classifier.is_protein_source(f)]
+            ranking = catalog.get_ranking('protein', self.food_classifier.is_protein_source, 'protein')
+            available = ~used_rows if budget is None else ~used_rows & budget.admissible_mask()
+            protein_rows = ranking[available[ranking]]
             
-            if protein_foods:
-                selected_protein = self._select_protein_food(protein_foods)
+            if protein_rows.size:
+                selected_row = self._select_protein_food(protein_rows, rng)
+                selected_protein = catalog[selected_row]
                 # Use calorie-controlled portion calculation
                 portion = self._calculate_controlled_portion(selected_protein, remaining_nutrition, max_calories_per_item, 'protein')
+                portion = self._fit_to_budget(budget, selected_row, selected_protein, portion)
                 
-                menu.add_item(MenuItem(selected_protein, portion))
-                used_foods.add(selected_protein.item_code)
+                menu_item = MenuItem(selected_protein, portion)
+                menu.add_item(menu_item)
+                used_rows[selected_row] = True
+                if budget:
+                    budget.add(selected_row, menu_item)
                 
                 item_nutrition = selected_protein.get_nutrition_for_portion(portion)
                 remaining_nutrition = self._subtract_nutrition(remaining_nutrition, item_nutrition)
         
         return remaining_nutrition
     
-    def _add_carbs_if_needed(self, menu, foods, used_foods, remaining_nutrition, num_items, max_calories_per_item):
+    def _add_carbs_if_needed(self, menu, catalog, used_rows, remaining_nutrition, num_items, max_calories_per_item, budget=None, rng=None):
         """Add carb source with calorie control"""
         if not any(self.food_classifier.is_fiber_source(item.food) for item in menu.items):
-            carb_foods = [f for f in foods if f.item_code not in used_foods 
-                         and self.food_classifier.is_fiber_source(f)]
+            ranking = catalog.get_ranking('carbs', self.food_classifier.is_fiber_source, 'carbs')
+            available = ~used_rows if budget is None else ~used_rows & budget.admissible_mask()
+            carb_rows = ranking[available[ranking]]
             
-            if carb_foods and len(menu.items) < num_items:
-                selected_carb = self._select_carb_food(carb_foods)
+            if carb_rows.size and len(menu.items) < num_items:
+                selected_row = self._select_carb_food(carb_rows, rng)
+                selected_carb = catalog[selected_row]
                 # Use calorie-controlled portion calculation
                 portion = self._calculate_controlled_portion(selected_carb, remaining_nutrition, max_calories_per_item, 'carbs')
+                portion = self._fit_to_budget(budget, selected_row, selected_carb, portion)
                 
-                menu.add_item(MenuItem(selected_carb, portion))
-                used_foods.add(selected_carb.item_code)
+                menu_item = MenuItem(selected_carb, portion)
+                menu.add_item(menu_item)
+                used_rows[selected_row] = True
+                if budget:
+                    budget.add(selected_row, menu_item)
                 
                 item_nutrition = selected_carb.get_nutrition_for_portion(portion)
                 remaining_nutrition = self._subtract_nutrition(remaining_nutrition, item_nutrition)
         
         return remaining_nutrition
     
-    def _fill_remaining_slots(self, menu, foods, used_foods, remaining_nutrition, target_nutrition, num_items, max_calories_per_item):
+    def _fill_remaining_slots(self, menu, catalog, used_rows, remaining_nutrition, target_nutrition, num_items, max_calories_per_item, budget=None, rng=None):
         """Fill remaining menu slots with calorie distribution control"""
-        from ..filters import BalanceFilter
+        from ..filters import BalanceConstraintEngine
+        
+        # Balance state follows the menu, so each slot is one vectorized check
+        balance_engine = BalanceConstraintEngine(catalog, self.config)
+        balance_engine.start(menu, self.food_classifier)
         
         while len(menu.items) < num_items and remaining_nutrition.calories > 50:
-            # Get available foods with balance filtering
-            available_foods = [f for f in foods if f.item_code not in used_foods]
+            # Get available foods that keep the menu balanced
+            available = ~used_rows & balance_engine.admissible_mask()
+            if budget:
+                available &= budget.admissible_mask()
+            available_rows = np.flatnonzero(available)
             
-            # Apply balance constraints
-            balance_filter = BalanceFilter(self.food_classifier, menu, target_nutrition, self.config)
-            available_foods = balance_filter.filter(available_foods)
-            
-            if not available_foods:
+            if available_rows.size == 0:
                 break
             
             # Select food with flexible variety
-            selected_food = self._select_balanced_food(available_foods, remaining_nutrition, menu)
+            selected_row = self._select_balanced_food(catalog, available_rows, remaining_nutrition, menu, budget, rng)
+            selected_food = catalog[selected_row]
             
             # Calculate remaining slots to distribute calories evenly
             remaining_slots = num_items - len(menu.items)
             
             # Use calorie-controlled portion calculation
             portion = self._calculate_distributed_portion(selected_food, remaining_nutrition, remaining_slots, max_calories_per_item)
+            portion = self._fit_to_budget(budget, selected_row, selected_food, portion)
             
-            menu.add_item(MenuItem(selected_food, portion))
-            used_foods.add(selected_food.item_code)
+            menu_item = MenuItem(selected_food, portion)
+            menu.add_item(menu_item)
+            balance_engine.add(selected_row, menu_item)
+            used_rows[selected_row] = True
+            if budget:
+                budget.add(selected_row, menu_item)
             
-            item_nutrition = selected_food.get_nutrition_for_portion(portion)
-            remaining_nutrition = self._subtract_nutrition(remaining_nutrition, item_nutrition)
+            remaining_nutrition = self._subtract_nutrition(remaining_nutrition, menu_item.get_nutrition())
+    
+    def _fit_to_budget(self, budget, row, food, portion):
+        """Cap a portion to the remaining budget (cost-aware mode only)"""
+        if budget is None:
+            return portion
+        return budget.fit_portion(row, portion, self.portion_calculator.get_portion_limits(food)['min'])
     
     def _calculate_controlled_portion(self, food, remaining_nutrition, max_calories_per_item, food_type):
         """Calculate portion with calorie distribution control"""
@@ -211,85 +294,53 @@ class MenuBuilder:
         
         return self.portion_calculator.apply_portion_limits(food, base_portion)
     
-    # Keep all the existing selection methods unchanged
-    def _select_protein_food(self, protein_foods):
-        """Select protein food with variety (flexible top 50%)"""
-        protein_foods.sort(key=lambda f: (f.nutrition_per_100g.protein / max(1, f.nutrition_per_100g.fat), 
-                                        f.nutrition_per_100g.protein), reverse=True)
-        
-        variety_count = max(10, len(protein_foods) // 2)
-        top_proteins = protein_foods[:min(variety_count, len(protein_foods))]
-        return random.choice(top_proteins)
+    def _select_protein_food(self, protein_rows, rng=None):
+        """Select protein row with variety (flexible top 50% of the pre-sorted ranking)"""
+        return choose_from_ranking(protein_rows, rng=rng)
     
-    def _select_carb_food(self, carb_foods):
-        """Select carb food with variety (flexible top 50%)"""
-        carb_foods.sort(key=lambda f: (f.nutrition_per_100g.carbs / max(1, f.nutrition_per_100g.fat),
-                                     f.nutrition_per_100g.carbs), reverse=True)
-        
-        variety_count = max(10, len(carb_foods) // 2)
-        top_carbs = carb_foods[:min(variety_count, len(carb_foods))]
-        return random.choice(top_carbs)
+    def _select_carb_food(self, carb_rows, rng=None):
+        """Select carb row with variety (flexible top 50% of the pre-sorted ranking)"""
+        return choose_from_ranking(carb_rows, rng=rng)
     
-    def _select_balanced_food(self, foods, remaining_nutrition, current_menu):
-        """Select food based on macro needs with high variety"""
-        if not foods:
+    def _select_balanced_food(self, catalog, rows, remaining_nutrition, current_menu, budget=None, rng=None):
+        """Select food row based on macro needs with high variety"""
+        if rows.size == 0:
             return None
         
-        scored_foods = []
-        for food in foods:
-            score = self._calculate_food_macro_score(food, remaining_nutrition, current_menu)
-            scored_foods.append((food, score))
-        
-        # Sort and select with high variety
-        scored_foods.sort(key=lambda x: x[1], reverse=True)
-        variety_count = max(15, len(scored_foods) // 2)
-        top_candidates = scored_foods[:min(variety_count, len(scored_foods))]
+        scores = self._calculate_food_macro_scores(catalog, rows, remaining_nutrition, current_menu)
+        if budget is not None:
+            scores = scores - budget.objective.selection_penalty(rows)
         
-        if len(top_candidates) <= 5:
-            return random.choice([candidate[0] for candidate in top_candidates])
-        else:
-            # Mild preference for better foods but high randomness
-            weights = [0.2 if i < 5 else 0.1 for i in range(len(top_candidates))]
-            return random.choices([candidate[0] for candidate in top_candidates], weights=weights)[0]
+        # Top-k partition plus alias sampling, mild preference for the best 5 foods
+        return choose_weighted_top(rows, scores, rng=rng)
     
-    def _calculate_food_macro_score(self, food, remaining_nutrition, current_menu):
-        """Score food based on how well it fits remaining macro needs"""
+    def _calculate_food_macro_scores(self, catalog, rows, remaining_nutrition, current_menu):
+        """Score candidate rows on how well they fit remaining macro needs (vectorized)"""
         remaining_cals = max(1, remaining_nutrition.calories)
         target_fat_ratio = remaining_nutrition.fat * 9 / remaining_cals
         target_protein_ratio = remaining_nutrition.protein * 4 / remaining_cals
         target_carb_ratio = remaining_nutrition.carbs * 4 / remaining_cals
         
-        food_nutrition = food.nutrition_per_100g
-        food_cals = max(1, food_nutrition.calories)
-        food_fat_ratio = food_nutrition.fat * 9 / food_cals
-        food_protein_ratio = food_nutrition.protein * 4 / food_cals
-        food_carb_ratio = food_nutrition.carbs * 4 / food_cals
+        food_fat_ratios = catalog.fat_ratios[rows]
         
         # Calculate macro matching score
-        fat_diff = abs(food_fat_ratio - target_fat_ratio)
-        protein_diff = abs(food_protein_ratio - target_protein_ratio)
-        carb_diff = abs(food_carb_ratio - target_carb_ratio)
+        fat_diff = np.abs(food_fat_ratios - target_fat_ratio)
+        protein_diff = np.abs(catalog.protein_ratios[rows] - target_protein_ratio)
+        carb_diff = np.abs(catalog.carb_ratios[rows] - target_carb_ratio)
         
         # Penalty for high-fat when fat target is low (reduced for variety)
-        if target_fat_ratio < 0.3 and food_fat_ratio > 0.5:
-            fat_diff *= 2
+        if target_fat_ratio < 0.3:
+            fat_diff = np.where(food_fat_ratios > 0.5, fat_diff * 2, fat_diff)
         
-        macro_score = fat_diff + protein_diff + carb_diff
+        macro_scores = fat_diff + protein_diff + carb_diff
         
         # Add variety bonuses
-        current_categories = set(item.food.category for item in current_menu.items)
-        diversity_bonus = -0.2 if food.category not in current_categories else 0
+        current_categories = catalog.get_category_ids({item.food.category for item in current_menu.items})
+        diversity_bonus = np.where(np.isin(catalog.category_ids[rows], current_categories), 0.0, -0.2)
         
-        health_bonus = (100 - self.food_classifier.get_food_score(food)) / 1000
+        health_bonus = (100 - catalog.health_scores[rows]) / 1000
         
-        return -(macro_score + health_bonus + diversity_bonus)  # Negative for higher is better
-    
-    def _find_food_by_code(self, foods, item_code):
-        """Find food by item code"""
-        for food in foods:
-            if food.item_code == item_code:
-                return food
-        return None
+        return -(macro_scores + health_bonus + diversity_bonus)  # Negative for higher is better
     
     def _subtract_nutrition(self, target, subtract):
         """Subtract nutrition values, ensuring no negatives"""
@@ -1,19 +1,27 @@
 # src/algorithm/menu_generator.py - Refactored main orchestrator with enhanced support
 
 import random
+import time
 from .menu_builder import MenuBuilder
 from .menu_validator import MenuValidator
 from .menu_scorer import MenuScorer
 from .food_filter_service import FoodFilterService
+from .menu_result_cache import MenuResultCache
+from .parallel_generator import ParallelMenuRunner, TopMenus, StopCondition, GeneratedMenus, run_attempts
+from .cost_objective import CostObjective
 from ..filters import NutritionalSoundnessFilter, CategoryPreferenceFilter
-from config import Config
+from ..models import FoodCatalog, DayPlan, NutritionInfo
+from ..services import MealRulesFactory
+from config import Config, get_config_fingerprint
 
 class MenuGenerator:
     """High-level orchestrator that coordinates menu generation (SRP + DIP)"""
     
-    def __init__(self, food_provider, food_classifier, portion_calculator, meal_rules_factory, config=None, use_enhanced=False, user_id=None):
+    def __init__(self, food_provider, food_classifier, portion_calculator, meal_rules_factory, config=None, use_enhanced=False, user_id=None, workers=None, portion_mode=None,
+                 price_provider=None):
         # Dependency Injection - depends on abstractions
         self.food_provider = food_provider
+        self.price_provider = price_provider  # Supplies the price matrix for cost-aware generation
         self.food_classifier = food_classifier
         self.portion_calculator = portion_calculator
         self.meal_rules_factory = meal_rules_factory
@@ -23,6 +31,25 @@ class MenuGenerator:
         if config is None:
             config = Config()
         self.config = config
+        self.workers = workers if workers is not None else getattr(config, 'GENERATION_WORKERS', 1)
+        self.portion_mode = portion_mode or getattr(config, 'PORTION_MODE', 'heuristic')
+        
+        # Cache of recent results for near-identical targets
+        self.result_cache = None
+        if getattr(config, 'MENU_CACHE_ENABLED', False):
+            self.result_cache = MenuResultCache(
+                config.MENU_CACHE_MAX_ENTRIES,
+                config.MENU_CACHE_TTL_SECONDS,
+                config.MENU_CACHE_BUCKETS
+            )
+        self._config_fingerprint = get_config_fingerprint(config)
+        
+        # Catalog built locally when the provider does not supply one
+        self._local_catalog = None
+        self._local_catalog_source = None
+        
+        # Pool prices for cost-aware generation, per (catalog, meal type, supermarket, price matrix)
+        self._cost_objectives = {}
         
         # Compose specialized services (Composition over inheritance)
         self._initialize_services()
@@ -37,14 +64,17 @@ class MenuGenerator:
         self.filter_service = FoodFilterService(
             nutritional_filter, 
             preference_filter, 
-            self.meal_rules_factory
+            self.meal_rules_factory,
+            self.food_classifier,
+            self.config
         )
         
-        print("📊 Using Standard Menu Builder")
+        print(f"📊 Using Standard Menu Builder ({self.portion_mode} portions)")
         self.menu_builder = MenuBuilder(
             self.food_classifier, 
             self.portion_calculator, 
-            self.config
+            self.config,
+            self.portion_mode
             )
         
         self.menu_validator = MenuValidator(
@@ -56,15 +86,59 @@ class MenuGenerator:
             self.food_classifier, 
             self.config
         )
+        
+        # Process pool for splitting attempts across cores (when processes can be started)
+        self.parallel_runner = None
+        if self.workers and self.workers > 1:
+            if ParallelMenuRunner.is_available():
+                print(f"⚡ Using parallel generation with {self.workers} workers")
+                self.parallel_runner = ParallelMenuRunner(
+                    self.workers,
+                    self.food_classifier,
+                    self.portion_calculator,
+                    self.config,
+                    self.portion_mode
+                )
+            else:
+                print("⚠️ Worker processes not available, generating on the calling thread")
     
-    def generate_menu(self, target_nutrition, meal_type=None, num_items=None, attempts=None, meal_context=None):
-        """Generate multiple balanced menus (Main orchestration method)"""
+    def generate_menu(self, target_nutrition, meal_type=None, num_items=None, attempts=None, meal_context=None, seed=None,
+                      deadline_ms=None, quality_threshold=None, cost_weight=None, budget=None, supermarket=None, deadline=None):
+        """Generate multiple balanced menus (Main orchestration method)
+        
+        deadline_ms bounds generation latency and quality_threshold stops once the top 5
+        menus all score at or below it; either way the best menus so far are returned.
+        deadline is an absolute time.time() alternative to deadline_ms, for callers whose
+        latency budget started before this call (e.g. while a request was queued).
+        
+        Setting cost_weight or budget switches to cost-aware mode: menu cost (at one
+        supermarket, or cheapest anywhere) is added to the score with that weight, and
+        budget caps the cost of every returned menu. Raises ValueError without price data.
+        """
+        stop_condition = None
+        if deadline is not None:
+            stop_condition = StopCondition(deadline, quality_threshold)
+        elif deadline_ms is not None or quality_threshold is not None:
+            stop_condition = StopCondition.from_budget(deadline_ms, quality_threshold, time.time())
+        cost_aware = cost_weight is not None or budget is not None
+        
+        # Serve near-identical targets from the result cache (not for seeded or cost-aware runs)
+        cache_key = None
+        if self.result_cache and not self.use_enhanced and seed is None and not cost_aware:
+            catalog = self._get_food_catalog()
+            version = (getattr(catalog, 'version', None), self._config_fingerprint)
+            cache_key = self.result_cache.make_key(target_nutrition, meal_type, num_items, version)
+            # Keys are rounded, so only menus complete for this exact target are served
+            cached_menus = self.result_cache.get(
+                cache_key, lambda menu_score: self.menu_validator.is_menu_complete(menu_score[0], target_nutrition)[0])
+            if cached_menus:
+                return self._serve_cached_menus(cached_menus, target_nutrition)
         
         # Use config defaults if not specified
         if num_items is None:
-            num_items = random.randint(self.config.DEFAULT_MIN_ITEMS, self.config.DEFAULT_MAX_ITEMS)
+            num_items = (random.Random(seed) if seed is not None else random).randint(self.config.DEFAULT_MIN_ITEMS, self.config.DEFAULT_MAX_ITEMS)
         if attempts is None:
-            attempts = self.config.DEFAULT_ATTEMPTS
+            attempts = self._get_default_attempts()
         
         print(f"Generating {meal_type or 'general'} menu...")
         print(f"Target: {target_nutrition.calories}cal, {target_nutrition.protein}g protein, {target_nutrition.carbs}g carbs, {target_nutrition.fat}g fat")
@@ -77,27 +151,199 @@ class MenuGenerator:
         
         print(f"Starting generation with {len(suitable_foods)} suitable foods...")
         
+        cost_objective = None
+        if cost_aware:
+            cost_objective = self._get_cost_objective(suitable_foods, meal_type, supermarket)
+            cost_objective = cost_objective.configure(target_nutrition, cost_weight, budget)
+            where = supermarket or 'cheapest supermarket'
+            print(f"💰 Cost-aware mode ({where}): weight {cost_objective.weight}, budget {budget if budget else 'none'}, "
+                  f"{int(cost_objective.priced.sum())} priced foods")
+        
         # Generate menus using the appropriate builder
         if self.use_enhanced:
             best_menus = self._generate_enhanced_menus(suitable_foods, target_nutrition, meal_type, num_items, meal_context)
         else:
-            best_menus = self._generate_multiple_menus(suitable_foods, target_nutrition, meal_type, num_items, attempts)
+            # Keep extra menus when caching so later hits can vary
+            keep = self.config.MENU_CACHE_MENUS_PER_KEY if cache_key else 5
+            best_menus = self._generate_multiple_menus(suitable_foods, target_nutrition, meal_type, num_items, attempts, seed, stop_condition, keep,
+                                                       cost_objective)
+        
+        if best_menus and cost_objective:
+            best_menus.cost_objective = cost_objective
         
         if best_menus:
+            if getattr(best_menus, 'ended_early', False):
+                print(f"⏱️ Stopped early ({best_menus.stop_reason}) after {best_menus.attempts_used} attempts")
+            
+            if cache_key:
+                # Deadline-cut searches are not representative, so they are not cached
+                if best_menus.stop_reason != 'deadline':
+                    self.result_cache.put(cache_key, best_menus)
+                best_menus = GeneratedMenus(best_menus[:5], best_menus.attempts_used, best_menus.stop_reason)
+            
             print(f"✅ Found {len(best_menus)} good menus")
             return best_menus
         else:
             print("❌ Failed to generate any valid menu")
             return None
     
-    def _get_suitable_foods(self, meal_type):
-        """Get filtered foods using filter service"""
-        all_foods = self.food_provider.get_all_foods()
-        if not all_foods:
+    def _serve_cached_menus(self, cached_menus, target_nutrition):
+        """Return a random sample of cached menus, re-scored against the exact target"""
+        sampled = self.result_cache.sample(cached_menus, 5)
+        rescored = sorted(((menu, self.menu_scorer.score_menu(menu, target_nutrition)) for menu, _ in sampled),
+                          key=lambda menu_score: menu_score[1])
+        print(f"♻️ Served {len(rescored)} cached menus")
+        return GeneratedMenus(rescored, 0, None, cached=True)
+    
+    def generate_menu_batch(self, targets, attempts=None, seed=None):
+        """Generate menus for many targets, yielding (index, menus) as each target finishes
+        
+        targets is a list of (target_nutrition, meal_type, num_items). Every pool is filtered
+        from one catalog snapshot taken at the start, so a catalog refresh mid-batch cannot
+        mix versions; pools are shared per meal type and targets run concurrently on the
+        worker pool when enabled. A missing num_items is drawn from the seed when given.
+        menus is None for targets without a valid menu.
+        """
+        if attempts is None:
+            attempts = self._get_default_attempts()
+        
+        print(f"Generating menus for a batch of {len(targets)} targets...")
+        
+        catalog = self._get_food_catalog()
+        rng = random.Random(seed)
+        
+        jobs = []
+        for index, (target_nutrition, meal_type, num_items) in enumerate(targets):
+            suitable_foods = self._get_suitable_foods(meal_type, catalog)
+            if not suitable_foods:
+                print(f"❌ No suitable foods found for meal type: {meal_type}")
+                yield index, None
+                continue
+            if num_items is None:
+                num_items = rng.randint(self.config.DEFAULT_MIN_ITEMS, self.config.DEFAULT_MAX_ITEMS)
+            jobs.append((index, suitable_foods, target_nutrition, meal_type, num_items))
+        
+        if self.parallel_runner and jobs:
+            batch = [(index, pool.source_rows, target_nutrition, meal_type, num_items)
+                     for index, pool, target_nutrition, meal_type, num_items in jobs]
+            finished = set()
+            try:
+                for index, menus in self.parallel_runner.run_batch(catalog, batch, attempts, seed):
+                    finished.add(index)
+                    yield index, menus if menus else None
+                return
+            except Exception as e:
+                print(f"⚠️ Parallel generation failed, falling back to sequential: {e}")
+                jobs = [job for job in jobs if job[0] not in finished]
+        
+        for index, suitable_foods, target_nutrition, meal_type, num_items in jobs:
+            menus = run_attempts(
+                self.menu_builder, self.menu_validator, self.menu_scorer,
+                suitable_foods, target_nutrition, meal_type, num_items, attempts,
+                rng=random.Random(seed + index) if seed is not None else None
+            )
+            yield index, menus if menus else None
+    
+    def generate_day_plan(self, daily_target, meal_types=None, num_items=None, attempts=None, seed=None):
+        """Generate a full day of meals from one daily target
+        
+        The target is split by each meal's daily share and meals are built one after
+        another from one catalog snapshot, each from candidates without the foods of the
+        earlier meals, so no food repeats across meals. A meal's attempts run concurrently
+        on the worker pool when enabled. A meal without a valid menu is left out.
+        """
+        split = MealRulesFactory.get_daily_split(meal_types, self.config)
+        num_items = num_items or {}
+        
+        meal_targets = {
+            meal_type: NutritionInfo(daily_target.calories * share, daily_target.protein * share,
+                                     daily_target.carbs * share, daily_target.fat * share)
+            for meal_type, share in split.items()
+        }
+        if attempts is None:
+            attempts = self._get_default_attempts()
+        
+        print(f"Generating day plan: {', '.join(f'{m} {s:.0%}' for m, s in split.items())}")
+        
+        catalog = self._get_food_catalog()
+        rng = random.Random(seed)
+        
+        # Shared exclusion set: each meal's candidates leave out every earlier meal's foods
+        day_plan = DayPlan(daily_target)
+        excluded_codes = set()
+        for index, (meal_type, meal_target) in enumerate(meal_targets.items()):
+            suitable_foods = self._get_suitable_foods(meal_type, catalog, excluded_codes)
+            if not suitable_foods:
+                print(f"❌ No suitable foods left for {meal_type}")
+                continue
+            
+            meal_items = num_items.get(meal_type) or rng.randint(self.config.DEFAULT_MIN_ITEMS, self.config.DEFAULT_MAX_ITEMS)
+            menus = self._generate_multiple_menus(suitable_foods, meal_target, meal_type, meal_items, attempts,
+                                                  seed + index if seed is not None else None)
+            
+            # Required items are added by code, so a repeat can still slip in; such menus fail
+            menus = [(menu, score) for menu, score in menus or []
+                     if not any(item.food.item_code in excluded_codes for item in menu.items)]
+            if not menus:
+                print(f"❌ No valid menu for {meal_type}")
+                continue
+            
+            menu, score = menus[0]
+            excluded_codes.update(item.food.item_code for item in menu.items)
+            day_plan.add_meal(meal_type, menu, score, split[meal_type], meal_target)
+        
+        if not day_plan.meals:
+            print("❌ Failed to generate any meal for the day plan")
+            return None
+        
+        print(f"✅ Day plan with {len(day_plan)} meals and no repeated items")
+        return day_plan
+    
+    def _get_default_attempts(self):
+        """Get the configured attempt count for the active portion mode"""
+        if self.menu_builder.portion_optimizer:
+            return getattr(self.config, 'SOLVER_ATTEMPTS', self.config.DEFAULT_ATTEMPTS)
+        return self.config.DEFAULT_ATTEMPTS
+    
+    def _get_cost_objective(self, pool, meal_type, supermarket=None):
+        """Get pool prices for cost-aware generation, pricing each pool once per price matrix"""
+        price_matrix = getattr(self.price_provider, 'price_matrix', None)
+        if price_matrix is None:
+            raise ValueError("Cost-aware generation needs price data, which is not loaded")
+        
+        key = (pool.version, meal_type, supermarket, price_matrix.version)
+        cached = self._cost_objectives.get(key)
+        if cached is not None and cached[0] is pool:
+            return cached[1]
+        
+        objective = CostObjective.for_pool(pool, price_matrix, self.portion_calculator, supermarket)
+        if len(self._cost_objectives) >= 16:
+            self._cost_objectives.clear()
+        self._cost_objectives[key] = (pool, objective)
+        return objective
+    
+    def _get_suitable_foods(self, meal_type, catalog=None, excluded_codes=None):
+        """Get filtered foods as a columnar catalog using filter service (from the given snapshot if any)"""
+        if catalog is None:
+            catalog = self._get_food_catalog()
+        if not catalog:
             print("❌ No foods available from provider")
             return []
         
-        return self.filter_service.get_suitable_foods(all_foods, meal_type)
+        pool = self.filter_service.get_candidate_pool(catalog, meal_type)
+        return self.filter_service.exclude_foods(pool, excluded_codes)
+    
+    def _get_food_catalog(self):
+        """Get the columnar food catalog, preferring the provider's prebuilt one"""
+        if hasattr(self.food_provider, 'get_food_catalog'):
+            return self.food_provider.get_food_catalog()
+        
+        all_foods = self.food_provider.get_all_foods()
+        if self._local_catalog is None or self._local_catalog_source is not all_foods:
+            version = self._local_catalog.version + 1 if self._local_catalog else 1
+            self._local_catalog = FoodCatalog(all_foods or [], self.food_classifier, version=version)
+            self._local_catalog_source = all_foods
+        return self._local_catalog
     
     def _generate_enhanced_menus(self, suitable_foods, target_nutrition, meal_type, num_items, meal_context):
         """Generate menus using enhanced builder"""
@@ -141,14 +387,42 @@ class MenuGenerator:
         
         return None
     
-    def _generate_multiple_menus(self, suitable_foods, target_nutrition, meal_type, num_items, attempts):
+    def _generate_multiple_menus(self, suitable_foods, target_nutrition, meal_type, num_items, attempts, seed=None, stop_condition=None, keep=5,
+                                 cost_objective=None):
         """Generate multiple menu attempts using standard builder"""
-        best_menus = []  # Store top 5 menus
+        if self.parallel_runner and suitable_foods.source is not None:
+            try:
+                best_menus = self.parallel_runner.run(
+                    suitable_foods.source, suitable_foods.source_rows,
+                    target_nutrition, meal_type, num_items, attempts, seed,
+                    keep=keep, stop_condition=stop_condition, cost_objective=cost_objective
+                )
+                return best_menus if best_menus else None
+            except Exception as e:
+                print(f"⚠️ Parallel generation failed, falling back to sequential: {e}")
+        
+        # A per-call generator, so concurrent seeded requests cannot reseed each other
+        rng = random.Random(seed) if seed is not None else None
+        
+        best_menus = TopMenus(keep)  # Store top menus (5 unless caching extra)
+        stop_reason = None
+        attempts_used = 0
         
         # Try multiple attempts
         for attempt in range(attempts):
+            # Stop early once the deadline passes or the menus are good enough
+            if stop_condition:
+                stop_reason = stop_condition.check(best_menus)
+                if stop_reason:
+                    break
+            attempts_used += 1
+            
             # Build menu using menu builder
-            menu = self.menu_builder.build_menu(suitable_foods, target_nutrition, meal_type, num_items)
+            menu = self.menu_builder.build_menu(suitable_foods, target_nutrition, meal_type, num_items, cost_objective, rng)
+            
+            # In cost-aware mode, menus must be fully priced and within budget
+            if menu and cost_objective and not cost_objective.accepts(menu):
+                continue
             
             if menu:
                 # Validate menu using validator
@@ -156,20 +430,20 @@ class MenuGenerator:
                 
                 if is_valid:
                     # Score menu using scorer
-                    score = self.menu_scorer.score_menu(menu, target_nutrition)
-                    
-                    # Add to best menus list
-                    best_menus.append((menu, score))
+                    score = self.menu_scorer.score_menu(menu, target_nutrition, cost_objective)
                     
-                    # Keep only top 5, sorted by score (lower is better)
-                    best_menus.sort(key=lambda x: x[1])
-                    if len(best_menus) > 5:
-                        best_menus = best_menus[:5]
-                    
-                    if len(best_menus) <= 5:
+                    # Keep only the top menus (lower score is better)
+                    if best_menus.add(menu, score):
                         print(f"✨ Menu #{len(best_menus)} found (attempt {attempt + 1}, score: {score:.3f})")
         
-        return best_menus if best_menus else None
+        if not best_menus:
+            return None
+        return GeneratedMenus(best_menus.results(), attempts_used, stop_reason)
+    
+    def shutdown(self):
+        """Release worker processes used for parallel generation"""
+        if self.parallel_runner:
+            self.parallel_runner.shutdown()
     
     def record_user_feedback(self, menu, rating, meal_type=None):
         """Record user feedback (only works with enhanced builder)"""
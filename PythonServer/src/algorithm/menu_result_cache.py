@@ -0,0 +1,101 @@
+# src/algorithm/menu_result_cache.py - Result cache for generated menus
+
+import random
+import threading
+import time
+from collections import OrderedDict
+
+class MenuResultCache:
+    """Responsible ONLY for caching generated menus for similar targets (LRU + TTL)"""
+
+    MACROS = ('calories', 'protein', 'carbs', 'fat')
+
+    def __init__(self, max_entries=1024, ttl_seconds=600, buckets=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.buckets = buckets or {}
+
+        self._entries = OrderedDict()  # key -> (expires_at, menus), oldest first
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0  # Entries found but with no menu accepted for the exact target
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, target_nutrition, meal_type, num_items, version):
+        """Build a cache key from the quantized target and everything else that shapes results"""
+        quantized = tuple(
+            round(getattr(target_nutrition, macro) / max(self.buckets.get(macro, 1), 1e-9))
+            for macro in self.MACROS
+        )
+        return quantized + (meal_type, num_items, version)
+
+    def get(self, key, accept=None):
+        """Get cached (menu, score) pairs for a key, or None
+
+        accept, if given, filters the pairs (keys are rounded, so not every cached menu
+        suits the exact target); an entry with none accepted is counted as rejected and
+        only lookups that return menus count as hits.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, menus = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+
+        if accept is not None:
+            menus = [menu_score for menu_score in menus if accept(menu_score)]
+
+        with self._lock:
+            if not menus:
+                self.rejected += 1
+                return None
+            self.hits += 1
+            return menus
+
+    def put(self, key, menus):
+        """Store (menu, score) pairs for a key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, list(menus))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def sample(menus, count):
+        """Pick a random subset of cached menus so repeat requests still see variety"""
+        return random.sample(menus, min(count, len(menus)))
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.rejected
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'buckets': dict(self.buckets),
+                'hits': self.hits,
+                'misses': self.misses,
+                'rejected': self.rejected,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
\ No newline at end of file
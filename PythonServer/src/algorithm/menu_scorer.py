@@ -7,12 +7,14 @@ class MenuScorer:
         self.food_classifier = food_classifier
         self.config = config
     
-    def score_menu(self, menu, target_nutrition):
-        """Calculate overall menu score (lower = better)"""
+    def score_menu(self, menu, target_nutrition, cost_objective=None):
+        """Calculate overall menu score (lower = better), plus a weighted cost term in cost-aware mode"""
         if not menu or len(menu.items) == 0:
             return float('inf')
         
         macro_score = self._calculate_macro_accuracy_score(menu, target_nutrition)
+        if cost_objective:
+            macro_score += cost_objective.score(menu)
         return macro_score
     
     def _calculate_macro_accuracy_score(self, menu, target_nutrition):
@@ -26,7 +28,11 @@ class MenuScorer:
         fat_diff = abs(total_nutrition.fat - target_nutrition.fat) / target_nutrition.fat
         
         # Give extra weight to fat accuracy since it was problematic
-        accuracy_score = cal_diff + protein_diff + carb_diff + (fat_diff * 1.5)
+        weights = getattr(self.config, 'MACRO_SCORE_WEIGHTS', {})
+        accuracy_score = (cal_diff * weights.get('calories', 1.0) +
+                          protein_diff * weights.get('protein', 1.0) +
+                          carb_diff * weights.get('carbs', 1.0) +
+                          fat_diff * weights.get('fat', 1.5))
         
         return accuracy_score
     
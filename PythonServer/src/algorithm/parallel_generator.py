@@ -0,0 +1,405 @@
+# src/algorithm/parallel_generator.py - Multi-core menu attempt execution
+
+import copy
+import heapq
+import itertools
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+
+class TopMenus:
+    """Keeps the best N (menu, score) pairs in a bounded heap (lower score = better)"""
+
+    def __init__(self, size=5):
+        self.size = size
+        self._heap = []  # Max-heap on score via negation
+        self._counter = itertools.count()
+
+    def add(self, menu, score):
+        """Offer a menu, returns True if it was kept"""
+        entry = (-score, next(self._counter), menu)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+            return True
+        if score < -self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def worst_score(self):
+        """Get the score of the worst kept menu"""
+        return -self._heap[0][0] if self._heap else float('inf')
+
+    def nth_best_score(self, n):
+        """Get the score of the n-th best kept menu, or inf with fewer than n kept"""
+        if len(self._heap) < n:
+            return float('inf')
+        if len(self._heap) == n:
+            return self.worst_score()
+        return -heapq.nlargest(n, self._heap)[-1][0]
+
+    def results(self):
+        """Get kept menus sorted by score"""
+        return [(menu, -neg_score) for neg_score, _, menu in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+class StopCondition:
+    """Decides when an anytime generation run can stop early
+
+    The quality stop looks at the num_menus best menus (the ones returned), however
+    many extra menus the run keeps (e.g. for the result cache).
+    """
+
+    def __init__(self, deadline=None, quality_threshold=None, num_menus=5):
+        self.deadline = deadline  # Absolute time.time() value, valid across processes
+        self.quality_threshold = quality_threshold
+        self.num_menus = num_menus
+
+    @classmethod
+    def from_budget(cls, deadline_ms=None, quality_threshold=None, start_time=None, num_menus=5):
+        """Create a condition from a relative latency budget"""
+        deadline = None
+        if deadline_ms is not None:
+            deadline = (start_time or time.time()) + deadline_ms / 1000.0
+        return cls(deadline, quality_threshold, num_menus)
+
+    def check(self, top_menus):
+        """Get the reason to stop ('deadline' or 'quality'), or None to continue"""
+        if self.deadline is not None and time.time() >= self.deadline:
+            return 'deadline'
+        if self.quality_threshold is not None and top_menus.nth_best_score(self.num_menus) <= self.quality_threshold:
+            return 'quality'
+        return None
+
+class GeneratedMenus(list):
+    """List of (menu, score) pairs that also reports how generation ended"""
+
+    def __init__(self, menus=(), attempts_used=0, stop_reason=None, cached=False):
+        super().__init__(menus)
+        self.attempts_used = attempts_used
+        self.stop_reason = stop_reason
+        self.cached = cached
+        self.cost_objective = None  # Set in cost-aware mode so menus can report their cost
+
+    @property
+    def ended_early(self):
+        return self.stop_reason is not None
+
+def run_attempts(menu_builder, menu_validator, menu_scorer, foods, target_nutrition, meal_type, num_items, attempts, keep=5, stop_condition=None,
+                 cost_objective=None, rng=None):
+    """Run build/validate/score cycles and keep the best menus (within budget in cost-aware mode)
+
+    rng is a random.Random for reproducible runs; the module-level generator by default.
+    """
+    top_menus = TopMenus(keep)
+    stop_reason = None
+    attempts_used = 0
+
+    for attempt in range(attempts):
+        if stop_condition:
+            stop_reason = stop_condition.check(top_menus)
+            if stop_reason:
+                break
+
+        attempts_used += 1
+        menu = menu_builder.build_menu(foods, target_nutrition, meal_type, num_items, cost_objective, rng)
+        if not menu:
+            continue
+        if cost_objective and not cost_objective.accepts(menu):
+            continue
+
+        is_valid, _ = menu_validator.is_menu_complete(menu, target_nutrition)
+        if is_valid:
+            top_menus.add(menu, menu_scorer.score_menu(menu, target_nutrition, cost_objective))
+
+    return GeneratedMenus(top_menus.results(), attempts_used, stop_reason)
+
+class SharedCatalog:
+    """Catalog whose NumPy columns live in shared memory, for handing to worker processes
+
+    Pickling sends only the column block names and a shell with the rest of the catalog
+    (the Food objects and lookups); workers map the columns instead of copying them.
+    The creating process owns the blocks and must close() them once no worker uses them.
+    """
+
+    def __init__(self, catalog):
+        self._blocks = []
+        self.specs = {}
+        for column in catalog._COLUMNS:
+            values = getattr(catalog, column)
+            block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+            np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+            self._blocks.append(block)
+            self.specs[column] = (block.name, values.shape, values.dtype.str)
+
+        self.shell = copy.copy(catalog)
+        self.shell.rankings = {}
+        for column in catalog._COLUMNS:
+            setattr(self.shell, column, None)
+
+    def __getstate__(self):
+        return {'specs': self.specs, 'shell': self.shell}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._blocks = []
+
+    def attach(self):
+        """Get the catalog with read-only columns mapped from shared memory (in a worker)"""
+        catalog = self.shell
+        for column, (name, shape, dtype) in self.specs.items():
+            block = shared_memory.SharedMemory(name=name)
+            self._blocks.append(block)  # Keeps the mapping alive as long as the catalog
+            values = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            values.flags.writeable = False
+            setattr(catalog, column, values)
+        return catalog
+
+    def close(self):
+        """Release the blocks (in the creating process, once its workers are gone)"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+# Per-process state, populated once by the pool initializer
+_worker_state = {}
+
+def _init_worker(shared_catalog, food_classifier, portion_calculator, config, portion_mode):
+    """Set up the read-only catalog and algorithm services in a worker process"""
+    from .menu_builder import MenuBuilder
+    from .menu_validator import MenuValidator
+    from .menu_scorer import MenuScorer
+    from ..filters import CategoryPreferenceFilter
+
+    root = shared_catalog.attach()
+    _worker_state['root'] = root
+    _worker_state['catalogs'] = {root.version: root}
+    _worker_state['shared_catalog'] = shared_catalog
+    _worker_state['food_classifier'] = food_classifier
+    _worker_state['builder'] = MenuBuilder(food_classifier, portion_calculator, config, portion_mode)
+    _worker_state['validator'] = MenuValidator(config, CategoryPreferenceFilter(config))
+    _worker_state['scorer'] = MenuScorer(food_classifier, config)
+    _worker_state['pools'] = {}
+
+def _get_worker_catalog(lineage):
+    """Get the catalog for a lineage of delta patches, replaying the ones this worker lacks"""
+    catalogs = _worker_state['catalogs']
+    version = lineage[-1][0] if lineage else _worker_state['root'].version
+    catalog = catalogs.get(version)
+    if catalog is not None:
+        return catalog
+
+    # Start from the newest catalog already built along this lineage
+    catalog, start = _worker_state['root'], 0
+    for i, (patch_version, _, _) in enumerate(lineage):
+        if patch_version in catalogs:
+            catalog, start = catalogs[patch_version], i + 1
+    for patch_version, upserts, removed_codes in lineage[start:]:
+        catalog = catalog.patch(upserts, removed_codes, _worker_state['food_classifier'], patch_version)
+
+    # Calls in flight span at most a couple of versions
+    if len(catalogs) >= 4:
+        root = _worker_state['root']
+        catalogs.clear()
+        catalogs[root.version] = root
+    catalogs[version] = catalog
+    return catalog
+
+def _get_worker_pool(lineage, rows):
+    """Get the filtered pool for these catalog rows, reusing it across calls"""
+    catalog = _get_worker_catalog(lineage)
+    pool_key = (catalog.version, rows.tobytes())
+    pools = _worker_state['pools']
+    if pool_key not in pools:
+        # One pool per meal type is typical, so keep only a handful
+        if len(pools) >= 8:
+            pools.clear()
+        pools[pool_key] = catalog.take(rows)
+    return pools[pool_key]
+
+def _warm_up_worker():
+    """No-op task that makes the pool start a worker (and run its initializer) ahead of use"""
+    return None
+
+def _run_worker_attempts(lineage, rows, target_nutrition, meal_type, num_items, attempts, seed, stop_condition, keep=5, cost_objective=None):
+    """Worker entry point: run a share of the attempts with its own RNG seed"""
+    menus = run_attempts(
+        _worker_state['builder'], _worker_state['validator'], _worker_state['scorer'],
+        _get_worker_pool(lineage, rows), target_nutrition, meal_type, num_items, attempts,
+        keep=keep, stop_condition=stop_condition, cost_objective=cost_objective, rng=random.Random(seed)
+    )
+    return list(menus), menus.attempts_used, menus.stop_reason
+
+class _WorkerPool:
+    """A process pool bound to one root catalog (and its delta patches), with a count of calls using it"""
+
+    def __init__(self, executor, catalog, shared_catalog):
+        self.executor = executor
+        self.catalog = catalog
+        self.shared_catalog = shared_catalog
+        self.in_flight = 0
+        self.retired = False
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.shared_catalog.close()
+
+class ParallelMenuRunner:
+    """Responsible ONLY for splitting menu attempts across a process pool
+
+    Workers are started with forkserver (or spawn), never by forking this threaded
+    process, and map the catalog columns from shared memory. A catalog patched by delta
+    refreshes keeps its pool: each call sends the (small) patches since the root catalog
+    and workers replay the ones they lack. Only a new root catalog (a full reload)
+    starts a new pool; the old one is retired once no call is using it.
+    """
+
+    def __init__(self, workers, food_classifier, portion_calculator, config, portion_mode=None):
+        self.workers = workers
+        self.food_classifier = food_classifier
+        self.portion_calculator = portion_calculator
+        self.config = config
+        self.portion_mode = portion_mode
+
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_available():
+        """Check if worker processes can be started here (some platforms lack process locks)"""
+        try:
+            methods = multiprocessing.get_all_start_methods()
+            multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn').Lock()
+            return True
+        except (ImportError, OSError):
+            return False
+
+    def _acquire_pool(self, catalog):
+        """Get a pool whose workers hold this catalog's root and count a call on it (pair with _release_pool)"""
+        if catalog.root is not None:
+            catalog = catalog.root
+        retired = None
+        with self._lock:
+            if self._pool is None or self._pool.catalog is not catalog:
+                if self._pool is not None:
+                    self._pool.retired = True
+                    if self._pool.in_flight == 0:
+                        retired = self._pool
+                self._pool = self._start_pool(catalog)
+            pool = self._pool
+            pool.in_flight += 1
+
+        if retired is not None:
+            retired.close()
+        return pool
+
+    def _release_pool(self, pool):
+        """End a call on a pool, closing it if it was retired and this was its last call"""
+        with self._lock:
+            pool.in_flight -= 1
+            closing = pool.retired and pool.in_flight == 0
+        if closing:
+            pool.close()
+
+    def _start_pool(self, catalog):
+        """Start worker processes for a catalog (called with the lock held)"""
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        shared_catalog = SharedCatalog(catalog)
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(shared_catalog, self.food_classifier, self.portion_calculator, self.config, self.portion_mode)
+        )
+        # Workers start on demand; warm them up now so the first calls do not pay for it
+        for _ in range(self.workers):
+            executor.submit(_warm_up_worker)
+        print(f"⚙️ Started {self.workers} menu generation workers (catalog v{catalog.version})")
+        return _WorkerPool(executor, catalog, shared_catalog)
+
+    def run(self, catalog, rows, target_nutrition, meal_type, num_items, attempts, seed=None, keep=5, stop_condition=None, cost_objective=None):
+        """Run attempts on the pool and merge each worker's best menus
+
+        A cost objective is pickled to each worker with its chunk; it is priced for the
+        pool these rows select, which the workers rebuild identically.
+        """
+        pool = self._acquire_pool(catalog)
+        try:
+            return self._run_chunks(pool.executor, catalog.lineage, rows, target_nutrition, meal_type, num_items, attempts, seed, keep, stop_condition,
+                                    cost_objective)
+        finally:
+            self._release_pool(pool)
+
+    def _run_chunks(self, executor, lineage, rows, target_nutrition, meal_type, num_items, attempts, seed, keep, stop_condition, cost_objective):
+        """Split attempts into one chunk per worker and merge the results"""
+        # One chunk per worker, each with a reproducible seed
+        chunk_count = max(1, min(self.workers, attempts))
+        base_seed = seed if seed is not None else random.randrange(2 ** 32)
+        chunk_sizes = [attempts // chunk_count + (1 if i < attempts % chunk_count else 0) for i in range(chunk_count)]
+
+        # Workers check the shared deadline themselves; a worker only stops on quality
+        # once its own top menus pass the threshold, so the merged top menus do too
+        futures = [
+            executor.submit(_run_worker_attempts, lineage, rows, target_nutrition, meal_type, num_items, size, base_seed + i, stop_condition, keep,
+                            cost_objective)
+            for i, size in enumerate(chunk_sizes)
+        ]
+
+        merged = TopMenus(keep)
+        attempts_used = 0
+        stop_reasons = set()
+        for future in futures:
+            menus, worker_attempts, worker_stop_reason = future.result()
+            attempts_used += worker_attempts
+            if worker_stop_reason:
+                stop_reasons.add(worker_stop_reason)
+            for menu, score in menus:
+                merged.add(menu, score)
+
+        stop_reason = 'deadline' if 'deadline' in stop_reasons else ('quality' if stop_reasons else None)
+        return GeneratedMenus(merged.results(), attempts_used, stop_reason)
+
+    def run_batch(self, catalog, jobs, attempts, seed=None):
+        """Run whole targets on the pool, yielding (index, menus) as each one finishes
+
+        jobs are (index, rows, target_nutrition, meal_type, num_items) tuples. The pool
+        stays in use until the generator finishes or is closed. A failed target raises
+        (e.g. a broken pool) and cancels the targets not yet started.
+        """
+        pool = self._acquire_pool(catalog)
+        futures = {}
+        try:
+            base_seed = seed if seed is not None else random.randrange(2 ** 32)
+
+            futures = {
+                pool.executor.submit(_run_worker_attempts, catalog.lineage, rows, target_nutrition, meal_type, num_items, attempts, base_seed + index,
+                                     None): index
+                for index, rows, target_nutrition, meal_type, num_items in jobs
+            }
+
+            for future in as_completed(futures):
+                menus, attempts_used, stop_reason = future.result()
+                yield futures[future], GeneratedMenus(menus, attempts_used, stop_reason)
+        finally:
+            for future in futures:
+                future.cancel()
+            self._release_pool(pool)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            if pool is not None:
+                pool.retired = True
+                closing = pool.in_flight == 0
+        if pool is not None and closing:
+            pool.close()
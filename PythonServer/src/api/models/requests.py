@@ -9,21 +9,116 @@ class NutritionRequest(BaseModel):
     meal_type: Optional[str] = Field(None)
     num_items: Optional[int] = Field(None, gt=0, le=20)
     include_prices: Optional[bool] = Field(False)
+    deadline_ms: Optional[int] = Field(None, gt=0, le=60000)
+    quality_threshold: Optional[float] = Field(None, gt=0)
+    optimize_cost: Optional[bool] = Field(False, description="Blend menu cost into the score")
+    cost_weight: Optional[float] = Field(None, ge=0, le=10, description="Cost weight, defaults to the configured one")
+    budget: Optional[float] = Field(None, gt=0, description="Maximum menu cost")
+    supermarket: Optional[str] = Field(None, description="Price menus at this supermarket instead of the cheapest one")
     
     class Config:
         populate_by_name = True
     
     @validator('meal_type')
     def validate_meal_type(cls, v):
-        if v is not None:
-            allowed_types = ['breakfast', 'lunch', 'dinner', 'snack']
-            if v.lower() not in allowed_types:
-                raise ValueError(f'meal_type must be one of: {allowed_types}')
-        return v.lower() if v else None
+        if not v:
+            return None
+        allowed_types = ['breakfast', 'lunch', 'dinner', 'snacks']
+        # Meal rules are keyed on 'snacks'; accept the singular form too
+        meal_type = 'snacks' if v.lower() == 'snack' else v.lower()
+        if meal_type not in allowed_types:
+            raise ValueError(f'meal_type must be one of: {allowed_types}')
+        return meal_type
+
+MAX_BATCH_TARGETS = 1000
+MAX_BATCH_MENUS = 100
+
+class NutritionTarget(BaseModel):
+    calories: float = Field(..., gt=0, le=5000)
+    protein: float = Field(..., ge=0, le=500)
+    carbs: float = Field(..., ge=0, le=1000)
+    fat: float = Field(..., ge=0, le=300)
+    meal_type: Optional[str] = Field(None)
+    num_items: Optional[int] = Field(None, gt=0, le=20)
+    id: Optional[str] = Field(None, description="Caller reference echoed back in the result")
+    
+    @validator('meal_type')
+    def validate_meal_type(cls, v):
+        if not v:
+            return None
+        allowed_types = ['breakfast', 'lunch', 'dinner', 'snacks']
+        # Meal rules are keyed on 'snacks'; accept the singular form too
+        meal_type = 'snacks' if v.lower() == 'snack' else v.lower()
+        if meal_type not in allowed_types:
+            raise ValueError(f'meal_type must be one of: {allowed_types}')
+        return meal_type
+
+class BatchNutritionRequest(BaseModel):
+    targets: List[NutritionTarget]
+    attempts: Optional[int] = Field(None, gt=0, le=2000)
+    seed: Optional[int] = Field(None, ge=0)
+    
+    @validator('targets')
+    def validate_targets(cls, v):
+        if not v:
+            raise ValueError('targets must not be empty')
+        if len(v) > MAX_BATCH_TARGETS:
+            raise ValueError(f'at most {MAX_BATCH_TARGETS} targets per batch')
+        return v
+
+class DayPlanRequest(BaseModel):
+    calories: float = Field(..., gt=0, le=10000)
+    protein: float = Field(..., ge=0, le=1000)
+    carbs: float = Field(..., ge=0, le=2000)
+    fat: float = Field(..., ge=0, le=600)
+    meal_types: Optional[List[str]] = Field(None, description="Defaults to breakfast, lunch, dinner and snacks")
+    num_items: Optional[Dict[str, int]] = Field(None, description="Items per meal type")
+    attempts: Optional[int] = Field(None, gt=0, le=2000)
+    seed: Optional[int] = Field(None, ge=0)
+    
+    @validator('meal_types')
+    def validate_meal_types(cls, v):
+        if v is None:
+            return v
+        allowed_types = ['breakfast', 'lunch', 'dinner', 'snacks']
+        # Accept the singular form used by the single-meal endpoint
+        meal_types = ['snacks' if t.lower() == 'snack' else t.lower() for t in v]
+        for meal_type in meal_types:
+            if meal_type not in allowed_types:
+                raise ValueError(f'meal_types must be from: {allowed_types}')
+        if not meal_types or len(set(meal_types)) != len(meal_types):
+            raise ValueError('meal_types must be non-empty and unique')
+        return meal_types
+    
+    @validator('num_items')
+    def validate_num_items(cls, v):
+        if v is None:
+            return v
+        normalized = {}
+        for meal_type, count in v.items():
+            if not 0 < count <= 20:
+                raise ValueError('num_items values must be between 1 and 20')
+            normalized['snacks' if meal_type.lower() == 'snack' else meal_type.lower()] = count
+        return normalized
 
 class PriceComparisonRequest(BaseModel):
     menu_items: List[Dict[str, Any]] = Field(..., description="List of menu items")
 
+class CheapestCombinationRequest(PriceComparisonRequest):
+    store_visit_cost: Optional[float] = Field(None, ge=0, description="Cost added per supermarket visited, defaults to the configured one")
+    max_stores: Optional[int] = Field(None, gt=0, le=20, description="Most supermarkets to shop at")
+
+class BatchPriceComparisonRequest(BaseModel):
+    menus: List[List[Dict[str, Any]]] = Field(..., description="Menus, each a list of menu items")
+    
+    @validator('menus')
+    def validate_menus(cls, v):
+        if not v:
+            raise ValueError('menus must not be empty')
+        if len(v) > MAX_BATCH_MENUS:
+            raise ValueError(f'at most {MAX_BATCH_MENUS} menus per batch')
+        return v
+
 class UserProfileRequest(BaseModel):
     height: float = Field(..., gt=100, le=250)
     weight: float = Field(..., gt=30, le=300)
@@ -19,18 +19,42 @@ class MenuResponse(BaseModel):
     score: float
     total_nutrition: FoodNutrition
     items: List[MenuItem]
+    cost: Optional[float] = None
 
 class MenuGenerationResponse(BaseModel):
     success: bool
     menus: List[MenuResponse]
     message: Optional[str] = None
     generation_time_ms: Optional[float] = None
+    ended_early: Optional[bool] = None
+    stop_reason: Optional[str] = None
+    attempts_used: Optional[int] = None
+    cached: Optional[bool] = None
+
+class PlannedMealResponse(BaseModel):
+    meal_type: str
+    share: float
+    target_nutrition: FoodNutrition
+    menu: MenuResponse
+
+class DayPlanResponse(BaseModel):
+    success: bool
+    meals: List[PlannedMealResponse]
+    total_nutrition: FoodNutrition
+    repeated_items: int = 0
+    message: Optional[str] = None
+    generation_time_ms: Optional[float] = None
 
 class PriceComparisonResponse(BaseModel):
     success: bool
     price_comparison: Dict[str, Any]
     message: Optional[str] = None
 
+class BatchPriceComparisonResponse(BaseModel):
+    success: bool
+    price_comparisons: List[Dict[str, Any]]
+    message: Optional[str] = None
+
 class ErrorResponse(BaseModel):
     success: bool = False
     error: str
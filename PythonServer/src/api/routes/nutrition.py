@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import List
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+import json
 import logging
+import time
 
-from src.api.models.requests import NutritionRequest, UserProfileRequest
+from src.api.models.requests import NutritionRequest, UserProfileRequest, BatchNutritionRequest, DayPlanRequest
 from src.api.models.responses import MenuGenerationResponse
 from src.api.services.app_service import app_service
-from src.api.utils.formatters import format_menu_response, extract_menu_items_for_price_comparison
+from src.api.utils.formatters import format_menu_response, format_day_plan_response, format_food, extract_menu_items_for_price_comparison
 from src.api.utils.calculations import calculate_bmr, calculate_tdee
 from src.models.nutrition import NutritionInfo
 
@@ -17,6 +21,9 @@ async def calculate_nutrition(request: NutritionRequest):
     if not app_service.menu_generator:
         raise HTTPException(status_code=503, detail="Menu generator not initialized")
     
+    # The latency budget starts now, not when a generation worker picks the request up
+    deadline = time.time() + request.deadline_ms / 1000.0 if request.deadline_ms is not None else None
+    
     try:
         start_time = datetime.now()
         
@@ -29,10 +36,28 @@ async def calculate_nutrition(request: NutritionRequest):
         
         logger.info(f"Generating menu: {target_nutrition.calories}cal")
         
-        menus = app_service.menu_generator.generate_menu(
+        # Cost-aware mode needs the in-memory price matrix
+        cost_weight = None
+        if request.optimize_cost or request.budget is not None:
+            price_comparison = app_service.price_comparison
+            if not price_comparison or price_comparison.price_matrix is None:
+                raise HTTPException(status_code=503, detail="Price data not available for cost-aware generation")
+            if request.supermarket and request.supermarket not in price_comparison.price_matrix.supermarkets:
+                raise HTTPException(status_code=400, detail=f"Unknown supermarket: {request.supermarket}")
+            if request.optimize_cost:
+                cost_weight = request.cost_weight if request.cost_weight is not None else app_service.menu_generator.config.COST_SCORE_WEIGHT
+        
+        menus = await app_service.run_generation(
+            app_service.menu_generator.generate_menu,
             target_nutrition,
             request.meal_type,
-            request.num_items
+            request.num_items,
+            deadline=deadline,
+            start_by=deadline,
+            quality_threshold=request.quality_threshold,
+            cost_weight=cost_weight,
+            budget=request.budget,
+            supermarket=request.supermarket
         )
         
         generation_time = (datetime.now() - start_time).total_seconds() * 1000
@@ -45,42 +70,39 @@ async def calculate_nutrition(request: NutritionRequest):
                 try:
                     logger.info(f"Starting price comparison for {len(response.menus)} menus")
                     
+                    # Look up prices for all menus in one batch
+                    all_price_data = await app_service.compare_menu_prices_batch(
+                        [extract_menu_items_for_price_comparison(menu_response) for menu_response in response.menus]
+                    )
+                    
                     # Add price comparison to each menu
                     enhanced_menus = []
-                    for i, menu_response in enumerate(response.menus):
-                        try:
-                            # Extract menu items for price comparison
-                            menu_items = extract_menu_items_for_price_comparison(menu_response)
-                            
-                            # Get price data for this specific menu
-                            price_data = app_service.price_comparison.compare_menu_prices(menu_items)
-                            
-                            # Create enhanced menu response with prices
-                            enhanced_menu = {
-                                "score": menu_response.score,
-                                "total_nutrition": menu_response.total_nutrition.dict(),
-                                "items": [item.dict() for item in menu_response.items],
-                                "price_comparison": price_data
-                            }
-                            enhanced_menus.append(enhanced_menu)
-                            
-                        except Exception as menu_price_error:
-                            logger.error(f"Price comparison failed for menu {i+1}: {menu_price_error}")
+                    for i, (menu_response, price_data) in enumerate(zip(response.menus, all_price_data)):
+                        if isinstance(price_data, Exception):
+                            logger.error(f"Price comparison failed for menu {i+1}: {price_data}")
                             # Add menu without price data if price comparison fails
-                            enhanced_menu = {
-                                "score": menu_response.score,
-                                "total_nutrition": menu_response.total_nutrition.dict(),
-                                "items": [item.dict() for item in menu_response.items],
-                                "price_comparison": {"error": f"Price data unavailable: {str(menu_price_error)}"}
-                            }
-                            enhanced_menus.append(enhanced_menu)
+                            price_data = {"error": f"Price data unavailable: {str(price_data)}"}
+                        
+                        # Create enhanced menu response with prices
+                        enhanced_menu = {
+                            "score": menu_response.score,
+                            "total_nutrition": menu_response.total_nutrition.dict(),
+                            "items": [item.dict() for item in menu_response.items],
+                            "cost": menu_response.cost,
+                            "price_comparison": price_data
+                        }
+                        enhanced_menus.append(enhanced_menu)
                     
                     logger.info(f"Price comparison completed for {len(enhanced_menus)} menus")
                     
                     enhanced_response = {
                         "success": True,
                         "menus": enhanced_menus,
-                        "generation_time_ms": generation_time
+                        "generation_time_ms": generation_time,
+                        "ended_early": response.ended_early,
+                        "stop_reason": response.stop_reason,
+                        "attempts_used": response.attempts_used,
+                        "cached": response.cached
                     }
                     
                     return enhanced_response
@@ -100,13 +122,130 @@ async def calculate_nutrition(request: NutritionRequest):
         logger.error(f"Error in calculate_nutrition: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.post("/calculate-batch")
+async def calculate_nutrition_batch(request: BatchNutritionRequest):
+    """Generate menus for many targets, streaming one NDJSON line per target as it finishes"""
+    if not app_service.menu_generator:
+        raise HTTPException(status_code=503, detail="Menu generator not initialized")
+    
+    targets = [
+        (NutritionInfo(float(t.calories), float(t.protein), float(t.carbs), float(t.fat)), t.meal_type, t.num_items)
+        for t in request.targets
+    ]
+    logger.info(f"Generating menus for batch of {len(targets)} targets")
+    
+    # Each result is produced on the generation executor, one step at a time. The first
+    # step runs before the response starts, so a saturated server still answers 503.
+    start_time = datetime.now()
+    batch = app_service.menu_generator.generate_menu_batch(targets, request.attempts, request.seed)
+    try:
+        first_result = await app_service.next_generation_result(batch)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in calculate_nutrition_batch: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch generation failed: {str(e)}")
+    
+    async def stream_results():
+        succeeded = 0
+        result_pair = first_result
+        try:
+            while result_pair is not None:
+                index, menus = result_pair
+                elapsed = (datetime.now() - start_time).total_seconds() * 1000
+                if menus:
+                    result = format_menu_response(menus, elapsed).dict()
+                    succeeded += 1
+                else:
+                    result = {"success": False, "menus": [], "message": "No valid menus could be generated"}
+                result["index"] = index
+                result["id"] = request.targets[index].id
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+                result_pair = await app_service.next_generation_result(batch, wait_for_slot=True)
+        except Exception as e:
+            logger.error(f"Error in calculate_nutrition_batch: {e}")
+            yield json.dumps({"success": False, "error": f"Batch generation failed: {str(e)}"}) + "\n"
+            return
+        finally:
+            # A step still running on the executor keeps the generator busy; it is then closed when collected
+            try:
+                batch.close()
+            except ValueError:
+                pass
+        
+        total_time = (datetime.now() - start_time).total_seconds() * 1000
+        logger.info(f"Batch finished: {succeeded}/{len(targets)} targets in {total_time:.0f}ms")
+        yield json.dumps({"done": True, "total": len(targets), "succeeded": succeeded, "generation_time_ms": total_time}) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.post("/day-plan")
+async def generate_day_plan(request: DayPlanRequest):
+    if not app_service.menu_generator:
+        raise HTTPException(status_code=503, detail="Menu generator not initialized")
+    
+    try:
+        start_time = datetime.now()
+        
+        daily_target = NutritionInfo(
+            float(request.calories),
+            float(request.protein),
+            float(request.carbs),
+            float(request.fat)
+        )
+        
+        logger.info(f"Generating day plan: {daily_target.calories}cal")
+        
+        day_plan = await app_service.run_generation(
+            app_service.menu_generator.generate_day_plan,
+            daily_target,
+            request.meal_types,
+            request.num_items,
+            request.attempts,
+            request.seed
+        )
+        
+        generation_time = (datetime.now() - start_time).total_seconds() * 1000
+        
+        if not day_plan:
+            raise HTTPException(status_code=404, detail="No valid day plan could be generated")
+        
+        logger.info(f"Generated day plan with {len(day_plan)} meals")
+        return format_day_plan_response(day_plan, generation_time)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in generate_day_plan: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    if not app_service.menu_generator:
+        raise HTTPException(status_code=503, detail="Menu generator not initialized")
+    
+    stats = {"success": True}
+    
+    food_provider = app_service.menu_generator.food_provider
+    if hasattr(food_provider, 'get_cache_stats'):
+        stats["catalog"] = food_provider.get_cache_stats()
+    
+    if app_service.price_comparison and hasattr(app_service.price_comparison, 'get_cache_stats'):
+        stats["prices"] = app_service.price_comparison.get_cache_stats()
+    
+    result_cache = app_service.menu_generator.result_cache
+    if not result_cache:
+        return {**stats, "enabled": False}
+    
+    return {**stats, "enabled": True, **result_cache.get_stats()}
+
 @router.get("/food-categories")
 async def get_food_categories():
     if not app_service.menu_generator:
         raise HTTPException(status_code=503, detail="Menu generator not initialized")
     
     try:
-        stats = app_service.menu_generator.food_provider.get_provider_stats()
+        stats = await app_service.run_db(app_service.menu_generator.food_provider.get_provider_stats)
         return {
             "success": True,
             "categories": stats['categories'],
@@ -115,36 +254,52 @@ async def get_food_categories():
             "total_categories": stats['total_categories'],
             "total_subcategories": stats['total_subcategories']
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting food categories: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get food categories: {str(e)}")
 
 @router.get("/search/{query}")
-async def search_foods(query: str):
+async def search_foods(query: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=100)):
     if not app_service.menu_generator:
         raise HTTPException(status_code=503, detail="Menu generator not initialized")
     
     try:
-        foods = app_service.menu_generator.food_provider.search_foods(query)
-        
-        results = []
-        for food in foods[:50]:
-            results.append({
-                'item_code': food.item_code,
-                'name': food.name,
-                'category': food.category,
-                'subcategory': food.subcategory,
-                'nutrition': food.nutrition_per_100g.to_dict()
-            })
+        page = await app_service.search_foods(query, offset, limit)
+        results = [format_food(food) for food in page.foods]
         
         return {
             "success": True,
             "query": query,
             "results": results,
-            "total_found": len(foods)
+            "total_found": page.total,
+            "offset": offset,
+            "limit": limit
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching foods: {e}")
         raise HTTPException(status_code=500, detail=f"Food search failed: {str(e)}")
 
+@router.get("/foods")
+async def get_foods_by_codes(codes: List[str] = Query(..., min_length=1, max_length=100)):
+    """Look up foods by item code (?codes=1&codes=2), concurrently; unknown codes come back as null"""
+    if not app_service.menu_generator:
+        raise HTTPException(status_code=503, detail="Menu generator not initialized")
+    
+    try:
+        foods = await app_service.get_foods_by_codes(codes)
+        return {
+            "success": True,
+            "foods": [format_food(food) if food else None for food in foods],
+            "found": sum(1 for food in foods if food)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error looking up foods: {e}")
+        raise HTTPException(status_code=500, detail=f"Food lookup failed: {str(e)}")
+
 nutrition_router = router
\ No newline at end of file
@@ -2,8 +2,8 @@ from fastapi import APIRouter, HTTPException
 from datetime import datetime
 import logging
 
-from src.api.models.requests import PriceComparisonRequest
-from src.api.models.responses import PriceComparisonResponse
+from src.api.models.requests import PriceComparisonRequest, BatchPriceComparisonRequest, CheapestCombinationRequest
+from src.api.models.responses import PriceComparisonResponse, BatchPriceComparisonResponse
 from src.api.services.app_service import app_service
 
 router = APIRouter()
@@ -16,23 +16,43 @@ async def compare_prices(request: PriceComparisonRequest):
     
     try:
         logger.info(f"🔄 Comparing prices for {len(request.menu_items)} items")
-        price_data = app_service.price_comparison.compare_menu_prices(request.menu_items)
+        price_data = await app_service.compare_menu_prices(request.menu_items)
         return PriceComparisonResponse(success=True, price_comparison=price_data)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in price comparison: {e}")
         raise HTTPException(status_code=500, detail=f"Price comparison failed: {str(e)}")
 
+@router.post("/compare-batch", response_model=BatchPriceComparisonResponse)
+async def compare_prices_batch(request: BatchPriceComparisonRequest):
+    if not app_service.price_comparison:
+        raise HTTPException(status_code=503, detail="Price comparison service not initialized")
+    
+    try:
+        logger.info(f"🔄 Comparing prices for {len(request.menus)} menus")
+        price_data = await app_service.compare_menu_prices_batch(request.menus)
+        return BatchPriceComparisonResponse(success=True, price_comparisons=price_data)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch price comparison: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch price comparison failed: {str(e)}")
+
 @router.post("/cheapest-combination")
-async def get_cheapest_combination(request: PriceComparisonRequest):
+async def get_cheapest_combination(request: CheapestCombinationRequest):
     if not app_service.price_comparison:
         raise HTTPException(status_code=503, detail="Price comparison service not initialized")
     
     try:
         logger.info(f"🔄 Finding cheapest combination for {len(request.menu_items)} items")
-        cheapest_data = app_service.price_comparison.get_cheapest_combination(request.menu_items)
+        cheapest_data = await app_service.get_cheapest_combination(request.menu_items, request.store_visit_cost, request.max_stores)
         return {"success": True, "cheapest_combination": cheapest_data}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error finding cheapest combination: {e}")
         raise HTTPException(status_code=500, detail=f"Cheapest combination calculation failed: {str(e)}")
@@ -24,9 +24,11 @@ async def lifespan(app: FastAPI):
     # Startup
     if not app_service.initialize():
         logger.error("Failed to initialize services")
+    await app_service.initialize_async()
     yield
-    # Shutdown (if needed)
-    pass
+    # Shutdown
+    await app_service.shutdown_async()
+    app_service.shutdown()
 
 app = FastAPI(
     title="Nutrition Menu Generator API",
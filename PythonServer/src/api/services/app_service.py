@@ -1,5 +1,6 @@
 # src/api/services/app_service.py - Fixed with proper database management
 
+import asyncio
 import sys
 import os
 
@@ -14,16 +15,151 @@ from src.services.food_classifier import FoodClassifier
 from src.services.portion_calculator import PortionCalculator
 from src.services.meal_rules import MealRulesFactory
 from src.algorithm.menu_generator import MenuGenerator
+from src.api.services.bounded_executor import BoundedExecutor, ExecutorSaturatedError
 
 # Import the new database manager
 from data.database_manager import create_database_manager
 from data.sql_providers import SqlFoodProvider, SqlPriceComparison
+from data.async_database_manager import AsyncDatabaseManager
+from data.async_sql_providers import AsyncSqlFoodProvider, AsyncSqlPriceComparison
 
 class AppService:
     def __init__(self):
         self.menu_generator = None
         self.price_comparison = None
         self.db_manager = None
+        
+        # Optional async data path (asyncpg); routes fall back to the sync providers
+        self.async_db_manager = None
+        self.async_food_provider = None
+        self.async_price_comparison = None
+        self._catalog_warming = False
+        
+        # Blocking work runs here so the event loop stays responsive
+        config = get_config('default')
+        self.generation_executor = BoundedExecutor(
+            'generation', config.GENERATION_CONCURRENCY, config.GENERATION_QUEUE_SIZE, config.RETRY_AFTER_SECONDS
+        )
+        self.db_executor = BoundedExecutor(
+            'database', config.DB_CONCURRENCY, config.DB_QUEUE_SIZE, config.RETRY_AFTER_SECONDS
+        )
+    
+    async def run_generation(self, func, *args, **kwargs):
+        """Run CPU-heavy menu generation off the event loop
+        
+        The thread only coordinates: attempts run in the generator's worker processes
+        (GENERATION_WORKERS, one per core by default), so requests do not share one GIL.
+        """
+        return await self.generation_executor.run(func, *args, **kwargs)
+    
+    async def next_generation_result(self, iterator, wait_for_slot=False):
+        """Advance a blocking generation iterator by one result on the generation executor
+        
+        Returns None once the iterator is exhausted. With wait_for_slot, a stream that is
+        already under way waits for a free slot instead of failing halfway through.
+        """
+        while True:
+            try:
+                return await self.generation_executor.run(next, iterator, None)
+            except ExecutorSaturatedError:
+                if not wait_for_slot:
+                    raise
+                await asyncio.sleep(self.generation_executor.retry_after_seconds)
+    
+    async def run_db(self, func, *args, **kwargs):
+        """Run a blocking database call off the event loop"""
+        return await self.db_executor.run(func, *args, **kwargs)
+    
+    async def initialize_async(self):
+        """Set up the async database path when enabled and asyncpg is installed"""
+        config = get_config('default')
+        if not config.ASYNC_DB_ENABLED or not AsyncDatabaseManager.is_available():
+            print("ℹ️ Async database path disabled, using thread-pooled sync queries")
+            return False
+        
+        try:
+            self.async_db_manager = AsyncDatabaseManager()
+            if not await self.async_db_manager.connect():
+                self.async_db_manager = None
+                return False
+            
+            self.async_food_provider = AsyncSqlFoodProvider(self.async_db_manager)
+            supermarkets = self.price_comparison.supermarkets if self.price_comparison else None
+            self.async_price_comparison = AsyncSqlPriceComparison(self.async_db_manager, supermarkets)
+            if not supermarkets:
+                await self.async_price_comparison.load_supermarkets()
+            return True
+            
+        except Exception as e:
+            print(f"⚠️ Async database initialization failed: {e}")
+            self.async_db_manager = None
+            self.async_food_provider = None
+            self.async_price_comparison = None
+            return False
+    
+    async def search_foods(self, query_text, offset=0, limit=50):
+        """Search foods in the in-memory index (fast enough to answer inline once the catalog is loaded)"""
+        food_provider = self.menu_generator.food_provider
+        if getattr(food_provider, 'food_catalog', None) is None:
+            if self.async_food_provider:
+                # Answer from the database while the catalog loads in the background
+                self._warm_food_catalog()
+                return await self.async_food_provider.search_food_page(query_text, offset, limit)
+            # The first use loads the catalog from the database
+            return await self.run_db(food_provider.search_food_page, query_text, offset, limit)
+        return food_provider.search_food_page(query_text, offset, limit)
+    
+    def _warm_food_catalog(self):
+        """Start loading the food catalog on the database executor, once"""
+        if self._catalog_warming:
+            return
+        self._catalog_warming = True
+        
+        def loaded(task):
+            self._catalog_warming = False
+            if not task.cancelled() and task.exception():
+                print(f"⚠️ Food catalog warm-up failed: {task.exception()}")
+        
+        task = asyncio.ensure_future(self.run_db(self.menu_generator.food_provider.get_food_catalog))
+        task.add_done_callback(loaded)
+    
+    async def get_foods_by_codes(self, item_codes):
+        """Look up foods by item code in the given order (missing ones are None)"""
+        if self.async_food_provider:
+            # One query per code, all in flight at once
+            return await self.async_food_provider.get_foods_by_codes(item_codes)
+        food_provider = self.menu_generator.food_provider
+        return await self.run_db(lambda: [food_provider.get_food_by_code(code) for code in item_codes])
+    
+    async def compare_menu_prices(self, menu_items):
+        """Compare prices for one menu without blocking the event loop"""
+        if self.price_comparison and self.price_comparison.price_matrix is not None:
+            # In-memory price matrix: microseconds, so it runs inline
+            return self.price_comparison.compare_menu_prices(menu_items)
+        if self.async_price_comparison:
+            return await self.async_price_comparison.compare_menu_prices(menu_items)
+        return await self.run_db(self.price_comparison.compare_menu_prices, menu_items)
+    
+    async def get_cheapest_combination(self, menu_items, store_visit_cost=None, max_stores=None):
+        """Find the cheapest shopping plan without blocking the event loop (config defaults for visit cost and store cap)"""
+        config = get_config('default')
+        if store_visit_cost is None:
+            store_visit_cost = config.SHOPPING_STORE_VISIT_COST
+        if max_stores is None:
+            max_stores = config.SHOPPING_MAX_STORES
+        
+        if self.price_comparison.price_matrix is not None:
+            # Exact plan over the in-memory matrix takes a few milliseconds at most
+            return self.price_comparison.get_cheapest_combination(menu_items, store_visit_cost, max_stores)
+        return await self.run_db(self.price_comparison.get_cheapest_combination, menu_items, store_visit_cost, max_stores)
+    
+    async def compare_menu_prices_batch(self, menus_items):
+        """Compare prices for several menus in one batch (failed menus get an error result)"""
+        if self.price_comparison and self.price_comparison.price_matrix is not None:
+            return self.price_comparison.compare_menu_prices_batch(menus_items)
+        if self.async_price_comparison:
+            return await self.async_price_comparison.compare_menu_prices_batch(menus_items)
+        return await self.run_db(self.price_comparison.compare_menu_prices_batch, menus_items)
     
     def initialize(self):
         try:
@@ -38,8 +174,13 @@ class AppService:
                 print("❌ Database health check failed")
                 return False
             
+            # Initialize services
+            food_classifier = FoodClassifier(config)
+            portion_calculator = PortionCalculator(config)
+            meal_rules_factory = MealRulesFactory()
+            
             # Initialize providers with database manager
-            food_provider = SqlFoodProvider(self.db_manager)
+            food_provider = SqlFoodProvider(self.db_manager, food_classifier)
             self.price_comparison = SqlPriceComparison(self.db_manager)
             
             # Test providers
@@ -49,14 +190,9 @@ class AppService:
             if stats['total_foods'] == 0:
                 print("⚠️ Warning: No foods found in database")
             
-            # Initialize services
-            food_classifier = FoodClassifier(config)
-            portion_calculator = PortionCalculator(config)
-            meal_rules_factory = MealRulesFactory()
-            
             self.menu_generator = MenuGenerator(
                 food_provider, food_classifier, portion_calculator, 
-                meal_rules_factory, config
+                meal_rules_factory, config, price_provider=self.price_comparison
             )
             
             print("✅ All services initialized successfully")
@@ -113,9 +249,19 @@ class AppService:
         
         return status
     
+    async def shutdown_async(self):
+        """Close the async database pool"""
+        if self.async_db_manager:
+            await self.async_db_manager.close()
+            self.async_db_manager = None
+    
     def shutdown(self):
         """Clean shutdown of all services"""
         try:
+            self.generation_executor.shutdown()
+            self.db_executor.shutdown()
+            if self.menu_generator:
+                self.menu_generator.shutdown()
             if self.db_manager:
                 self.db_manager.close()
             print("✅ Services shut down cleanly")
@@ -0,0 +1,107 @@
+# src/api/services/bounded_executor.py - Off-loop execution with admission control
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+class ExecutorSaturatedError(HTTPException):
+    """Raised when an executor's workers and queue are all taken (maps to 503 + Retry-After)"""
+
+    def __init__(self, name, retry_after_seconds):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy ({name}), please retry shortly",
+            headers={"Retry-After": str(retry_after_seconds)}
+        )
+
+class DeadlinePassedError(HTTPException):
+    """Raised when a call's deadline passed while it waited in the queue (maps to 503 + Retry-After)"""
+
+    def __init__(self, name, retry_after_seconds):
+        super().__init__(
+            status_code=503,
+            detail=f"Request deadline passed while queued ({name}), please retry shortly",
+            headers={"Retry-After": str(retry_after_seconds)}
+        )
+
+class BoundedExecutor:
+    """Responsible ONLY for running blocking calls off the event loop with bounded concurrency
+
+    At most max_workers calls run at once and at most max_queue more wait; anything
+    beyond that is rejected immediately instead of piling up behind the event loop.
+    """
+
+    def __init__(self, name, max_workers, max_queue, retry_after_seconds=1):
+        self.name = name
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.retry_after_seconds = retry_after_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.expired = 0
+        self.completed = 0
+
+    def acquire(self):
+        """Reserve a slot or raise ExecutorSaturatedError"""
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturatedError(self.name, self.retry_after_seconds)
+            self._pending += 1
+
+    def release(self):
+        """Give back a slot reserved with acquire()"""
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    async def run(self, func, *args, start_by=None, **kwargs):
+        """Run a blocking call on the pool and await its result
+
+        start_by is an absolute time.time() deadline: a call still queued then is not
+        started and raises DeadlinePassedError instead.
+        """
+        call = functools.partial(func, *args, **kwargs)
+        if start_by is not None:
+            call = functools.partial(self._call_before, start_by, call)
+
+        self.acquire()
+        try:
+            future = self._executor.submit(call)
+        except Exception:
+            self.release()
+            raise
+
+        # The slot is held until the call really finishes, even if the request is cancelled
+        future.add_done_callback(lambda _: self.release())
+        return await asyncio.wrap_future(future)
+
+    def _call_before(self, start_by, call):
+        """Run a dequeued call unless its deadline already passed"""
+        if time.time() >= start_by:
+            with self._lock:
+                self.expired += 1
+            raise DeadlinePassedError(self.name, self.retry_after_seconds)
+        return call()
+
+    def get_stats(self):
+        """Get current load and counters"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'capacity': self.capacity,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'expired': self.expired
+            }
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=wait)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from fastapi import HTTPException
-from src.api.models.responses import MenuGenerationResponse, MenuResponse, FoodNutrition, MenuItem
+from src.api.models.responses import MenuGenerationResponse, MenuResponse, FoodNutrition, MenuItem, PlannedMealResponse, DayPlanResponse
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,49 +9,83 @@ def format_menu_response(menus, generation_time_ms=None):
         response_data = MenuGenerationResponse(
             success=True,
             menus=[],
-            generation_time_ms=generation_time_ms
+            generation_time_ms=generation_time_ms,
+            ended_early=getattr(menus, 'ended_early', None),
+            stop_reason=getattr(menus, 'stop_reason', None),
+            attempts_used=getattr(menus, 'attempts_used', None),
+            cached=getattr(menus, 'cached', None)
         )
         
         menu_list = menus if isinstance(menus, list) else [(menus, 0.0)]
+        cost_objective = getattr(menus, 'cost_objective', None)
         
         for menu, score in menu_list:
-            total_nutrition = menu.get_total_nutrition()
-            
-            menu_data = MenuResponse(
-                score=round(score, 3),
-                total_nutrition=FoodNutrition(
-                    calories=round(total_nutrition.calories, 1),
-                    protein=round(total_nutrition.protein, 1),
-                    carbs=round(total_nutrition.carbs, 1),
-                    fat=round(total_nutrition.fat, 1)
-                ),
-                items=[]
-            )
-            
-            for item in menu.items:
-                item_nutrition = item.get_nutrition()
-                menu_item = MenuItem(
-                    name=item.food.name,
-                    portion_grams=round(item.portion_grams, 1),
-                    category=item.food.category,
-                    subcategory=item.food.subcategory,
-                    item_code=item.food.item_code,
-                    nutrition=FoodNutrition(
-                        calories=round(item_nutrition.calories, 1),
-                        protein=round(item_nutrition.protein, 1),
-                        carbs=round(item_nutrition.carbs, 1),
-                        fat=round(item_nutrition.fat, 1)
-                    )
-                )
-                menu_data.items.append(menu_item)
-            
-            response_data.menus.append(menu_data)
+            response_data.menus.append(format_menu(menu, score, cost_objective))
         
         return response_data
     except Exception as e:
         logger.error(f"Error formatting menu response: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to format response: {str(e)}")
 
+def format_menu(menu, score, cost_objective=None):
+    total_nutrition = menu.get_total_nutrition()
+    cost = cost_objective.menu_cost(menu) if cost_objective else None
+    
+    menu_data = MenuResponse(
+        score=round(score, 3),
+        total_nutrition=format_nutrition(total_nutrition),
+        items=[],
+        cost=round(cost, 2) if cost is not None else None
+    )
+    
+    for item in menu.items:
+        menu_item = MenuItem(
+            name=item.food.name,
+            portion_grams=round(item.portion_grams, 1),
+            category=item.food.category,
+            subcategory=item.food.subcategory,
+            item_code=item.food.item_code,
+            nutrition=format_nutrition(item.get_nutrition())
+        )
+        menu_data.items.append(menu_item)
+    
+    return menu_data
+
+def format_food(food):
+    return {
+        'item_code': food.item_code,
+        'name': food.name,
+        'category': food.category,
+        'subcategory': food.subcategory,
+        'nutrition': food.nutrition_per_100g.to_dict()
+    }
+
+def format_nutrition(nutrition):
+    return FoodNutrition(
+        calories=round(nutrition.calories, 1),
+        protein=round(nutrition.protein, 1),
+        carbs=round(nutrition.carbs, 1),
+        fat=round(nutrition.fat, 1)
+    )
+
+def format_day_plan_response(day_plan, generation_time_ms=None):
+    try:
+        return DayPlanResponse(
+            success=True,
+            meals=[PlannedMealResponse(
+                meal_type=meal['meal_type'],
+                share=round(meal['share'], 3),
+                target_nutrition=format_nutrition(meal['target_nutrition']),
+                menu=format_menu(meal['menu'], meal['score'])
+            ) for meal in day_plan.meals],
+            total_nutrition=format_nutrition(day_plan.get_total_nutrition()),
+            repeated_items=day_plan.get_repeated_item_count(),
+            generation_time_ms=generation_time_ms
+        )
+    except Exception as e:
+        logger.error(f"Error formatting day plan response: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to format response: {str(e)}")
+
 def extract_menu_items_for_price_comparison(menu_response):
     return [{
         'item_code': item.item_code,
@@ -38,7 +38,7 @@ def validate_nutrition_request(request):
     
     # Check meal type if provided
     if hasattr(request, 'meal_type') and request.meal_type:
-        allowed_types = ['breakfast', 'lunch', 'dinner', 'snack']
+        allowed_types = ['breakfast', 'lunch', 'dinner', 'snack', 'snacks']
         if request.meal_type.lower() not in allowed_types:
             errors.append(f"meal_type must be one of: {allowed_types}")
     
@@ -3,7 +3,7 @@
 from .base_filter import FoodFilter, FilterChain
 from .nutritional_filter import NutritionalSoundnessFilter, MacroBalanceFilter, CalorieDensityFilter
 from .meal_filter import MealAppropriatenessFilter, CategoryFilter, SubcategoryFilter, FoodTypeFilter
-from .balance_filter import BalanceFilter, DiversityFilter, AllergenFilter, HealthScoreFilter
+from .balance_filter import BalanceFilter, BalanceConstraintEngine, DiversityFilter, AllergenFilter, HealthScoreFilter
 from .category_preference_filter import CategoryPreferenceFilter, SmartCategoryFilter
 
 __all__ = [
@@ -17,6 +17,7 @@ __all__ = [
     'SubcategoryFilter',
     'FoodTypeFilter',
     'BalanceFilter',
+    'BalanceConstraintEngine',
     'DiversityFilter',
     'AllergenFilter',
     'HealthScoreFilter',
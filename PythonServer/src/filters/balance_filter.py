@@ -1,5 +1,6 @@
 # src/filters/balance_filter.py - Balance constraint filtering
 
+import numpy as np
 from .base_filter import FoodFilter
 from config import Config
 
@@ -39,11 +40,8 @@ class BalanceFilter(FoodFilter):
         """Check if adding this food violates sugar constraint"""
         current_nutrition = self.current_menu.get_total_nutrition()
         
-        # Calculate current sugar calories
-        sugar_calories = sum(
-            item.get_nutrition().calories for item in self.current_menu.items
-            if self.food_classifier.is_high_sugar(item.food)
-        )
+        # Current sugar calories (running total when the menu tracks this classifier)
+        sugar_calories = self.current_menu.get_sugar_calories(self.food_classifier)
         
         # Add potential sugar calories from this food
         potential_sugar_calories = sugar_calories + food.nutrition_per_100g.calories
@@ -58,10 +56,7 @@ class BalanceFilter(FoodFilter):
     def _check_processed_constraint(self, food):
         """Check if adding this food violates processed food constraint"""
         # Count processed foods in current menu
-        processed_count = sum(
-            1 for item in self.current_menu.items
-            if self.food_classifier.is_processed(item.food)
-        )
+        processed_count = self.current_menu.get_processed_count(self.food_classifier)
         
         # Calculate percentage if we add this processed food
         total_items = len(self.current_menu.items) + 1
@@ -69,6 +64,62 @@ class BalanceFilter(FoodFilter):
         
         return processed_percentage <= self.max_processed_percentage
 
+class BalanceConstraintEngine:
+    """Tracks a menu's balance state and checks a whole catalog of candidates at once
+    
+    Same rules as BalanceFilter, but the state is updated per added item and the
+    check is a single vectorized mask over the catalog's classification columns.
+    """
+    
+    def __init__(self, catalog, config=None):
+        self.catalog = catalog
+        
+        if config is None:
+            config = Config()
+        self.max_sugar_percentage = config.MAX_SUGAR_PERCENTAGE
+        self.max_processed_percentage = config.MAX_PROCESSED_PERCENTAGE
+        
+        self.total_calories = 0.0
+        self.sugar_calories = 0.0
+        self.processed_count = 0
+        self.item_count = 0
+    
+    def start(self, menu, food_classifier):
+        """Take the current state from a menu's running totals"""
+        self.total_calories = menu.get_total_nutrition().calories
+        self.sugar_calories = menu.get_sugar_calories(food_classifier)
+        self.processed_count = menu.get_processed_count(food_classifier)
+        self.item_count = len(menu.items)
+    
+    def add(self, row, item):
+        """Record that the food at this catalog row was added to the menu"""
+        calories = item.get_nutrition().calories
+        self.total_calories += calories
+        self.item_count += 1
+        if self.catalog.high_sugar[row]:
+            self.sugar_calories += calories
+        if self.catalog.processed[row]:
+            self.processed_count += 1
+    
+    def admissible_mask(self):
+        """Get a bool mask of catalog rows that can be added without breaking balance"""
+        catalog = self.catalog
+        
+        # Sugar: share of sugar calories after adding 100g of the candidate
+        potential_total = self.total_calories + catalog.calories
+        potential_sugar = self.sugar_calories + catalog.calories
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sugar_ok = np.where(potential_total > 0,
+                                potential_sugar / potential_total <= self.max_sugar_percentage, True)
+        mask = ~catalog.high_sugar | sugar_ok
+        
+        # Processed: the same for every candidate, so a single scalar check
+        processed_percentage = (self.processed_count + 1) / (self.item_count + 1)
+        if processed_percentage > self.max_processed_percentage:
+            mask &= ~catalog.processed
+        
+        return mask
+
 class DiversityFilter(FoodFilter):
     """Filter to promote food diversity"""
     
@@ -3,5 +3,8 @@
 from .nutrition import NutritionInfo
 from .food import Food, MenuItem
 from .menu import Menu
+from .food_catalog import FoodCatalog
+from .day_plan import DayPlan
+from .price_matrix import PriceMatrix
 
-__all__ = ['NutritionInfo', 'Food', 'MenuItem', 'Menu']
\ No newline at end of file
+__all__ = ['NutritionInfo', 'Food', 'MenuItem', 'Menu', 'FoodCatalog', 'DayPlan', 'PriceMatrix']
\ No newline at end of file
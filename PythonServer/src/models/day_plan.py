@@ -0,0 +1,56 @@
+# src/models/day_plan.py - Day plan model
+
+from .nutrition import NutritionInfo
+
+class DayPlan:
+    """Responsible ONLY for holding the meals of a full day"""
+    
+    def __init__(self, target_nutrition=None):
+        self.target_nutrition = target_nutrition
+        self.meals = []  # Dicts of meal_type, menu, score, share, target_nutrition
+    
+    def add_meal(self, meal_type, menu, score, share, target_nutrition):
+        """Add a generated meal to the plan"""
+        self.meals.append({
+            'meal_type': meal_type,
+            'menu': menu,
+            'score': score,
+            'share': share,
+            'target_nutrition': target_nutrition
+        })
+    
+    def get_total_nutrition(self):
+        """Get total nutrition across all meals"""
+        total = NutritionInfo(0, 0, 0, 0)
+        for meal in self.meals:
+            total = total.add(meal['menu'].get_total_nutrition())
+        return total
+    
+    def get_item_codes(self):
+        """Get item codes of all foods in the plan"""
+        return [item.food.item_code for meal in self.meals for item in meal['menu'].items]
+    
+    def get_repeated_item_count(self):
+        """Get how many items appear in more than one meal"""
+        codes = self.get_item_codes()
+        return len(codes) - len(set(codes))
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'meals': [{
+                'meal_type': meal['meal_type'],
+                'score': meal['score'],
+                'share': meal['share'],
+                'target_nutrition': meal['target_nutrition'].to_dict(),
+                'menu': meal['menu'].to_dict()
+            } for meal in self.meals],
+            'total_nutrition': self.get_total_nutrition().to_dict(),
+            'repeated_items': self.get_repeated_item_count()
+        }
+    
+    def __len__(self):
+        return len(self.meals)
+    
+    def __repr__(self):
+        return f"DayPlan(meals={len(self.meals)})"
\ No newline at end of file
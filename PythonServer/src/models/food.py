@@ -40,11 +40,21 @@ class MenuItem:
     
     def __init__(self, food, portion_grams):
         self.food = food
-        self.portion_grams = float(portion_grams)
+        self._set_portion(portion_grams)
+    
+    @property
+    def portion_grams(self):
+        # Read-only: a Menu keeps running totals of its items, so use Menu.update_portion
+        return self._portion_grams
+    
+    def _set_portion(self, portion_grams):
+        # Nutrition is computed once per portion change, not on every read
+        self._portion_grams = float(portion_grams)
+        self._nutrition = self.food.get_nutrition_for_portion(self._portion_grams)
     
     def get_nutrition(self):
         """Get nutrition for this menu item"""
-        return self.food.get_nutrition_for_portion(self.portion_grams)
+        return self._nutrition
     
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
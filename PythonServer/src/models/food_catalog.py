@@ -0,0 +1,182 @@
+# src/models/food_catalog.py - Columnar food catalog model
+
+import numpy as np
+
+class FoodCatalog:
+    """Responsible ONLY for holding food data as aligned NumPy columns"""
+
+    # Row-aligned columns copied when taking a subset
+    _COLUMNS = (
+        'calories', 'protein', 'carbs', 'fat', 'sodium', 'category_ids',
+        'health_scores', 'flags', 'fat_ratios', 'protein_ratios', 'carb_ratios',
+        'high_sugar', 'processed'
+    )
+
+    def __init__(self, foods, food_classifier=None, version=0, category_names=None):
+        self.foods = list(foods)
+        self.version = version
+        self.index_by_code = {food.item_code: row for row, food in enumerate(self.foods)}
+
+        # Set on subsets: the parent catalog and the rows taken from it
+        self.source = None
+        self.source_rows = None
+        self.rankings = {}
+
+        # Set on patched catalogs: the catalog the patches started from and, in order,
+        # every (version, upserts, removed_codes) patch applied to it since
+        self.root = None
+        self.lineage = ()
+
+        # Category ids are shared between a catalog and its subsets
+        self.category_names = category_names if category_names is not None else []
+        self.category_ids_by_name = {name: i for i, name in enumerate(self.category_names)}
+
+        # Per-100g nutrition columns
+        self.calories = np.array([f.nutrition_per_100g.calories for f in self.foods], dtype=np.float64)
+        self.protein = np.array([f.nutrition_per_100g.protein for f in self.foods], dtype=np.float64)
+        self.carbs = np.array([f.nutrition_per_100g.carbs for f in self.foods], dtype=np.float64)
+        self.fat = np.array([f.nutrition_per_100g.fat for f in self.foods], dtype=np.float64)
+        self.sodium = np.array([f.sodium for f in self.foods], dtype=np.float64)
+        self.category_ids = np.array([self._get_category_id(f.category) for f in self.foods], dtype=np.int32)
+
+        # Classification bitmask and health score (0-100), neutral when no classifier is given
+        if food_classifier is not None:
+            self.flags = np.array([food_classifier.get_flags(f) for f in self.foods], dtype=np.uint8)
+            self.health_scores = np.array([food_classifier.get_food_score(f) for f in self.foods], dtype=np.float64)
+            self.high_sugar = (self.flags & food_classifier.HIGH_SUGAR) != 0
+            self.processed = (self.flags & food_classifier.PROCESSED) != 0
+        else:
+            self.flags = np.zeros(len(self.foods), dtype=np.uint8)
+            self.health_scores = np.full(len(self.foods), 50.0)
+            self.high_sugar = np.zeros(len(self.foods), dtype=bool)
+            self.processed = np.zeros(len(self.foods), dtype=bool)
+
+        self._compute_macro_ratios()
+
+    def _get_category_id(self, category):
+        """Get the id of a category, registering it if new"""
+        category_id = self.category_ids_by_name.get(category)
+        if category_id is None:
+            category_id = len(self.category_names)
+            self.category_names.append(category)
+            self.category_ids_by_name[category] = category_id
+        return category_id
+
+    def _compute_macro_ratios(self):
+        """Precompute the calorie share of each macro"""
+        food_cals = np.maximum(1.0, self.calories)
+        self.fat_ratios = self.fat * 9 / food_cals
+        self.protein_ratios = self.protein * 4 / food_cals
+        self.carb_ratios = self.carbs * 4 / food_cals
+
+    def subset(self, foods):
+        """Create a catalog over some of these foods, reusing computed columns"""
+        return self.take(self.rows_for(foods))
+
+    def take(self, rows):
+        """Create a catalog over the given rows, remembering where they came from"""
+        subset = FoodCatalog.__new__(FoodCatalog)
+        subset.foods = [self.foods[row] for row in rows]
+        subset.version = self.version
+        subset.index_by_code = {food.item_code: i for i, food in enumerate(subset.foods)}
+        subset.category_names = self.category_names
+        subset.category_ids_by_name = self.category_ids_by_name
+        subset.source = self
+        subset.source_rows = rows
+        subset.rankings = {}
+        subset.root = None
+        subset.lineage = ()
+
+        for column in self._COLUMNS:
+            setattr(subset, column, getattr(self, column)[rows])
+
+        return subset
+
+    def patch(self, upserts, removed_codes, food_classifier=None, version=None):
+        """Create a new catalog with foods replaced, added or removed by item code
+
+        Columns of unchanged rows are copied rather than recomputed, and this catalog
+        is left untouched so it can keep serving readers. Patching is deterministic, so
+        replaying the lineage on a copy of the root rebuilds the same catalog.
+        """
+        changes = FoodCatalog(upserts, food_classifier, category_names=list(self.category_names))
+
+        replaced_rows, replaced_from, appended_from = [], [], []
+        for i, food in enumerate(changes.foods):
+            row = self.index_by_code.get(food.item_code)
+            if row is None:
+                appended_from.append(i)
+            else:
+                replaced_rows.append(row)
+                replaced_from.append(i)
+
+        keep = np.ones(len(self.foods) + len(appended_from), dtype=bool)
+        for item_code in removed_codes:
+            row = self.index_by_code.get(str(item_code))
+            if row is not None:
+                keep[row] = False
+
+        foods = list(self.foods)
+        for row, i in zip(replaced_rows, replaced_from):
+            foods[row] = changes.foods[i]
+        foods.extend(changes.foods[i] for i in appended_from)
+
+        patched = FoodCatalog.__new__(FoodCatalog)
+        patched.foods = [food for food, kept in zip(foods, keep) if kept]
+        patched.version = version if version is not None else self.version + 1
+        patched.index_by_code = {food.item_code: row for row, food in enumerate(patched.foods)}
+        patched.category_names = changes.category_names
+        patched.category_ids_by_name = changes.category_ids_by_name
+        patched.source = None
+        patched.source_rows = None
+        patched.rankings = {}
+        patched.root = self.root if self.root is not None else self
+        patched.lineage = self.lineage + ((patched.version, tuple(upserts), tuple(removed_codes)),)
+
+        for column in self._COLUMNS:
+            values = getattr(self, column).copy()
+            changed = getattr(changes, column)
+            values[replaced_rows] = changed[replaced_from]
+            values = np.concatenate([values, changed[appended_from]])
+            setattr(patched, column, values[keep])
+
+        return patched
+
+    def rows_for(self, foods):
+        """Get catalog row indices for the given foods (unknown foods are skipped)"""
+        rows = [self.index_by_code.get(food.item_code) for food in foods]
+        return np.array([row for row in rows if row is not None], dtype=np.intp)
+
+    def get_ranking(self, name, food_check, column):
+        """Get rows passing food_check, best first by column per gram of fat, then column
+
+        Rankings are computed once per catalog and never mutated, so they can be shared.
+        """
+        ranking = self.rankings.get(name)
+        if ranking is None:
+            rows = np.array([row for row, food in enumerate(self.foods) if food_check(food)], dtype=np.intp)
+            values = getattr(self, column)[rows]
+            density = values / np.maximum(1.0, self.fat[rows])
+            ranking = rows[np.lexsort((-values, -density))]
+            self.rankings[name] = ranking
+        return ranking
+
+    def get_row(self, item_code):
+        """Get the row of a food by item code"""
+        return self.index_by_code.get(str(item_code))
+
+    def get_category_ids(self, categories):
+        """Get ids for category names (unknown names map to -1)"""
+        return np.array([self.category_ids_by_name.get(c, -1) for c in categories], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.foods)
+
+    def __iter__(self):
+        return iter(self.foods)
+
+    def __getitem__(self, row):
+        return self.foods[row]
+
+    def __repr__(self):
+        return f"FoodCatalog(foods={len(self.foods)}, version={self.version})"
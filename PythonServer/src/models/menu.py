@@ -5,43 +5,99 @@ from .nutrition import NutritionInfo
 class Menu:
     """Responsible ONLY for menu data and basic operations"""
     
-    def __init__(self):
+    def __init__(self, food_classifier=None):
         self.items = []
+        
+        # Running totals, updated in O(1) as items are added or removed
+        self.food_classifier = food_classifier
+        self._calories = 0.0
+        self._protein = 0.0
+        self._carbs = 0.0
+        self._fat = 0.0
+        self._total_nutrition = None
+        self._categories = {}
+        self._subcategories = {}
+        
+        # Classification aggregates (only tracked when a classifier is given)
+        self._sugar_calories = 0.0
+        self._processed_count = 0
     
     def add_item(self, item):
         """Add an item to the menu"""
         self.items.append(item)
+        self._update_totals(item, 1)
     
     def remove_item(self, index):
         """Remove an item by index"""
         if 0 <= index < len(self.items):
-            self.items.pop(index)
+            item = self.items.pop(index)
+            self._update_totals(item, -1)
     
-    def get_total_nutrition(self):
-        """Calculate total nutrition for the menu"""
-        if not self.items:
-            return NutritionInfo(0, 0, 0, 0)
+    def update_portion(self, item, portion_grams):
+        """Change the portion of an item in this menu, keeping the running totals in step"""
+        if not any(existing is item for existing in self.items):
+            raise ValueError(f"Item {item.food.item_code} is not in this menu")
+        self._update_totals(item, -1)
+        item._set_portion(portion_grams)
+        self._update_totals(item, 1)
+    
+    def _update_totals(self, item, sign):
+        """Apply an added (sign=1) or removed (sign=-1) item to the running totals"""
+        nutrition = item.get_nutrition()
+        self._calories += sign * nutrition.calories
+        self._protein += sign * nutrition.protein
+        self._carbs += sign * nutrition.carbs
+        self._fat += sign * nutrition.fat
+        self._total_nutrition = None
+        
+        self._adjust_count(self._categories, item.food.category, sign)
+        self._adjust_count(self._subcategories, item.food.subcategory, sign)
         
-        total = self.items[0].get_nutrition()
-        for item in self.items[1:]:
-            total = total.add(item.get_nutrition())
-        return total
+        if self.food_classifier:
+            if self.food_classifier.is_high_sugar(item.food):
+                self._sugar_calories += sign * nutrition.calories
+            if self.food_classifier.is_processed(item.food):
+                self._processed_count += sign
+        
+        # Avoid float drift once the menu is empty again
+        if not self.items:
+            self._calories = self._protein = self._carbs = self._fat = 0.0
+            self._sugar_calories = 0.0
+    
+    @staticmethod
+    def _adjust_count(counts, key, sign):
+        count = counts.get(key, 0) + sign
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+    
+    def get_total_nutrition(self):
+        """Get total nutrition for the menu"""
+        if self._total_nutrition is None:
+            self._total_nutrition = NutritionInfo(self._calories, self._protein, self._carbs, self._fat)
+        return self._total_nutrition
+    
+    def get_sugar_calories(self, food_classifier):
+        """Get calories from high-sugar items"""
+        if food_classifier is self.food_classifier:
+            return self._sugar_calories
+        return sum(item.get_nutrition().calories for item in self.items
+                   if food_classifier.is_high_sugar(item.food))
+    
+    def get_processed_count(self, food_classifier):
+        """Get number of processed items"""
+        if food_classifier is self.food_classifier:
+            return self._processed_count
+        return sum(1 for item in self.items if food_classifier.is_processed(item.food))
     
     def get_categories(self):
         """Get category distribution"""
-        categories = {}
-        for item in self.items:
-            category = item.food.category
-            categories[category] = categories.get(category, 0) + 1
-        return categories
+        return dict(self._categories)
     
     def get_subcategories(self):
         """Get subcategory distribution"""
-        subcategories = {}
-        for item in self.items:
-            subcategory = item.food.subcategory
-            subcategories[subcategory] = subcategories.get(subcategory, 0) + 1
-        return subcategories
+        return dict(self._subcategories)
     
     def get_total_cost(self, price_provider=None):
         """Calculate total cost if price provider is available"""
@@ -0,0 +1,77 @@
+# src/models/price_matrix.py - Item x supermarket price matrix model
+
+import numpy as np
+
+class PriceMatrix:
+    """Responsible ONLY for holding current per-100g prices as an item x supermarket NumPy matrix"""
+
+    def __init__(self, item_codes, supermarkets, prices, version=0, last_loaded_at=None):
+        self.item_codes = [str(code) for code in item_codes]
+        self.supermarkets = list(supermarkets)
+        self.version = version
+        self.last_loaded_at = last_loaded_at  # Latest price load included in the matrix
+        self.index_by_code = {code: row for row, code in enumerate(self.item_codes)}
+
+        # One extra all-NaN row that unknown item codes gather from
+        prices = np.asarray(prices, dtype=np.float64).reshape(len(self.item_codes), len(self.supermarkets))
+        self._prices = np.vstack([prices, np.full((1, len(self.supermarkets)), np.nan)])
+
+    @classmethod
+    def from_rows(cls, price_rows, supermarkets, version=0, last_loaded_at=None):
+        """Build a matrix from (item_code, supermarket, price) rows; missing prices are NaN"""
+        columns = {name: column for column, name in enumerate(supermarkets)}
+        index_by_code = {}
+        rows, cols, values = [], [], []
+        for row in price_rows:
+            column = columns.get(row['supermarket'])
+            if column is None:
+                continue
+            item_code = str(row['item_code'])
+            rows.append(index_by_code.setdefault(item_code, len(index_by_code)))
+            cols.append(column)
+            values.append(float(row['price']))
+
+        prices = np.full((len(index_by_code), len(columns)), np.nan)
+        prices[rows, cols] = values
+        return cls(list(index_by_code), supermarkets, prices, version, last_loaded_at)
+
+    @property
+    def prices(self):
+        """Per-100g prices (items x supermarkets), NaN where an item is not sold"""
+        return self._prices[:-1]
+
+    @property
+    def available(self):
+        """Mask of the prices that exist"""
+        return ~np.isnan(self.prices)
+
+    def rows_for(self, item_codes):
+        """Get matrix rows for item codes (unknown codes map to the all-NaN row)"""
+        missing = len(self.item_codes)
+        return np.array([self.index_by_code.get(str(code), missing) for code in item_codes], dtype=np.intp)
+
+    def item_costs(self, item_codes, portion_grams):
+        """Get the cost of each portion at each supermarket (items x supermarkets, NaN where not sold)"""
+        return self.row_costs(self.rows_for(item_codes), portion_grams)
+
+    def row_costs(self, rows, portion_grams):
+        """Get portion costs for matrix rows as returned by rows_for"""
+        portions = np.asarray(portion_grams, dtype=np.float64).reshape(-1, 1)
+        return self._prices[rows] * (portions / 100.0)
+
+    def item_prices(self, item_codes, supermarket=None):
+        """Get per-100g prices at one supermarket, or the cheapest anywhere when none is given (NaN where not sold)"""
+        prices = self._prices[self.rows_for(item_codes)]
+        if supermarket is not None:
+            if supermarket not in self.supermarkets:
+                raise ValueError(f"Unknown supermarket: {supermarket}")
+            return prices[:, self.supermarkets.index(supermarket)].copy()
+        if not self.supermarkets:
+            return np.full(len(prices), np.nan)
+        return np.fmin.reduce(prices, axis=1)  # fmin skips NaN; all-NaN rows stay NaN
+
+    def __len__(self):
+        return len(self.item_codes)
+
+    def __repr__(self):
+        return f"PriceMatrix(items={len(self.item_codes)}, supermarkets={len(self.supermarkets)}, version={self.version})"
\ No newline at end of file
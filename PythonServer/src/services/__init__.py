@@ -2,11 +2,20 @@
 
 from .food_classifier import FoodClassifier
 from .portion_calculator import PortionCalculator
+from .portion_optimizer import PortionOptimizer
+from .food_search_index import FoodSearchIndex, SearchResult, normalize_text
+from .shopping_optimizer import ShoppingOptimizer, ShoppingPlan
 from .meal_rules import MealRules, BreakfastRules, LunchRules, DinnerRules, SnackRules, MealRulesFactory
 
 __all__ = [
     'FoodClassifier',
     'PortionCalculator',
+    'PortionOptimizer',
+    'FoodSearchIndex',
+    'SearchResult',
+    'normalize_text',
+    'ShoppingOptimizer',
+    'ShoppingPlan',
     'MealRules',
     'BreakfastRules',
     'LunchRules', 
@@ -5,33 +5,75 @@ from config import Config
 class FoodClassifier:
     """Responsible ONLY for classifying foods"""
     
+    # Classification flag bits
+    HIGH_SUGAR = 1 << 0
+    PROTEIN = 1 << 1
+    FIBER = 1 << 2
+    PROCESSED = 1 << 3
+    WHOLESOME = 1 << 4
+    
     def __init__(self, config=None):
         if config is None:
             config = Config()
         
         self.classifications = config.FOOD_CLASSIFICATIONS
         self.min_protein_density = config.MIN_PROTEIN_DENSITY
+        
+        # Set lookups instead of list scans
+        self._subcategory_flags = {}
+        for name, flag in (('high_sugar', self.HIGH_SUGAR), ('protein', self.PROTEIN), ('fiber', self.FIBER),
+                           ('processed', self.PROCESSED), ('wholesome', self.WHOLESOME)):
+            for subcategory in self.classifications.get(name, []):
+                self._subcategory_flags[subcategory] = self._subcategory_flags.get(subcategory, 0) | flag
+        
+        # (food, flags, health score) per item code; a refreshed Food object is reclassified
+        self._classifications = {}
+    
+    def __getstate__(self):
+        # Worker processes rebuild the cache for their own foods
+        state = self.__dict__.copy()
+        state['_classifications'] = {}
+        return state
+    
+    def get_flags(self, food):
+        """Get the classification bitmask of a food (computed once per food)"""
+        return self._get_classification(food)[1]
+    
+    def _get_classification(self, food):
+        """Get (food, flags, health score) for a food"""
+        classification = self._classifications.get(food.item_code)
+        if classification is None or classification[0] is not food:
+            flags = self._compute_flags(food)
+            classification = (food, flags, self._compute_food_score(food, flags))
+            self._classifications[food.item_code] = classification
+        return classification
+    
+    def _compute_flags(self, food):
+        """Compute the classification bitmask of a food"""
+        flags = self._subcategory_flags.get(food.subcategory, 0)
+        if food.nutrition_per_100g.protein >= self.min_protein_density:
+            flags |= self.PROTEIN
+        return flags
     
     def is_high_sugar(self, food):
         """Check if food is high in sugar"""
-        return food.subcategory in self.classifications['high_sugar']
+        return bool(self.get_flags(food) & self.HIGH_SUGAR)
     
     def is_protein_source(self, food):
         """Check if food is a protein source"""
-        return (food.subcategory in self.classifications['protein'] or 
-                food.nutrition_per_100g.protein >= self.min_protein_density)
+        return bool(self.get_flags(food) & self.PROTEIN)
     
     def is_fiber_source(self, food):
         """Check if food is a fiber source"""
-        return food.subcategory in self.classifications['fiber']
+        return bool(self.get_flags(food) & self.FIBER)
     
     def is_processed(self, food):
         """Check if food is processed"""
-        return food.subcategory in self.classifications['processed']
+        return bool(self.get_flags(food) & self.PROCESSED)
     
     def is_wholesome(self, food):
         """Check if food is wholesome/healthy"""
-        return food.subcategory in self.classifications['wholesome']
+        return bool(self.get_flags(food) & self.WHOLESOME)
     
     def get_food_type(self, food):
         """Get the primary type of the food"""
@@ -63,20 +105,24 @@ class FoodClassifier:
     
     def get_food_score(self, food):
         """Get a health score for the food (0-100)"""
+        return self._get_classification(food)[2]
+    
+    def _compute_food_score(self, food, flags):
+        """Compute the health score of a food from its flags"""
         score = 50  # Base score
         
         # Bonuses
-        if self.is_wholesome(food):
+        if flags & self.WHOLESOME:
             score += 30
-        if self.is_protein_source(food):
+        if flags & self.PROTEIN:
             score += 20
-        if self.is_fiber_source(food):
+        if flags & self.FIBER:
             score += 15
         
         # Penalties
-        if self.is_high_sugar(food):
+        if flags & self.HIGH_SUGAR:
             score -= 25
-        if self.is_processed(food):
+        if flags & self.PROCESSED:
             score -= 20
         
         # Sodium penalty
@@ -103,15 +149,16 @@ class FoodClassifier:
         }
         
         for item in menu.items:
-            if self.is_wholesome(item.food):
+            flags = self.get_flags(item.food)
+            if flags & self.WHOLESOME:
                 classification['wholesome'] += 1
-            if self.is_protein_source(item.food):
+            if flags & self.PROTEIN:
                 classification['protein'] += 1
-            if self.is_fiber_source(item.food):
+            if flags & self.FIBER:
                 classification['fiber'] += 1
-            if self.is_processed(item.food):
+            if flags & self.PROCESSED:
                 classification['processed'] += 1
-            if self.is_high_sugar(item.food):
+            if flags & self.HIGH_SUGAR:
                 classification['high_sugar'] += 1
         
         return classification
\ No newline at end of file
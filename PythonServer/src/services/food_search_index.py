@@ -0,0 +1,156 @@
+# src/services/food_search_index.py - In-memory food search index
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+import numpy as np
+
+# One page of ranked matches; total counts every match, not just this page
+SearchResult = namedtuple('SearchResult', ['foods', 'total'])
+
+# Final letter forms are indexed as their regular forms (ם -> מ, ...)
+_FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+
+# Anything that is not a letter or digit separates words (maqaf, geresh, quotes, ...)
+_SEPARATORS = re.compile(r'[^\w]+|_')
+
+def normalize_text(text):
+    """Normalize text for matching: no niqqud or cantillation, no final forms, no punctuation"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    words = _SEPARATORS.sub(' ', stripped.translate(_FINAL_LETTERS).lower()).split()
+    return ' '.join(words)
+
+class FoodSearchIndex:
+    """Responsible ONLY for ranked substring search over a food catalog's names
+
+    Every word of the query must appear (as a substring, after normalization) in the
+    food's name, category or subcategory. N-gram postings point at the catalog's
+    distinct words, so a query word is verified against a few vocabulary entries
+    rather than every food, and matching and ranking are then done with NumPy.
+    """
+
+    # Field weights when ranking a matched query word
+    FIELDS = ('name', 'subcategory', 'category')
+    FIELD_WEIGHTS = (3.0, 1.5, 1.0)
+
+    # Bonuses for matching at the start of a word, and for the name starting with the query
+    WORD_START_BONUS = 0.5
+    NAME_PREFIX_BONUS = 2.0
+
+    MIN_QUERY_LENGTH = 2
+
+    def __init__(self, catalog, max_cached_queries=256):
+        self.foods = list(catalog.foods)
+        self.version = catalog.version
+        count = len(self.foods)
+
+        vocabulary = {}
+        field_words = []  # Per field: vocabulary id -> rows using that word
+        for field in self.FIELDS:
+            word_rows = defaultdict(list)
+            for row, food in enumerate(self.foods):
+                for word in set(normalize_text(getattr(food, field)).split()):
+                    word_id = vocabulary.setdefault(word, len(vocabulary))
+                    word_rows[word_id].append(row)
+            field_words.append({word_id: np.array(rows, dtype=np.intp) for word_id, rows in word_rows.items()})
+        self._field_words = field_words
+        self._vocabulary = list(vocabulary)
+
+        # Bigram postings answer two-letter words, trigram postings everything longer
+        postings = defaultdict(list)
+        for word_id, word in enumerate(self._vocabulary):
+            for n in (2, 3):
+                for gram in {word[i:i + n] for i in range(len(word) - n + 1)}:
+                    postings[gram].append(word_id)
+        self._postings = {gram: np.array(ids, dtype=np.intp) for gram, ids in postings.items()}
+
+        # Names in sorted order: prefix matches are a contiguous range, and ties rank alphabetically
+        names = [normalize_text(food.name) for food in self.foods]
+        self._name_order = sorted(range(count), key=names.__getitem__)
+        self._sorted_names = [names[row] for row in self._name_order]
+        self._name_ranks = np.empty(count, dtype=np.intp)
+        self._name_ranks[self._name_order] = np.arange(count)
+        self._name_lengths = np.array([len(name) for name in names], dtype=np.intp)
+
+        # Ranked rows per normalized query, so paging through results does not re-rank
+        self._ranked_rows = lru_cache(maxsize=max_cached_queries)(self._rank)
+
+    def search(self, query, offset=0, limit=50):
+        """Get one page of ranked matches for a query"""
+        normalized = normalize_text(query)
+        if len(normalized.replace(' ', '')) < self.MIN_QUERY_LENGTH:
+            return SearchResult([], 0)
+
+        rows = self._ranked_rows(normalized)
+        offset = max(0, offset)
+        page = rows[offset:offset + max(0, limit)]
+        return SearchResult([self.foods[row] for row in page.tolist()], len(rows))
+
+    def _rank(self, normalized):
+        """Get all matching rows for a normalized query, best first"""
+        count = len(self.foods)
+        scores = np.zeros(count)
+        matched = np.ones(count, dtype=bool)
+
+        for word in normalized.split():
+            word_ids, start_ids = self._matching_words(word)
+            best = np.zeros(count)
+            for words, weight in zip(self._field_words, self.FIELD_WEIGHTS):
+                field_score = np.zeros(count)
+                field_score[self._rows_with(words, word_ids)] = weight
+                field_score[self._rows_with(words, start_ids)] = weight + self.WORD_START_BONUS
+                np.maximum(best, field_score, out=best)
+            matched &= best > 0
+            if not matched.any():
+                return np.empty(0, dtype=np.intp)
+            scores += best
+
+        # Names starting with the whole query
+        lo = bisect_left(self._sorted_names, normalized)
+        hi = bisect_left(self._sorted_names, normalized + '\uffff')
+        scores[self._name_order[lo:hi]] += self.NAME_PREFIX_BONUS
+
+        rows = np.flatnonzero(matched)
+        order = np.lexsort((self._name_ranks[rows], self._name_lengths[rows], -scores[rows]))
+        return rows[order]
+
+    def _matching_words(self, word):
+        """Get vocabulary ids containing the word, and those starting with it"""
+        n = 2 if len(word) <= 2 else 3
+        grams = {word[i:i + n] for i in range(len(word) - n + 1)}
+        if not grams:
+            # Single characters: check the whole vocabulary
+            candidates = range(len(self._vocabulary))
+        else:
+            lists = []
+            for gram in grams:
+                ids = self._postings.get(gram)
+                if ids is None:
+                    return [], []
+                lists.append(ids)
+            lists.sort(key=len)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            candidates = candidates.tolist()
+
+        # Every n-gram present does not guarantee the whole word is; verify on the (small) vocabulary
+        word_ids = [i for i in candidates if word in self._vocabulary[i]]
+        start_ids = [i for i in word_ids if self._vocabulary[i].startswith(word)]
+        return word_ids, start_ids
+
+    @staticmethod
+    def _rows_with(field_words, word_ids):
+        """Get the rows whose field uses any of the given vocabulary words"""
+        rows = [field_words[i] for i in word_ids if i in field_words]
+        if not rows:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(rows)
+
+    def __len__(self):
+        return len(self.foods)
\ No newline at end of file
@@ -26,6 +26,10 @@ class MealRules:
         """Get required food types for this meal"""
         return ['protein']
     
+    def get_daily_share(self):
+        """Get this meal's share of the daily nutrition target"""
+        return 0.25
+    
     def is_appropriate(self, food):
         """Check if food is appropriate for this meal"""
         category = food.category
@@ -61,6 +65,9 @@ class BreakfastRules(MealRules):
     
     def get_required_food_types(self):
         return self.config.MEAL_RULES['breakfast']['required_types']
+    
+    def get_daily_share(self):
+        return self.config.MEAL_RULES['breakfast'].get('daily_share', 0.25)
 
 class LunchRules(MealRules):
     """Lunch-specific rules"""
@@ -76,6 +83,9 @@ class LunchRules(MealRules):
     
     def get_required_food_types(self):
         return self.config.MEAL_RULES['lunch']['required_types']
+    
+    def get_daily_share(self):
+        return self.config.MEAL_RULES['lunch'].get('daily_share', 0.25)
 
 class DinnerRules(MealRules):
     """Dinner-specific rules"""
@@ -91,6 +101,9 @@ class DinnerRules(MealRules):
     
     def get_required_food_types(self):
         return self.config.MEAL_RULES['dinner']['required_types']
+    
+    def get_daily_share(self):
+        return self.config.MEAL_RULES['dinner'].get('daily_share', 0.25)
 
 class SnackRules(MealRules):
     """Snack-specific rules"""
@@ -106,6 +119,9 @@ class SnackRules(MealRules):
     
     def get_required_food_types(self):
         return self.config.MEAL_RULES['snacks']['required_types']
+    
+    def get_daily_share(self):
+        return self.config.MEAL_RULES['snacks'].get('daily_share', 0.25)
 
 class MealRulesFactory:
     """Factory to create meal rules - easily extensible"""
@@ -125,6 +141,18 @@ class MealRulesFactory:
             return MealRules(config)  # Default rules
         return rule_class(config)
     
+    @staticmethod
+    def get_daily_split(meal_types=None, config=None):
+        """Get each meal type's share of the daily target, normalized to sum to 1"""
+        meal_types = meal_types or MealRulesFactory.get_available_meal_types()
+        shares = {meal_type: max(0.0, MealRulesFactory.create_rules(meal_type, config).get_daily_share())
+                  for meal_type in meal_types}
+        
+        total = sum(shares.values())
+        if total <= 0:
+            return {meal_type: 1.0 / len(shares) for meal_type in shares}
+        return {meal_type: share / total for meal_type, share in shares.items()}
+    
     @staticmethod
     def get_available_meal_types():
         """Get list of available meal types"""
@@ -0,0 +1,82 @@
+# src/services/portion_optimizer.py - Joint portion optimization service
+
+import numpy as np
+from config import Config
+
+try:
+    from scipy.optimize import linprog
+except ImportError:  # SciPy is optional, builders fall back to heuristic portions
+    linprog = None
+
+class PortionOptimizer:
+    """Responsible ONLY for solving all portions of a menu at once"""
+
+    MACROS = ('calories', 'protein', 'carbs', 'fat')
+
+    def __init__(self, portion_calculator, config=None):
+        if config is None:
+            config = Config()
+
+        self.portion_calculator = portion_calculator
+        weights = getattr(config, 'MACRO_SCORE_WEIGHTS', {})
+        self.macro_weights = np.array([weights.get(macro, 1.0) for macro in self.MACROS])
+
+    @staticmethod
+    def is_available():
+        """Check if the LP solver can be used"""
+        return linprog is not None
+
+    def optimize(self, foods, target_nutrition, fixed_portions=None, max_calories_per_item=None, prices=None, max_cost=None):
+        """Solve portions (grams) for the given foods, or None if no solution
+
+        max_calories_per_item caps each free item's calories through its upper bound, and
+        prices (per 100g, aligned to foods) with max_cost bound the menu cost, so the
+        optimum already satisfies both (after rounding to whole grams).
+        """
+        if not foods or linprog is None:
+            return None
+
+        n = len(foods)
+        targets = np.array([getattr(target_nutrition, macro) for macro in self.MACROS])
+
+        # Macro content per gram: rows are macros, columns are foods
+        per_gram = np.array([
+            [getattr(food.nutrition_per_100g, macro) / 100.0 for food in foods]
+            for macro in self.MACROS
+        ])
+
+        # Minimize the weighted sum of relative macro errors (same form as MenuScorer):
+        #   per_gram @ portions - over + under = targets, over/under >= 0
+        error_costs = self.macro_weights / np.maximum(targets, 1.0)
+        costs = np.concatenate([np.zeros(n), error_costs, error_costs])
+        equality = np.hstack([per_gram, -np.eye(len(self.MACROS)), np.eye(len(self.MACROS))])
+
+        # Foods with fixed portions (e.g. required items) are pinned
+        fixed_portions = fixed_portions or {}
+        bounds = []
+        for food in foods:
+            if food.item_code in fixed_portions:
+                portion = fixed_portions[food.item_code]
+                bounds.append((portion, portion))
+            else:
+                limits = self.portion_calculator.get_portion_limits(food)
+                upper = limits['max']
+                if max_calories_per_item is not None and food.nutrition_per_100g.calories > 0:
+                    # Whole grams, so rounding the solution cannot cross the cap
+                    upper = min(upper, np.floor(max_calories_per_item / food.nutrition_per_100g.calories * 100))
+                bounds.append((limits['min'], max(limits['min'], upper)))
+        bounds.extend([(0, None)] * (2 * len(self.MACROS)))
+
+        # Menu cost as one inequality row, with slack for rounding each portion by up to half a gram
+        inequality, upper_limits = None, None
+        if max_cost is not None and prices is not None:
+            per_gram_prices = np.asarray(prices, dtype=np.float64) / 100.0
+            inequality = np.concatenate([per_gram_prices, np.zeros(2 * len(self.MACROS))])[np.newaxis, :]
+            upper_limits = [max_cost - 0.5 * per_gram_prices.sum()]
+
+        result = linprog(costs, A_ub=inequality, b_ub=upper_limits, A_eq=equality, b_eq=targets, bounds=bounds, method='highs')
+        if not result.success:
+            return None
+
+        return [fixed_portions.get(food.item_code) or self.portion_calculator.apply_portion_limits(food, portion)
+                for food, portion in zip(foods, result.x[:n])]
@@ -0,0 +1,87 @@
+# src/services/shopping_optimizer.py - Store-count-aware shopping plan optimization
+
+from collections import namedtuple
+import numpy as np
+
+# columns: chosen supermarket columns; item_columns: column each item is bought at (-1 if not covered)
+ShoppingPlan = namedtuple('ShoppingPlan', ['columns', 'item_columns', 'items_cost', 'visit_cost', 'covered'])
+
+class ShoppingOptimizer:
+    """Responsible ONLY for choosing which supermarkets to buy a menu's items at
+
+    Minimizes item cost plus a per-store visit cost, optionally with at most max_stores
+    stores, exactly: a branch-and-bound over store subsets. Each node's bound is what
+    the items would cost if every store not yet ruled out were visited, so for a handful
+    of supermarkets only a few dozen nodes are ever expanded.
+    """
+
+    def optimize(self, costs, store_visit_cost=0.0, max_stores=None):
+        """Get the optimal plan for an items x supermarkets cost matrix (NaN where not sold)
+
+        Plans that cover more items always win; among those, the lowest item cost plus
+        visit cost. Items sold nowhere are left uncovered. Returns None without stores.
+        """
+        costs = np.asarray(costs, dtype=np.float64)
+        item_count, store_count = costs.shape
+        if store_count == 0:
+            return None
+        max_stores = store_count if max_stores is None else max(1, min(max_stores, store_count))
+
+        # Missing an item costs more than any plan that covers it could
+        sold = ~np.isnan(costs)
+        missing_cost = float(np.where(sold, costs, 0.0).max(axis=1, initial=0.0).sum()) + store_visit_cost * store_count + 1.0
+        penalized = np.where(sold, costs, missing_cost)
+
+        # Explore the cheapest stores first so good plans prune early
+        order = np.argsort(penalized.sum(axis=0), kind='stable')
+        ordered = penalized[:, order].T
+        suffix_min = np.full((store_count + 1, item_count), missing_cost)
+        for i in range(store_count - 1, -1, -1):
+            suffix_min[i] = np.minimum(suffix_min[i + 1], ordered[i])
+
+        best = [np.inf, ()]
+
+        def search(start, chosen, current):
+            # Extend the chosen stores with one later store at a time (each subset once)
+            visit_cost = store_visit_cost * (len(chosen) + 1)
+            for i in range(start, store_count):
+                # The bound only grows with i, so later stores are pruned too
+                if np.minimum(current, suffix_min[i]).sum() + visit_cost >= best[0]:
+                    break
+                extended = np.minimum(current, ordered[i])
+                value = extended.sum() + visit_cost
+                if value < best[0]:
+                    best[0], best[1] = value, chosen + (i,)
+                if len(chosen) + 1 < max_stores:
+                    search(i + 1, chosen + (i,), extended)
+
+        search(0, (), np.full(item_count, missing_cost))
+
+        columns = np.sort(order[list(best[1])])
+        return self._make_plan(costs, columns, store_visit_cost)
+
+    def savings_by_store_count(self, costs):
+        """Get the optimal plan for each number of stores, up to where more stores stop saving
+
+        Returns (store_count, plan) pairs; visit costs are ignored so each step shows what
+        one more store saves on the items alone.
+        """
+        costs = np.asarray(costs, dtype=np.float64)
+        if costs.shape[1] == 0:
+            return []
+
+        # Beyond the stores holding each item's lowest price, another store saves nothing
+        sold = ~np.isnan(costs).all(axis=1)
+        useful_stores = max(1, np.unique(np.nanargmin(costs[sold], axis=1)).size) if sold.any() else 1
+
+        return [(stores, self.optimize(costs, 0.0, stores)) for stores in range(1, useful_stores + 1)]
+
+    def _make_plan(self, costs, columns, store_visit_cost):
+        """Assign each item to its cheapest chosen store"""
+        chosen = costs[:, columns]
+        covered = ~np.isnan(chosen).all(axis=1)
+        item_columns = np.full(len(costs), -1, dtype=np.intp)
+        if covered.any():
+            item_columns[covered] = columns[np.nanargmin(chosen[covered], axis=1)]
+        items_cost = float(costs[np.flatnonzero(covered), item_columns[covered]].sum())
+        return ShoppingPlan(columns, item_columns, items_cost, store_visit_cost * len(columns), covered)
\ No newline at end of file
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# test_async_database.py - Tests for the async database path (skipped when no database is reachable)
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("asyncpg")
+
+from data.async_database_manager import AsyncDatabaseManager
+from data.async_sql_providers import AsyncSqlFoodProvider, AsyncSqlPriceComparison
+
+SAMPLE_CODES_QUERY = """
+SELECT item_code FROM products
+WHERE is_active = true AND can_include_in_menu = true
+ORDER BY item_code
+LIMIT 5
+"""
+
+def run_with_database(test):
+    """Run an async test against a connected manager, skipping when the database is unreachable"""
+    async def runner():
+        db_manager = AsyncDatabaseManager()
+        db_manager.max_retries = 1
+        if not await db_manager.connect():
+            pytest.skip("PostgreSQL is not reachable")
+        try:
+            return await test(db_manager)
+        finally:
+            await db_manager.close()
+
+    return asyncio.run(runner())
+
+async def sample_codes(db_manager):
+    rows = await db_manager.execute_query(SAMPLE_CODES_QUERY)
+    if not rows:
+        pytest.skip("No menu products in the database")
+    return [row['item_code'] for row in rows]
+
+def test_get_foods_by_codes_keeps_order_and_marks_unknown():
+    async def check(db_manager):
+        provider = AsyncSqlFoodProvider(db_manager)
+        codes = await sample_codes(db_manager)
+        requested = list(reversed(codes)) + ['__no_such_item__']
+
+        foods = await provider.get_foods_by_codes(requested)
+
+        assert len(foods) == len(requested)
+        assert foods[-1] is None
+        for code, food in zip(requested[:-1], foods[:-1]):
+            assert food is not None
+            assert food.item_code == code
+            single = await provider.get_food_by_code(code)
+            assert single.item_code == food.item_code
+
+    run_with_database(check)
+
+def test_get_foods_by_codes_empty():
+    async def check(db_manager):
+        provider = AsyncSqlFoodProvider(db_manager)
+        assert await provider.get_foods_by_codes([]) == []
+
+    run_with_database(check)
+
+def test_search_food_page_total_matches_all_results():
+    async def check(db_manager):
+        provider = AsyncSqlFoodProvider(db_manager)
+        codes = await sample_codes(db_manager)
+        food = await provider.get_food_by_code(codes[0])
+        query_text = food.name[:3]
+
+        first_page = await provider.search_food_page(query_text, 0, 2)
+        assert first_page.total >= 1
+        assert len(first_page.foods) <= 2
+
+        everything = await provider.search_food_page(query_text, 0, first_page.total + 10)
+        assert everything.total == first_page.total
+        assert len(everything.foods) == first_page.total
+        assert [f.item_code for f in first_page.foods] == [f.item_code for f in everything.foods[:2]]
+
+        past_end = await provider.search_food_page(query_text, first_page.total, 10)
+        assert past_end.foods == []
+        assert past_end.total == first_page.total
+
+        assert (await provider.search_food_page("a", 0, 10)).total == 0
+
+    run_with_database(check)
+
+def test_batch_prices_match_sync_provider():
+    pytest.importorskip("psycopg2")
+    from data.database_manager import DatabaseManager
+    from data.sql_providers import SqlPriceComparison
+
+    sync_db = DatabaseManager()
+    sync_db.max_retries = 1
+    if not sync_db.connect():
+        pytest.skip("PostgreSQL is not reachable")
+
+    async def check(db_manager):
+        codes = await sample_codes(db_manager)
+        menus_items = [
+            [{'item_code': code, 'portion_grams': 100 + 25 * i} for i, code in enumerate(codes)],
+            [{'item_code': codes[0], 'portion_grams': 80}],
+            [],
+        ]
+
+        price_comparison = AsyncSqlPriceComparison(db_manager)
+        await price_comparison.load_supermarkets()
+        async_results = await price_comparison.compare_menu_prices_batch(menus_items)
+        sync_results = SqlPriceComparison(sync_db).compare_menu_prices_batch(menus_items)
+
+        assert len(async_results) == len(sync_results) == len(menus_items)
+        assert 'error' in async_results[2] and 'error' in sync_results[2]
+        for async_result, sync_result in zip(async_results[:2], sync_results[:2]):
+            assert 'error' not in async_result and 'error' not in sync_result
+            assert set(async_result['supermarket_totals']) == set(sync_result['supermarket_totals'])
+            for supermarket, total in async_result['supermarket_totals'].items():
+                assert total == pytest.approx(sync_result['supermarket_totals'][supermarket], abs=0.011)
+
+    try:
+        run_with_database(check)
+    finally:
+        sync_db.close()
\ No newline at end of file
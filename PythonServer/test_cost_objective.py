@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# test_cost_objective.py - Cost-aware generation must price menus like the price comparison does
+
+import random
+
+import numpy as np
+import pytest
+
+from data.sql_providers import build_price_lookup, summarize_menu_prices
+from src.algorithm import MenuGenerator
+from src.algorithm.cost_objective import CostObjective
+from src.models import MenuItem, NutritionInfo, PriceMatrix
+from src.services import PortionCalculator, MealRulesFactory
+
+SUPERMARKETS = ['a', 'b', 'c']
+TARGET = NutritionInfo(700, 50, 70, 23)
+
+class FakeFoodProvider:
+    def __init__(self, foods):
+        self.foods = foods
+
+    def get_all_foods(self):
+        return self.foods
+
+class FakePriceProvider:
+    def __init__(self, price_matrix):
+        self.price_matrix = price_matrix
+
+@pytest.fixture
+def price_rows(sample_foods):
+    rng = random.Random(5)
+    return [
+        {'item_code': food.item_code, 'supermarket': supermarket, 'price': round(rng.uniform(0.5, 8.0), 2)}
+        for food in sample_foods for supermarket in SUPERMARKETS if rng.random() < 0.85
+    ]
+
+@pytest.fixture
+def price_matrix(price_rows):
+    return PriceMatrix.from_rows(price_rows, SUPERMARKETS, version=1)
+
+@pytest.fixture
+def make_generator(config, food_classifier, sample_foods, price_matrix):
+    def make(price_provider=FakePriceProvider(price_matrix)):
+        return MenuGenerator(FakeFoodProvider(sample_foods), food_classifier, PortionCalculator(config),
+                             MealRulesFactory(), config, workers=1, price_provider=price_provider)
+    return make
+
+def naive_cost(menu, price_lookup, supermarket=None):
+    """Price a menu item by item from the latest price rows (cheapest anywhere without a supermarket)"""
+    total = 0.0
+    for item in menu.items:
+        prices = price_lookup.get(item.food.item_code, {})
+        if supermarket is not None:
+            prices = {supermarket: prices[supermarket]} if supermarket in prices else {}
+        if not prices:
+            return None
+        total += min(info['price'] for info in prices.values()) * item.portion_grams / 100.0
+    return total
+
+@pytest.mark.parametrize("supermarket", [None, 'b'])
+def test_menu_costs_match_price_rows(make_generator, price_rows, supermarket):
+    generator = make_generator()
+    price_lookup = build_price_lookup(price_rows)
+
+    menus = generator.generate_menu(TARGET, 'lunch', 5, attempts=60, seed=3, cost_weight=0.5, supermarket=supermarket)
+
+    assert menus
+    objective = menus.cost_objective
+    for menu, _ in menus:
+        cost = objective.menu_cost(menu)
+        assert cost == pytest.approx(naive_cost(menu, price_lookup, supermarket))
+        if supermarket is not None:
+            menu_items = [{'item_code': item.food.item_code, 'portion_grams': item.portion_grams} for item in menu.items]
+            totals = summarize_menu_prices(menu_items, price_lookup, SUPERMARKETS)['supermarket_totals']
+            assert cost == pytest.approx(totals[supermarket], abs=0.006)
+
+def test_budget_is_respected(make_generator, price_rows):
+    generator = make_generator()
+    price_lookup = build_price_lookup(price_rows)
+
+    menus = generator.generate_menu(TARGET, 'lunch', 5, attempts=80, seed=4, budget=8.0)
+
+    assert menus
+    for menu, _ in menus:
+        assert naive_cost(menu, price_lookup) <= 8.0 + 1e-9
+
+def test_menu_budget_matches_naive_tracking(make_generator, price_matrix, config):
+    generator = make_generator()
+    pool = generator._get_suitable_foods('dinner')
+    objective = CostObjective.for_pool(pool, price_matrix, PortionCalculator(config)).configure(TARGET, budget=6.0)
+    budget = objective.start()
+
+    prices = price_matrix.item_prices([food.item_code for food in pool.foods])
+    min_portions = [PortionCalculator(config).get_portion_limits(food)['min'] for food in pool.foods]
+    remaining = 6.0
+    rng = np.random.default_rng(0)
+    for row in rng.choice(len(pool), size=4, replace=False):
+        expected_mask = [price == price and price * min_portion / 100.0 <= remaining
+                         for price, min_portion in zip(prices.tolist(), min_portions)]
+        assert budget.admissible_mask().tolist() == expected_mask
+
+        if prices[row] == prices[row]:
+            portion = budget.fit_portion(row, 150, min_portions[row])
+            assert portion == max(min_portions[row], min(150, int(remaining / prices[row] * 100.0)))
+            budget.add(row, MenuItem(pool.foods[row], portion))
+            remaining -= prices[row] * portion / 100.0
+        assert budget.remaining == pytest.approx(remaining)
+
+def test_prices_do_not_change_plain_generation(make_generator):
+    with_prices = make_generator().generate_menu(TARGET, 'lunch', 5, attempts=40, seed=7)
+    without_prices = make_generator(price_provider=None).generate_menu(TARGET, 'lunch', 5, attempts=40, seed=7)
+
+    assert [score for _, score in with_prices] == [score for _, score in without_prices]
+    assert [[(item.food.item_code, item.portion_grams) for item in menu.items] for menu, _ in with_prices] == \
+        [[(item.food.item_code, item.portion_grams) for item in menu.items] for menu, _ in without_prices]
+
+def test_cost_aware_generation_needs_prices(make_generator):
+    with pytest.raises(ValueError):
+        make_generator(price_provider=None).generate_menu(TARGET, 'lunch', 5, attempts=10, seed=1, budget=5.0)
\ No newline at end of file
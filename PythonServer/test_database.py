@@ -51,6 +51,9 @@ def test_database_connection():
         print(f"✅ Price comparison: {len(supermarkets)} supermarkets available")
         print(f"   Supermarkets: {', '.join(supermarkets)}")
         
+        pool_stats = db_manager.get_pool_stats()
+        print(f"✅ Connection pool: {pool_stats['created']} connections opened for {pool_stats['checkouts']} checkouts")
+        
         print("6. Cleaning up...")
         db_manager.close()
         
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# test_food_filter_service.py - Cached candidate pools must match filtering the food list directly
+
+import numpy as np
+import pytest
+
+from src.algorithm import FoodFilterService
+from src.filters import NutritionalSoundnessFilter, CategoryPreferenceFilter
+from src.models import FoodCatalog
+from src.services import MealRulesFactory
+
+MEAL_TYPES = [None, 'breakfast', 'lunch', 'dinner', 'snacks']
+
+@pytest.fixture
+def filter_service(config, food_classifier):
+    return FoodFilterService(
+        NutritionalSoundnessFilter(config),
+        CategoryPreferenceFilter(config),
+        MealRulesFactory(),
+        food_classifier,
+        config
+    )
+
+def codes(foods):
+    return [food.item_code for food in foods]
+
+def assert_pool_rows_match(pool, catalog):
+    """A pool's columns are its catalog's columns at the pool's rows"""
+    assert pool.source is catalog
+    assert codes(pool.foods) == codes(catalog.foods[row] for row in pool.source_rows)
+    for column in FoodCatalog._COLUMNS:
+        np.testing.assert_array_equal(getattr(pool, column), getattr(catalog, column)[pool.source_rows])
+
+@pytest.mark.parametrize("meal_type", MEAL_TYPES)
+def test_candidate_pool_matches_direct_filtering(filter_service, food_classifier, sample_foods, meal_type):
+    catalog = FoodCatalog(sample_foods, food_classifier, version=1)
+
+    pool = filter_service.get_candidate_pool(catalog, meal_type)
+
+    assert len(pool) > 0
+    assert codes(pool.foods) == codes(filter_service.get_suitable_foods(sample_foods, meal_type))
+    assert_pool_rows_match(pool, catalog)
+    assert filter_service.get_candidate_pool(catalog, meal_type) is pool
+
+def test_new_catalog_version_refilters(filter_service, food_classifier, sample_foods):
+    catalog = FoodCatalog(sample_foods, food_classifier, version=1)
+    old_pool = filter_service.get_candidate_pool(catalog, 'lunch')
+
+    removed = codes(old_pool.foods[:10])
+    patched = catalog.patch(sample_foods[:5], removed, food_classifier)
+    new_pool = filter_service.get_candidate_pool(patched, 'lunch')
+
+    assert new_pool is not old_pool
+    assert codes(new_pool.foods) == codes(filter_service.get_suitable_foods(patched.foods, 'lunch'))
+    assert not set(removed) & set(codes(new_pool.foods))
+    assert_pool_rows_match(new_pool, patched)
+
+def test_exclude_foods_matches_direct_filtering(filter_service, food_classifier, sample_foods):
+    catalog = FoodCatalog(sample_foods, food_classifier, version=1)
+    pool = filter_service.get_candidate_pool(catalog, 'dinner')
+    excluded = set(codes(pool.foods[::3]))
+
+    narrowed = filter_service.exclude_foods(pool, excluded)
+
+    suitable = filter_service.get_suitable_foods(sample_foods, 'dinner')
+    assert codes(narrowed.foods) == [code for code in codes(suitable) if code not in excluded]
+    assert_pool_rows_match(narrowed, catalog)
+    assert filter_service.exclude_foods(pool, set()) is pool
+    assert filter_service.get_candidate_pool(catalog, 'dinner') is pool
\ No newline at end of file
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# test_food_search_index.py - Indexed search must return the hits of a plain scan over every food
+
+import pytest
+
+from conftest import SAMPLE_WORDS
+from src.models import FoodCatalog
+from src.services import FoodSearchIndex, normalize_text
+
+QUERIES = [
+    'גבינה', 'גבי', 'לחם', 'לחמ', 'עוף', 'עופ', 'tuna', 'TUNA', 'ast', 'choco light',
+    'לחם מלא', 'חלב', 'ביצים', 'פירות', 'קפואים', 'ממתקים', 'ור', 'un', 'pasta 12',
+    'food', 'זזזז', 'light זזזז', '12', '1', '',
+]
+
+@pytest.fixture
+def search_index(sample_foods, food_classifier):
+    return FoodSearchIndex(FoodCatalog(sample_foods, food_classifier, version=1))
+
+def scan(foods, query):
+    """Rank every food the slow way, following the rules FoodSearchIndex documents"""
+    normalized = normalize_text(query)
+    if len(normalized.replace(' ', '')) < FoodSearchIndex.MIN_QUERY_LENGTH:
+        return []
+
+    ranked = []
+    for row, food in enumerate(foods):
+        fields = [normalize_text(getattr(food, field)).split() for field in FoodSearchIndex.FIELDS]
+        score = 0.0
+        for query_word in normalized.split():
+            best = 0.0
+            for words, weight in zip(fields, FoodSearchIndex.FIELD_WEIGHTS):
+                if any(query_word in word for word in words):
+                    starts = any(word.startswith(query_word) for word in words)
+                    best = max(best, weight + (FoodSearchIndex.WORD_START_BONUS if starts else 0.0))
+            if best == 0.0:
+                break
+            score += best
+        else:
+            name = normalize_text(food.name)
+            if name.startswith(normalized):
+                score += FoodSearchIndex.NAME_PREFIX_BONUS
+            ranked.append((-score, len(name), name, row, food))
+
+    return [food for *_, food in sorted(ranked, key=lambda entry: entry[:4])]
+
+def codes(foods):
+    return [food.item_code for food in foods]
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_full_scan(search_index, sample_foods, query):
+    expected = scan(sample_foods, query)
+
+    result = search_index.search(query, 0, len(sample_foods))
+
+    assert result.total == len(expected)
+    assert codes(result.foods) == codes(expected)
+
+@pytest.mark.parametrize("query", [word for word in SAMPLE_WORDS] + ['חלב', 'ממתק', 'ast'])
+def test_single_words_find_the_old_ilike_hits(search_index, sample_foods, query):
+    # The old SQL matched name, category or subcategory ILIKE '%query%'
+    lowered = query.lower()
+    old_hits = {food.item_code for food in sample_foods
+                if any(lowered in text.lower() for text in (food.name, food.category, food.subcategory))}
+
+    result = search_index.search(query, 0, len(sample_foods))
+
+    assert old_hits
+    assert set(codes(result.foods)) == old_hits
+
+def test_pages_slice_the_full_ranking(search_index, sample_foods):
+    full = codes(scan(sample_foods, 'לחם'))
+    pages = []
+    for offset in range(0, len(full) + 7, 7):
+        page = search_index.search('לחם', offset, 7)
+        assert page.total == len(full)
+        pages.extend(codes(page.foods))
+    assert pages == full
\ No newline at end of file
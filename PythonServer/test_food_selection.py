@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# test_food_selection.py - top_k and alias sampling must select what full sorts and random.choices did
+
+import random
+
+import numpy as np
+import pytest
+
+from src.algorithm.food_selection import (
+    AliasTable, get_variety_alias_table, top_k, choose_from_ranking, choose_weighted_top
+)
+
+def alias_probabilities(table):
+    """Exact probability of drawing each index from an alias table"""
+    probabilities = np.array(table.probabilities) / table.size
+    for i, alias in enumerate(table.aliases):
+        probabilities[alias] += (1.0 - table.probabilities[i]) / table.size
+    return probabilities
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("k", [1, 5, 6, 15, 40, 200])
+def test_top_k_matches_full_sort(seed, k):
+    rng = np.random.default_rng(seed)
+    # Rounded scores give ties, as foods with equal macros do
+    scores = rng.uniform(-1, 1, size=int(rng.integers(1, 120))).round(1 if seed % 2 else 6)
+
+    positions = top_k(scores, k)
+
+    expected = np.sort(scores)[::-1][:min(k, scores.size)]
+    assert len(set(positions.tolist())) == len(positions) == expected.size
+    np.testing.assert_array_equal(np.sort(scores[positions])[::-1], expected)
+    best = min(5, expected.size)
+    np.testing.assert_array_equal(np.sort(scores[positions[:best]])[::-1], expected[:best])
+
+@pytest.mark.parametrize("weights", [
+    [1.0],
+    [0.2] * 5 + [0.1] * 10,
+    [3, 0, 1, 0.5, 7],
+    np.random.default_rng(3).uniform(0, 1, 50),
+])
+def test_alias_table_matches_weights(weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    table = AliasTable(weights)
+
+    np.testing.assert_allclose(alias_probabilities(table), weights / weights.sum(), atol=1e-12)
+
+def test_alias_table_rejects_empty_weights():
+    with pytest.raises(ValueError):
+        AliasTable([])
+    with pytest.raises(ValueError):
+        AliasTable([0.0, 0.0])
+
+def test_variety_table_matches_old_choice_weights():
+    # The old path drew with random.choices(weights=[0.2] * 5 + [0.1] * rest)
+    for count in (6, 15, 37):
+        weights = np.array([0.2 if i < 5 else 0.1 for i in range(count)])
+        np.testing.assert_allclose(alias_probabilities(get_variety_alias_table(count)), weights / weights.sum())
+
+def test_alias_sampling_frequencies():
+    table = AliasTable([0.2] * 5 + [0.1] * 10)
+    rng = random.Random(0)
+    counts = np.bincount([table.sample(rng) for _ in range(40000)], minlength=15)
+
+    np.testing.assert_allclose(counts / counts.sum(), alias_probabilities(table), atol=0.01)
+
+def test_choose_from_ranking_draws_from_old_head():
+    ranked_rows = np.arange(100, 160)
+    rng = random.Random(1)
+    picks = {choose_from_ranking(ranked_rows, rng=rng) for _ in range(2000)}
+
+    # The old path was random.choice(rows[:max(10, len(rows) // 2)])
+    assert picks == set(ranked_rows[:30].tolist())
+    assert {choose_from_ranking(ranked_rows[:8], rng=rng) for _ in range(500)} == set(ranked_rows[:8].tolist())
+
+@pytest.mark.parametrize("size", [4, 20, 90])
+def test_choose_weighted_top_draws_from_old_candidates(size):
+    rng = np.random.default_rng(size)
+    rows = rng.permutation(1000)[:size]
+    scores = rng.uniform(0, 1, size)
+
+    # The old path drew from the best max(15, size // 2) scores (every row when 5 or fewer)
+    variety_count = min(max(15, size // 2), size)
+    if variety_count <= 5:
+        expected = set(rows.tolist())
+    else:
+        expected = set(rows[np.argsort(-scores)[:variety_count]].tolist())
+
+    draw_rng = random.Random(2)
+    picks = {choose_weighted_top(rows, scores, rng=draw_rng) for _ in range(5000)}
+    assert picks == expected
+
+def test_seeded_choices_are_reproducible():
+    rows = np.arange(50)
+    scores = np.linspace(0, 1, 50)
+    first = [choose_weighted_top(rows, scores, rng=random.Random(9)) for _ in range(3)]
+    second = [choose_weighted_top(rows, scores, rng=random.Random(9)) for _ in range(3)]
+    assert first == second
\ No newline at end of file
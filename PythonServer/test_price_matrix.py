@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# test_price_matrix.py - Matrix-based price comparison must match summing the latest price rows per menu
+
+import random
+
+import numpy as np
+import pytest
+
+from data.sql_providers import (
+    SqlPriceComparison, CURRENT_PRICES_SELECT, build_price_lookup, summarize_menu_prices
+)
+from src.models import PriceMatrix
+
+SUPERMARKETS = ['Osher Ad', 'Rami Levy', 'Shufersal', 'Victory']
+
+class FakePriceDatabase:
+    """Answers the queries SqlPriceComparison makes from in-memory rows"""
+
+    def __init__(self, price_rows, supermarkets):
+        self.price_rows = price_rows
+        self.supermarkets = supermarkets
+
+    def execute_single(self, query, params=None):
+        return {'last_loaded_at': None}
+
+    def execute_query(self, query, params=None):
+        if query == CURRENT_PRICES_SELECT:
+            return self.price_rows
+        return [{'name': name} for name in self.supermarkets]
+
+def make_price_rows(seed, item_count=80):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(item_count):
+        for supermarket in SUPERMARKETS + ['Closed Store']:
+            if rng.random() < 0.7:
+                rows.append({'item_code': str(1000 + i), 'supermarket': supermarket, 'price': round(rng.uniform(0.3, 25.0), 2)})
+    return rows
+
+def make_menus(seed, count=12):
+    rng = random.Random(seed)
+    menus = []
+    for _ in range(count):
+        menus.append([
+            {'item_code': str(rng.randint(995, 1085)), 'portion_grams': rng.choice([30, 75.5, 100, 180, 250]), 'name': 'food'}
+            for _ in range(rng.randint(1, 7))
+        ])
+    return menus
+
+@pytest.fixture(params=[1, 2, 3])
+def prices(request):
+    price_rows = make_price_rows(request.param)
+    comparison = SqlPriceComparison(FakePriceDatabase(price_rows, SUPERMARKETS))
+    return comparison, build_price_lookup(price_rows), make_menus(request.param)
+
+def assert_same_result(result, expected):
+    assert result['available_supermarkets'] == expected['available_supermarkets']
+    assert result['item_breakdown'] == expected['item_breakdown']
+    assert result['supermarket_totals'] == pytest.approx(expected['supermarket_totals'], abs=1e-9)
+
+def test_compare_menu_prices_matches_row_lookup(prices):
+    comparison, price_lookup, menus = prices
+    for menu_items in menus:
+        expected = summarize_menu_prices(menu_items, price_lookup, SUPERMARKETS)
+        assert_same_result(comparison.compare_menu_prices(menu_items), expected)
+
+def test_batch_matches_one_menu_at_a_time(prices):
+    comparison, price_lookup, menus = prices
+    menus = menus + [[], [{'portion_grams': 100}]]
+
+    results = comparison.compare_menu_prices_batch(menus)
+
+    assert len(results) == len(menus)
+    for menu_items, result in zip(menus[:-2], results):
+        assert_same_result(result, summarize_menu_prices(menu_items, price_lookup, SUPERMARKETS))
+    assert results[-2] == {'error': 'No menu items provided'}
+    assert results[-1] == {'error': 'No valid item codes provided'}
+
+def test_matrix_holds_the_active_rows(prices):
+    comparison, price_lookup, _ = prices
+    matrix = comparison.price_matrix
+
+    assert matrix.supermarkets == SUPERMARKETS
+    for item_code, by_supermarket in price_lookup.items():
+        row = matrix.prices[matrix.index_by_code[item_code]] if item_code in matrix.index_by_code else None
+        for column, supermarket in enumerate(SUPERMARKETS):
+            if supermarket in by_supermarket:
+                assert row[column] == by_supermarket[supermarket]['price']
+            elif row is not None:
+                assert np.isnan(row[column])
+
+def test_item_prices():
+    matrix = PriceMatrix(['1', '2'], ['a', 'b'], [[1.0, np.nan], [np.nan, np.nan]])
+
+    np.testing.assert_array_equal(matrix.item_prices(['1', '2', 'x'], 'a'), [1.0, np.nan, np.nan])
+    np.testing.assert_array_equal(matrix.item_prices(['2', '1']), [np.nan, 1.0])
+    with pytest.raises(ValueError):
+        matrix.item_prices(['1'], 'c')
\ No newline at end of file
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# test_shopping_optimizer.py - Checks ShoppingOptimizer against brute-force enumeration of store subsets
+
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.services.shopping_optimizer import ShoppingOptimizer
+
+def random_costs(rng, item_count, store_count, missing_rate):
+    costs = rng.uniform(0.5, 10.0, size=(item_count, store_count)).round(2)
+    costs[rng.random((item_count, store_count)) < missing_rate] = np.nan
+    return costs
+
+def brute_force(costs, store_visit_cost, max_stores):
+    """Best (covered items, total cost) over every store subset: most coverage, then cheapest"""
+    item_count, store_count = costs.shape
+    best = None
+    for size in range(1, max_stores + 1):
+        for subset in itertools.combinations(range(store_count), size):
+            chosen = costs[:, subset]
+            covered = ~np.isnan(chosen).all(axis=1)
+            items_cost = float(np.nanmin(chosen[covered], axis=1).sum()) if covered.any() else 0.0
+            key = (-int(covered.sum()), items_cost + store_visit_cost * size)
+            if best is None or key[0] < best[0] or (key[0] == best[0] and key[1] < best[1] - 1e-9):
+                best = key
+    return -best[0], best[1]
+
+def assert_valid_plan(costs, plan, store_visit_cost, max_stores):
+    assert 1 <= len(plan.columns) <= max_stores
+    assert plan.visit_cost == pytest.approx(store_visit_cost * len(plan.columns))
+    for item, column in enumerate(plan.item_columns):
+        if plan.covered[item]:
+            assert column in plan.columns
+            assert costs[item, column] == pytest.approx(np.nanmin(costs[item, plan.columns]))
+        else:
+            assert column == -1
+            assert np.isnan(costs[item, plan.columns]).all()
+
+@pytest.mark.parametrize("seed", range(40))
+def test_optimize_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    item_count = int(rng.integers(1, 9))
+    store_count = int(rng.integers(1, 7))
+    costs = random_costs(rng, item_count, store_count, missing_rate=[0.0, 0.3, 0.7][seed % 3])
+    optimizer = ShoppingOptimizer()
+
+    for store_visit_cost in (0.0, 1.5, 8.0):
+        for max_stores in range(1, store_count + 1):
+            plan = optimizer.optimize(costs, store_visit_cost, max_stores)
+            covered, total = brute_force(costs, store_visit_cost, max_stores)
+
+            assert_valid_plan(costs, plan, store_visit_cost, max_stores)
+            assert int(plan.covered.sum()) == covered
+            assert plan.items_cost + plan.visit_cost == pytest.approx(total)
+
+def test_optimize_without_max_stores_uses_every_store():
+    rng = np.random.default_rng(7)
+    costs = random_costs(rng, 6, 5, missing_rate=0.4)
+    plan = ShoppingOptimizer().optimize(costs, 2.0)
+    covered, total = brute_force(costs, 2.0, 5)
+
+    assert int(plan.covered.sum()) == covered
+    assert plan.items_cost + plan.visit_cost == pytest.approx(total)
+
+def test_optimize_edge_cases():
+    optimizer = ShoppingOptimizer()
+    assert optimizer.optimize(np.empty((3, 0))) is None
+
+    unsold = np.array([[np.nan, np.nan], [1.0, 2.0]])
+    plan = optimizer.optimize(unsold, 0.0, 1)
+    assert plan.covered.tolist() == [False, True]
+    assert plan.items_cost == pytest.approx(1.0)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_savings_by_store_count_matches_brute_force(seed):
+    rng = np.random.default_rng(100 + seed)
+    costs = random_costs(rng, 7, 5, missing_rate=0.3)
+
+    steps = ShoppingOptimizer().savings_by_store_count(costs)
+
+    assert [stores for stores, _ in steps] == list(range(1, len(steps) + 1))
+    for stores, plan in steps:
+        covered, total = brute_force(costs, 0.0, stores)
+        assert int(plan.covered.sum()) == covered
+        assert plan.items_cost == pytest.approx(total)
+
+    # One more store than the last step saves nothing
+    if len(steps) < costs.shape[1]:
+        assert brute_force(costs, 0.0, len(steps) + 1) == pytest.approx(brute_force(costs, 0.0, len(steps)))
\ No newline at end of file
@@ -11,9 +11,15 @@ Auto-detects and creates:
 - Subcategories from nutrition data "subcategory" field  
 - Allergens from nutrition data "allergens" arrays
 - Products and prices
+
+Products and prices are bulk loaded by default: rows are resolved in memory,
+streamed into temporary staging tables with COPY and merged with set-based
+upserts. The original row-by-row path remains as a fallback.
 ==========================================
 """
 
+import csv
+import io
 import json
 import os
 import re
@@ -32,9 +38,10 @@ class DynamicDataLoader:
     Completely dynamic loader that discovers all structure from JSON files
     """
     
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Dict[str, str], bulk: bool = True):
         self.db_config = db_config
         self.conn = None
+        self.bulk = bulk  # COPY into staging tables + set-based upserts, row-by-row if False or on failure
         
         # Will be discovered from data
         self.discovered_supermarkets = {}
@@ -42,6 +49,12 @@ class DynamicDataLoader:
         self.discovered_subcategories = {}
         self.discovered_allergens = set()
         
+        # Database IDs, preloaded once per run and kept up to date as rows are created
+        self.supermarket_ids = {}  # price_field_name -> id
+        self.category_ids = {}  # name_he -> id
+        self.subcategory_ids = {}  # (category_id, name_he) -> id
+        self.product_ids = {}  # item_code -> id
+        
     def connect(self):
         """Connect to PostgreSQL"""
         try:
@@ -76,6 +89,7 @@ class DynamicDataLoader:
             
             # Step 2: Create discovered entities in database
             self._create_discovered_entities()
+            self._preload_id_maps()
             
             # Step 3: Load actual data (nutrition FIRST, then prices)
             self._load_nutrition_data(data_path)
@@ -290,6 +304,39 @@ class DynamicDataLoader:
         finally:
             cursor.close()
     
+    def _preload_id_maps(self):
+        """
+        Load supermarket, category, subcategory and product IDs once, so rows are
+        resolved with dictionary lookups instead of a SELECT each
+        """
+        cursor = self.conn.cursor()
+        
+        try:
+            cursor.execute("SELECT price_field_name, id FROM supermarkets WHERE price_field_name IS NOT NULL")
+            self.supermarket_ids = dict(cursor.fetchall())
+            cursor.execute("SELECT name_he, id FROM categories")
+            self.category_ids = dict(cursor.fetchall())
+            cursor.execute("SELECT category_id, name_he, id FROM subcategories")
+            self.subcategory_ids = {(category_id, name_he): id for category_id, name_he, id in cursor.fetchall()}
+            cursor.execute("SELECT item_code, id FROM products")
+            self.product_ids = dict(cursor.fetchall())
+            self.conn.commit()
+            
+            logger.info(f"🗂️ Preloaded IDs: {len(self.supermarket_ids)} supermarkets, {len(self.category_ids)} categories, "
+                        f"{len(self.subcategory_ids)} subcategories, {len(self.product_ids)} products")
+        finally:
+            cursor.close()
+    
+    def _resolve_category_ids(self, item: Dict):
+        """
+        Get (category_id, subcategory_id) for a nutrition item from the preloaded maps
+        """
+        category_id = self.category_ids.get(item['category']) if 'category' in item else None
+        subcategory_id = None
+        if 'subcategory' in item and category_id:
+            subcategory_id = self.subcategory_ids.get((category_id, item['subcategory']))
+        return category_id, subcategory_id
+    
     def _load_nutrition_data(self, data_path: Path):
         """
         Phase 3: Load nutrition data
@@ -306,7 +353,90 @@ class DynamicDataLoader:
                 data = json.load(f)
             
             if isinstance(data, list):
-                self._process_nutrition_items(data, str(nutrition_file))
+                self._process_items(self._bulk_process_nutrition_items, self._process_nutrition_items, data, str(nutrition_file))
+    
+    def _process_items(self, bulk_method, row_method, items: List[Dict], source_file: str):
+        """
+        Load items with the bulk path, falling back to row-by-row if it fails
+        """
+        if self.bulk:
+            try:
+                bulk_method(items, source_file)
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Bulk load failed, retrying row by row: {e}")
+        row_method(items, source_file)
+    
+    def _copy_rows(self, cursor, table: str, columns: List[str], rows: List[tuple]):
+        """
+        Stream rows into a table with COPY (None becomes NULL)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    
+    def _bulk_process_nutrition_items(self, items: List[Dict], source_file: str):
+        """
+        Bulk load nutrition items: resolve rows in memory, COPY to staging, upsert products in one statement
+        """
+        cursor = self.conn.cursor()
+        failed = 0
+        
+        try:
+            # One row per item code (the last occurrence wins, as with row-by-row upserts)
+            rows = {}
+            for item in items:
+                try:
+                    item_code = item.get('item_code')
+                    if not item_code or not item.get('name'):
+                        failed += 1
+                        continue
+                    
+                    nutrition = {}
+                    for field in ('calories', 'protein', 'carbs', 'fat', 'sodium'):
+                        if field in item:
+                            nutrition[field] = float(item[field])
+                    
+                    category_id, subcategory_id = self._resolve_category_ids(item)
+                    rows[str(item_code)] = (str(item_code), item['name'], category_id, subcategory_id, json.dumps(nutrition))
+                    
+                except Exception as e:
+                    logger.warning(f"Failed to process item {item.get('item_code', 'unknown')}: {e}")
+                    failed += 1
+            
+            cursor.execute("""
+                CREATE TEMP TABLE staging_products (
+                    item_code TEXT, name TEXT, category_id INTEGER, subcategory_id INTEGER, nutrition JSONB
+                ) ON COMMIT DROP
+            """)
+            self._copy_rows(cursor, 'staging_products', ['item_code', 'name', 'category_id', 'subcategory_id', 'nutrition'], list(rows.values()))
+            
+            cursor.execute("""
+                INSERT INTO products (item_code, name, category_id, subcategory_id, nutrition)
+                SELECT item_code, name, category_id, subcategory_id, nutrition
+                FROM staging_products
+                ON CONFLICT (item_code) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    category_id = EXCLUDED.category_id,
+                    subcategory_id = EXCLUDED.subcategory_id,
+                    nutrition = EXCLUDED.nutrition,
+                    updated_at = NOW()
+                RETURNING item_code, id
+            """)
+            product_ids = cursor.fetchall()
+            
+            self.conn.commit()
+            self.product_ids.update(product_ids)
+            logger.info(f"✅ Nutrition data bulk loaded: {len(items) - failed} processed ({len(rows)} products), {failed} failed")
+            
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
     
     def _process_nutrition_items(self, items: List[Dict], source_file: str):
         """
@@ -315,6 +445,7 @@ class DynamicDataLoader:
         cursor = self.conn.cursor()
         processed = 0
         failed = 0
+        new_product_ids = {}  # Recorded once committed
         
         try:
             for item in items:
@@ -333,23 +464,7 @@ class DynamicDataLoader:
                         nutrition['sodium'] = float(item['sodium'])
                     
                     # Get category and subcategory IDs
-                    category_id = None
-                    subcategory_id = None
-                    
-                    if 'category' in item:
-                        cursor.execute("SELECT id FROM categories WHERE name_he = %s", (item['category'],))
-                        result = cursor.fetchone()
-                        if result:
-                            category_id = result[0]
-                    
-                    if 'subcategory' in item and category_id:
-                        cursor.execute(
-                            "SELECT id FROM subcategories WHERE name_he = %s AND category_id = %s", 
-                            (item['subcategory'], category_id)
-                        )
-                        result = cursor.fetchone()
-                        if result:
-                            subcategory_id = result[0]
+                    category_id, subcategory_id = self._resolve_category_ids(item)
                     
                     # Insert product
                     cursor.execute("""
@@ -361,6 +476,7 @@ class DynamicDataLoader:
                             subcategory_id = EXCLUDED.subcategory_id,
                             nutrition = EXCLUDED.nutrition,
                             updated_at = NOW()
+                        RETURNING id
                     """, {
                         'item_code': item.get('item_code'),
                         'name': item.get('name'),
@@ -368,6 +484,7 @@ class DynamicDataLoader:
                         'subcategory_id': subcategory_id,
                         'nutrition': json.dumps(nutrition)
                     })
+                    new_product_ids[str(item.get('item_code'))] = cursor.fetchone()[0]
                     
                     processed += 1
                     
@@ -379,6 +496,7 @@ class DynamicDataLoader:
                     failed += 1
             
             self.conn.commit()
+            self.product_ids.update(new_product_ids)
             logger.info(f"✅ Nutrition data loaded: {processed} processed, {failed} failed")
             
         except Exception as e:
@@ -407,7 +525,109 @@ class DynamicDataLoader:
                     data = json.load(f)
                 
                 if isinstance(data, list):
-                    self._process_price_items(data, str(price_file))
+                    self._process_items(self._bulk_process_price_items, self._process_price_items, data, str(price_file))
+    
+    def _bulk_process_price_items(self, items: List[Dict], source_file: str):
+        """
+        Bulk load price items: create missing products, then merge prices into
+        price_history and latest_prices with one upsert each
+        """
+        cursor = self.conn.cursor()
+        processed = 0
+        debug_info = {
+            'no_item_code': 0,
+            'no_valid_prices': 0
+        }
+        
+        try:
+            # Names for price-only products (first occurrence, as row-by-row) and one price
+            # per item and supermarket (last occurrence, as row-by-row upserts)
+            product_names = {}
+            prices = {}
+            for item in items:
+                item_code = item.get('ItemCode') or item.get('item_code')
+                if not item_code:
+                    debug_info['no_item_code'] += 1
+                    continue
+                item_code = str(item_code)
+                product_names.setdefault(item_code, item.get('name', f'Product {item_code}'))
+                
+                item_processed = False
+                for field_name, price_value in item.items():
+                    if not field_name.endswith(' price') or price_value is None:
+                        continue
+                    try:
+                        price = float(price_value)
+                    except (ValueError, TypeError):
+                        continue
+                    supermarket_id = self.supermarket_ids.get(field_name)
+                    if price > 0 and supermarket_id is not None:
+                        prices[(item_code, supermarket_id)] = (item_code, supermarket_id, price)
+                        item_processed = True
+                
+                if item_processed:
+                    processed += 1
+                else:
+                    debug_info['no_valid_prices'] += 1
+            
+            cursor.execute("""
+                CREATE TEMP TABLE staging_price_products (item_code TEXT, name TEXT) ON COMMIT DROP;
+                CREATE TEMP TABLE staging_prices (item_code TEXT, supermarket_id INTEGER, price DECIMAL(10,2)) ON COMMIT DROP;
+            """)
+            self._copy_rows(cursor, 'staging_price_products', ['item_code', 'name'], list(product_names.items()))
+            self._copy_rows(cursor, 'staging_prices', ['item_code', 'supermarket_id', 'price'], list(prices.values()))
+            
+            # Price-only product records for item codes without nutrition data
+            cursor.execute("""
+                INSERT INTO products (item_code, name, is_active)
+                SELECT item_code, name, true FROM staging_price_products
+                ON CONFLICT (item_code) DO NOTHING
+                RETURNING item_code, id
+            """)
+            product_ids = cursor.fetchall()
+            
+            cursor.execute("""
+                INSERT INTO price_history (item_code, product_id, supermarket_id, price, source_file, record_date)
+                SELECT s.item_code, p.id, s.supermarket_id, s.price, %s, CURRENT_DATE
+                FROM staging_prices s
+                JOIN products p ON p.item_code = s.item_code
+                ON CONFLICT (item_code, supermarket_id, record_date) 
+                DO UPDATE SET 
+                    price = EXCLUDED.price, 
+                    source_file = EXCLUDED.source_file,
+                    product_id = EXCLUDED.product_id
+            """, (source_file,))
+            history_rows = cursor.rowcount
+            
+            # Keep the one-row-per-item/supermarket current price in step
+            cursor.execute("""
+                INSERT INTO latest_prices (item_code, supermarket_id, product_id, price, source_file, recorded_at)
+                SELECT s.item_code, s.supermarket_id, p.id, s.price, %s, NOW()
+                FROM staging_prices s
+                JOIN products p ON p.item_code = s.item_code
+                ON CONFLICT (item_code, supermarket_id) 
+                DO UPDATE SET 
+                    price = EXCLUDED.price, 
+                    source_file = EXCLUDED.source_file,
+                    product_id = EXCLUDED.product_id,
+                    recorded_at = EXCLUDED.recorded_at
+                WHERE latest_prices.recorded_at <= EXCLUDED.recorded_at
+            """, (source_file,))
+            
+            self.conn.commit()
+            self.product_ids.update(product_ids)
+            
+            failed = debug_info['no_item_code'] + debug_info['no_valid_prices']
+            logger.info(f"✅ Price data bulk loaded: {processed} processed, {failed} failed ({history_rows} price records)")
+            logger.info(f"📊 Failure breakdown:")
+            logger.info(f"  - No ItemCode: {debug_info['no_item_code']}")
+            logger.info(f"  - No valid prices: {debug_info['no_valid_prices']}")
+            
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
     
     def _process_price_items(self, items: List[Dict], source_file: str):
         """
@@ -416,6 +636,7 @@ class DynamicDataLoader:
         cursor = self.conn.cursor()
         processed = 0
         failed = 0
+        new_product_ids = {}  # Recorded once committed
         debug_info = {
             'no_item_code': 0,
             'product_not_found': 0, 
@@ -433,12 +654,10 @@ class DynamicDataLoader:
                         continue
                     
                     # Check if this item_code exists in our products
-                    cursor.execute("SELECT id, name FROM products WHERE item_code = %s", (str(item_code),))
-                    result = cursor.fetchone()
+                    product_id = self.product_ids.get(str(item_code), new_product_ids.get(str(item_code)))
                     
-                    if result:
+                    if product_id is not None:
                         # Product exists in nutrition data - link prices to it
-                        product_id = result[0]
                         use_existing_product = True
                     else:
                         # Product doesn't exist - create a price-only product record
@@ -452,6 +671,7 @@ class DynamicDataLoader:
                                 RETURNING id
                             """, (str(item_code), product_name, True))
                             product_id = cursor.fetchone()[0]
+                            new_product_ids[str(item_code)] = product_id
                             use_existing_product = False
                         except Exception as e:
                             debug_info['db_errors'] += 1
@@ -467,13 +687,8 @@ class DynamicDataLoader:
                                 price = float(price_value)
                                 if price > 0:
                                     # Get supermarket ID
-                                    cursor.execute(
-                                        "SELECT id FROM supermarkets WHERE price_field_name = %s", 
-                                        (field_name,)
-                                    )
-                                    market_result = cursor.fetchone()
-                                    if market_result:
-                                        supermarket_id = market_result[0]
+                                    supermarket_id = self.supermarket_ids.get(field_name)
+                                    if supermarket_id is not None:
                                         
                                         # Insert price with ItemCode as primary reference
                                         try:
@@ -487,6 +702,19 @@ class DynamicDataLoader:
                                                     product_id = EXCLUDED.product_id
                                             """, (str(item_code), product_id, supermarket_id, price, source_file))
                                             
+                                            # Keep the one-row-per-item/supermarket current price in step
+                                            cursor.execute("""
+                                                INSERT INTO latest_prices (item_code, supermarket_id, product_id, price, source_file, recorded_at)
+                                                VALUES (%s, %s, %s, %s, %s, NOW())
+                                                ON CONFLICT (item_code, supermarket_id) 
+                                                DO UPDATE SET 
+                                                    price = EXCLUDED.price, 
+                                                    source_file = EXCLUDED.source_file,
+                                                    product_id = EXCLUDED.product_id,
+                                                    recorded_at = EXCLUDED.recorded_at
+                                                WHERE latest_prices.recorded_at <= EXCLUDED.recorded_at
+                                            """, (str(item_code), supermarket_id, product_id, price, source_file))
+                                            
                                             item_processed = True
                                             
                                         except Exception as db_error:
@@ -528,6 +756,7 @@ class DynamicDataLoader:
             
             # Commit all changes
             self.conn.commit()
+            self.product_ids.update(new_product_ids)
             
             # Detailed summary
             logger.info(f"✅ Price data loaded: {processed} processed, {failed} failed")
@@ -567,6 +796,9 @@ class DynamicDataLoader:
                 cursor.execute("SELECT COUNT(*) FROM price_history")
                 price_count = cursor.fetchone()[0]
                 queries['Price Records'] = f"(already counted: {price_count})"
+                cursor.execute("SELECT COUNT(*) FROM latest_prices")
+                latest_count = cursor.fetchone()[0]
+                queries['Current Prices'] = f"(already counted: {latest_count})"
             except Exception:
                 logger.warning("price_history table not accessible for summary")
             
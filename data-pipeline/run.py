@@ -70,6 +70,7 @@ Examples:
   python run.py --load-all                    # Load all JSON data
   python run.py --data-dir /path/to/data     # Specify data directory
   python run.py --load-all --verbose         # Verbose output
+  python run.py --load-all --row-by-row      # Slow per-row inserts (no COPY)
   
 Environment Variables:
   POSTGRES_HOST      Database host (default: localhost)
@@ -99,6 +100,12 @@ Environment Variables:
         help='Enable verbose logging'
     )
     
+    parser.add_argument(
+        '--row-by-row',
+        action='store_true',
+        help='Insert rows one at a time instead of bulk loading with COPY'
+    )
+    
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -132,7 +139,7 @@ Environment Variables:
             return
         
         # Create and run loader
-        loader = DynamicDataLoader(db_config)
+        loader = DynamicDataLoader(db_config, bulk=not args.row_by_row)
         loader.load_all_data(data_directory)
         
         logger.info("✅ Data pipeline completed successfully!")
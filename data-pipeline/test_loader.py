@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+==========================================
+FILE LOCATION: data-pipeline/test_loader.py
+
+Loader tests against scratch schemas in the configured PostgreSQL database.
+Each test creates fresh schemas from database/schema.sql and drops them
+afterwards. Tests are skipped when psycopg2 is missing or the database is
+not reachable.
+==========================================
+"""
+
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the data-pipeline directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from loader import DynamicDataLoader
+from run import get_db_config
+
+SCHEMA_SQL = Path(__file__).resolve().parent.parent / 'database' / 'schema.sql'
+
+NUTRITION_ITEMS = [
+    {'item_code': '100', 'name': 'גבינה לבנה', 'category': 'חלב ביצים וסלטים', 'subcategory': 'גבינות',
+     'calories': 95, 'protein': 9, 'carbs': 4, 'fat': 5, 'sodium': 400},
+    {'item_code': '101', 'name': 'לחם מלא', 'category': 'לחם ומאפים טריים', 'subcategory': 'לחם, פיתה, לחמניה',
+     'calories': 240, 'protein': 9, 'carbs': 45, 'fat': 3},
+    {'item_code': '102', 'name': 'אורז', 'category': 'קטניות ודגנים', 'subcategory': 'אורז וקטניות',
+     'calories': 350, 'protein': 7, 'carbs': 78, 'fat': 1},
+    {'item_code': '100', 'name': 'גבינה לבנה 5%', 'category': 'חלב ביצים וסלטים', 'subcategory': 'גבינות',
+     'calories': 98, 'protein': 9.5, 'carbs': 4, 'fat': 5},  # Duplicate code: the last one wins
+    {'item_code': '103', 'name': 'מוצר ללא קטגוריה', 'calories': 50},
+    {'item_code': '104', 'name': 'ערך שגוי', 'calories': 'abc'},  # Fails, nothing loaded
+]
+
+PRICE_ITEMS = [
+    {'ItemCode': '100', 'name': 'גבינה', 'shufersal price': 6.9, 'rami levi price': 5.5},
+    {'ItemCode': '101', 'shufersal price': '12.40', 'rami levi price': None, 'tivtaam price': 13},
+    {'ItemCode': '200', 'name': 'מוצר מחיר בלבד', 'shufersal price': 3},  # Price-only product
+    {'ItemCode': '200', 'name': 'שם אחר', 'rami levi price': 2.5},
+    {'item_code': '201', 'shufersal price': 0, 'rami levi price': 'n/a'},  # No valid prices
+    {'ItemCode': '100', 'shufersal price': 7.2},  # Repeated price: the last one wins
+    {'shufersal price': 4},
+]
+
+def connect_or_skip():
+    try:
+        return psycopg2.connect(**get_db_config())
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL is not reachable: {e}")
+
+@pytest.fixture
+def make_schema():
+    """Create scratch schemas with the application tables, dropped after the test"""
+    conn = connect_or_skip()
+    conn.autocommit = True
+    created = []
+
+    def make():
+        schema = f"loader_test_{uuid.uuid4().hex[:12]}"
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            created.append(schema)
+            cursor.execute(f"SET search_path TO {schema}, public")
+            cursor.execute(SCHEMA_SQL.read_text(encoding='utf-8'))
+        db_config = dict(get_db_config(), options=f"-c search_path={schema},public")
+        return db_config
+
+    yield make
+
+    with conn.cursor() as cursor:
+        for schema in created:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+@pytest.fixture
+def data_directory(tmp_path):
+    (tmp_path / 'nutrition_data.json').write_text(json.dumps(NUTRITION_ITEMS, ensure_ascii=False), encoding='utf-8')
+    (tmp_path / 'price_data.json').write_text(json.dumps(PRICE_ITEMS, ensure_ascii=False), encoding='utf-8')
+    return tmp_path
+
+def load(db_config, data_directory, bulk):
+    loader = DynamicDataLoader(db_config, bulk=bulk)
+    loader.load_all_data(str(data_directory))
+    return loader
+
+def dump_tables(db_config):
+    """Get every loaded row by natural keys (ids and timestamps differ between runs)"""
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT p.item_code, p.name, c.name_he, sc.name_he, p.nutrition, p.is_active, p.can_include_in_menu
+                FROM products p
+                LEFT JOIN categories c ON p.category_id = c.id
+                LEFT JOIN subcategories sc ON p.subcategory_id = sc.id
+                ORDER BY p.item_code
+            """)
+            products = cursor.fetchall()
+            cursor.execute("""
+                SELECT ph.item_code, s.name, ph.price, ph.source_file, ph.record_date, p.item_code
+                FROM price_history ph
+                JOIN supermarkets s ON ph.supermarket_id = s.id
+                LEFT JOIN products p ON ph.product_id = p.id
+                ORDER BY ph.item_code, s.name
+            """)
+            history = cursor.fetchall()
+            cursor.execute("""
+                SELECT lp.item_code, s.name, lp.price, lp.source_file, p.item_code
+                FROM latest_prices lp
+                JOIN supermarkets s ON lp.supermarket_id = s.id
+                LEFT JOIN products p ON lp.product_id = p.id
+                ORDER BY lp.item_code, s.name
+            """)
+            latest = cursor.fetchall()
+        return {'products': products, 'price_history': history, 'latest_prices': latest}
+    finally:
+        conn.close()
+
+def test_bulk_load_matches_row_by_row(make_schema, data_directory):
+    bulk_db, row_db = make_schema(), make_schema()
+
+    load(bulk_db, data_directory, bulk=True)
+    load(row_db, data_directory, bulk=False)
+
+    bulk_rows, row_rows = dump_tables(bulk_db), dump_tables(row_db)
+    assert bulk_rows == row_rows
+    assert [row[0] for row in bulk_rows['products']] == ['100', '101', '102', '103', '200', '201']
+    assert len(bulk_rows['latest_prices']) == 6
+
+def test_reloading_matches_row_by_row(make_schema, data_directory):
+    # Upserts over existing rows must agree too
+    bulk_db, row_db = make_schema(), make_schema()
+    for db_config, bulk in ((bulk_db, True), (row_db, False)):
+        load(db_config, data_directory, bulk)
+        load(db_config, data_directory, bulk)
+
+    assert dump_tables(bulk_db) == dump_tables(row_db)
+
+def test_failed_bulk_load_falls_back_to_row_by_row(make_schema, data_directory, monkeypatch):
+    fallback_db, row_db = make_schema(), make_schema()
+
+    def failing_copy(self, cursor, table, columns, rows):
+        raise psycopg2.DataError("COPY rejected")
+
+    monkeypatch.setattr(DynamicDataLoader, '_copy_rows', failing_copy)
+    load(fallback_db, data_directory, bulk=True)
+    monkeypatch.undo()
+    load(row_db, data_directory, bulk=False)
+
+    assert dump_tables(fallback_db) == dump_tables(row_db)
+
+def lookup_one(cursor, query, params):
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_preloaded_id_maps_match_per_row_lookups(make_schema, data_directory, bulk):
+    db_config = make_schema()
+    loader = load(db_config, data_directory, bulk)
+
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            # The lookups the loader used to run for every item and price field
+            for field_name, supermarket_id in loader.supermarket_ids.items():
+                assert supermarket_id == lookup_one(cursor, "SELECT id FROM supermarkets WHERE price_field_name = %s", (field_name,))
+            assert set(loader.supermarket_ids) == {'shufersal price', 'rami levi price', 'tivtaam price'}
+
+            for item in NUTRITION_ITEMS:
+                category_id, subcategory_id = loader._resolve_category_ids(item)
+                assert category_id == (lookup_one(cursor, "SELECT id FROM categories WHERE name_he = %s", (item['category'],))
+                                       if 'category' in item else None)
+                assert subcategory_id == (lookup_one(cursor, """
+                    SELECT id FROM subcategories WHERE name_he = %s
+                    AND category_id = (SELECT id FROM categories WHERE name_he = %s)
+                """, (item['subcategory'], item['category'])) if 'subcategory' in item else None)
+
+            # Products created during the run, price-only ones included, are in the map
+            cursor.execute("SELECT item_code, id FROM products")
+            assert loader.product_ids == dict(cursor.fetchall())
+    finally:
+        conn.close()
+
+def test_rolled_back_bulk_load_leaves_no_stale_ids(make_schema, data_directory, monkeypatch):
+    db_config = make_schema()
+
+    def failing_price_copy(self, cursor, table, columns, rows):
+        if table.startswith('staging_price'):
+            raise psycopg2.DataError("COPY rejected")
+        return original_copy(self, cursor, table, columns, rows)
+
+    original_copy = DynamicDataLoader._copy_rows
+    monkeypatch.setattr(DynamicDataLoader, '_copy_rows', failing_price_copy)
+    loader = load(db_config, data_directory, bulk=True)
+
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT item_code, id FROM products")
+            assert loader.product_ids == dict(cursor.fetchall())
+    finally:
+        conn.close()
\ No newline at end of file
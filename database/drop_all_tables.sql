@@ -15,6 +15,7 @@ DROP TABLE IF EXISTS user_nutrition_profiles CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
 
 -- Drop price and product tables
+DROP TABLE IF EXISTS latest_prices CASCADE;
 DROP TABLE IF EXISTS price_history CASCADE;
 DROP TABLE IF EXISTS products CASCADE;
 
@@ -0,0 +1,45 @@
+-- ==========================================
+-- FILE LOCATION: database/migrations/001_latest_prices.sql
+--
+-- Adds the latest_prices table to an existing database (fresh installs get it from
+-- schema.sql). Run it BEFORE deploying a server version that reads latest_prices:
+--   docker exec -i nutrition-postgres psql -U nutrition_user -d nutrition_app < migrations/001_latest_prices.sql
+-- Safe to run more than once.
+-- ==========================================
+
+BEGIN;
+
+-- One row per item and supermarket, upserted by the loader alongside price_history
+CREATE TABLE IF NOT EXISTS latest_prices (
+    item_code VARCHAR(50) NOT NULL,
+    supermarket_id INTEGER NOT NULL REFERENCES supermarkets(id),
+    product_id INTEGER REFERENCES products(id) ON DELETE SET NULL,
+    
+    price DECIMAL(10,2) NOT NULL CHECK (price > 0),
+    currency VARCHAR(3) DEFAULT 'ILS',
+    
+    source_file VARCHAR(255),
+    recorded_at TIMESTAMPTZ DEFAULT NOW(),
+    
+    PRIMARY KEY (item_code, supermarket_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_latest_prices_recorded_at ON latest_prices(recorded_at);
+
+-- Backfill the most recent price per item and supermarket from the last 30 days of history
+-- (newer rows already written by the loader are kept)
+INSERT INTO latest_prices (item_code, supermarket_id, product_id, price, currency, source_file, recorded_at)
+SELECT DISTINCT ON (item_code, supermarket_id)
+    item_code, supermarket_id, product_id, price, currency, source_file, recorded_at
+FROM price_history
+WHERE record_date >= CURRENT_DATE - INTERVAL '30 days'
+ORDER BY item_code, supermarket_id, record_date DESC, recorded_at DESC
+ON CONFLICT (item_code, supermarket_id) DO UPDATE SET
+    product_id = EXCLUDED.product_id,
+    price = EXCLUDED.price,
+    currency = EXCLUDED.currency,
+    source_file = EXCLUDED.source_file,
+    recorded_at = EXCLUDED.recorded_at
+WHERE latest_prices.recorded_at < EXCLUDED.recorded_at;
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- ==========================================
+-- FILE LOCATION: database/migrations/002_products_updated_at_index.sql
+--
+-- Adds the products.updated_at index that the server's delta catalog refresh reads
+-- through (fresh installs get it from schema.sql). Run it BEFORE deploying a server
+-- version with delta refreshes:
+--   docker exec -i nutrition-postgres psql -U nutrition_user -d nutrition_app < migrations/002_products_updated_at_index.sql
+-- Safe to run more than once.
+-- ==========================================
+
+-- Delta refreshes select products changed since the last high-water mark
+CREATE INDEX IF NOT EXISTS idx_products_updated_at ON products(updated_at);
@@ -105,6 +105,28 @@ CREATE TABLE price_history (
 CREATE UNIQUE INDEX idx_price_history_unique_daily 
 ON price_history(item_code, supermarket_id, record_date);
 
+-- ==========================================
+-- LATEST PRICES
+-- ==========================================
+
+-- One row per item and supermarket, upserted by the loader alongside price_history,
+-- so price lookups do not depend on how much history has accumulated
+CREATE TABLE latest_prices (
+    item_code VARCHAR(50) NOT NULL,
+    supermarket_id INTEGER NOT NULL REFERENCES supermarkets(id),
+    product_id INTEGER REFERENCES products(id) ON DELETE SET NULL,
+    
+    price DECIMAL(10,2) NOT NULL CHECK (price > 0),
+    currency VARCHAR(3) DEFAULT 'ILS',
+    
+    source_file VARCHAR(255),
+    recorded_at TIMESTAMPTZ DEFAULT NOW(),
+    
+    PRIMARY KEY (item_code, supermarket_id)
+);
+
+-- Existing databases: run migrations/001_latest_prices.sql (creates and backfills this table)
+
 -- ==========================================
 -- USER TABLES (Keep minimal for your app)
 -- ==========================================
@@ -203,6 +225,7 @@ CREATE INDEX idx_products_item_code ON products(item_code);
 CREATE INDEX idx_products_active ON products(is_active) WHERE is_active = true;
 CREATE INDEX idx_products_category ON products(category_id);
 CREATE INDEX idx_products_menu_eligible ON products(can_include_in_menu) WHERE can_include_in_menu = true;
+CREATE INDEX idx_products_updated_at ON products(updated_at);
 
 -- JSONB nutrition index
 CREATE INDEX idx_products_nutrition_gin ON products USING GIN(nutrition);
@@ -211,6 +234,7 @@ CREATE INDEX idx_products_nutrition_gin ON products USING GIN(nutrition);
 CREATE INDEX idx_price_history_item_code ON price_history(item_code);
 CREATE INDEX idx_price_history_product_time ON price_history(product_id, recorded_at DESC);
 CREATE INDEX idx_price_history_supermarket_time ON price_history(supermarket_id, recorded_at DESC);
+CREATE INDEX idx_latest_prices_recorded_at ON latest_prices(recorded_at);
 
 -- Text search (remove hebrew config, use simple)
 CREATE INDEX idx_products_name_search ON products USING GIN(to_tsvector('simple', coalesce(name, '')));